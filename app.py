@@ -1,25 +1,69 @@
 import asyncio
 import concurrent.futures
+import logging
+import os
+import signal
 import threading
-from gameboard import Player
-from llm import get_llm_proposed_moves
+from gameboard import GameBoard, Player
+import llm
+from llm import get_llm_proposed_moves, warm_client
 from ui_display import GameBoardUI
-from async_voice_controller import SimpleAsyncVoiceController
+from async_voice_controller import SimpleAsyncVoiceController, streams_from_spec
+from state_sync import StateSyncServer
+from command_parser import FastPathStats, parse_command, step_to_moves
+from transcript_manager import TranscriptManager
+from transcription import TranscriptionPool
+from tracing import tracer
+from profiler import TickProfiler
+import metrics
+from logs import Lazy, setup_logging, shutdown_logging
 import tkinter as tk
 
+logger = logging.getLogger(__name__)
+
+
+class VoiceChannel:
+    """One voice input stream and the conversation it drives."""
+
+    def __init__(self, voice_controller):
+        self.voice_controller = voice_controller
+        self.player = voice_controller.player
+        self.colors = voice_controller.colors
+        self.transcript = TranscriptManager()
+        # Steps left from an order the local parser handled; the LLM is
+        # skipped until they run out
+        self.command_plan = []
+
+    def reset(self):
+        """Start a fresh conversation after what was already said."""
+        self.transcript = TranscriptManager(
+            cursor=self.voice_controller.transcript_log.next_seq
+        )
+        self.command_plan = []
+
+    def owns(self, piece) -> bool:
+        return piece.owner == self.player and (
+            self.colors is None or piece.color in self.colors
+        )
+
+
 class GameManager:
     """Manages the game state and provides restart functionality."""
     
     def __init__(self):
         self.ui = None
-        self.voice_controller = None
+        self.channels = []
         self.game_running = False
         self.current_after_id = None
+        self.state_sync = None
+        self.fast_path_stats = FastPathStats()
+        self.profiler = TickProfiler()
         
-    def set_components(self, ui, voice_controller):
-        """Set the UI and voice controller components."""
+    def set_components(self, ui, voice_controllers, state_sync=None):
+        """Set the UI, voice input streams and optional state sync server."""
         self.ui = ui
-        self.voice_controller = voice_controller
+        self.channels = [VoiceChannel(controller) for controller in voice_controllers]
+        self.state_sync = state_sync
         
     def start_game_loop(self):
         """Start or restart the game loop."""
@@ -36,48 +80,126 @@ class GameManager:
         
     def restart_game(self):
         """Restart the game - called by the UI restart callback."""
-        print("🔄 Restarting game...")
+        logger.info("🔄 Restarting game...")
         
-        # Reset the transcript manager for a fresh conversation
-        from transcript_manager import TranscriptManager
-        self.ui.transcript = TranscriptManager()
+        # Reset each stream's transcript manager for a fresh conversation
+        # Start after what was already said so old orders aren't replayed
+        for channel in self.channels:
+            channel.reset()
+
+        if self.state_sync:
+            self.state_sync.publish_reset(self.ui.game_board)
         
         self.start_game_loop()
 
+    def wake(self):
+        """Run the next tick now instead of waiting for the scheduled one.
+
+        Called when new speech arrives so the LLM sees it right away.
+        """
+        if not self.game_running or not self.current_after_id:
+            return
+        self.ui.master.after_cancel(self.current_after_id)
+        self.current_after_id = self.ui.master.after_idle(self.execute_game_loop)
+
+    def wake_threadsafe(self):
+        """``wake`` from any thread: the call is handed to the UI's event loop."""
+        try:
+            self.ui.master.after(0, self.wake)
+        except RuntimeError:
+            # Tk's main loop has already exited
+            pass
+
+    def _channel_moves(self, channel, executor):
+        """Moves for one voice stream: parsed locally, or a future from its LLM."""
+        board = self.ui.game_board
+        # Pick up transcripts added since the last tick
+        prompt = board.to_prompt(channel.player, threats=llm.threat_hints)
+        new_text = channel.transcript.add_message(
+            prompt,
+            channel.voice_controller.transcript_log,
+            channel.voice_controller.get_partial(),
+        )
+
+        # Literal orders are turned into moves locally, skipping the LLM
+        if new_text is not None:
+            plan = parse_command(new_text)
+            self.fast_path_stats.record(plan is not None)
+            channel.command_plan = plan or []
+            if plan:
+                logger.info("⚡ Fast path: %r - %s", new_text, Lazy(self.fast_path_stats.report))
+
+        if channel.command_plan:
+            return step_to_moves(channel.command_plan.pop(0), board, channel.player)
+        # Once the plan is done the LLM takes over, with the order and any
+        # partials of the next one in its conversation
+        return executor.submit(
+            get_llm_proposed_moves, board, channel.player, channel.transcript.conversation
+        )
+
+    @tracer.traced("tick")
     def execute_game_loop(self):
         """Game loop that processes moves and checks for victory conditions."""
+        self.current_after_id = None
         if not self.game_running:
             return
 
-        # Get transcripts from voice controller
-        full_transcript = self.voice_controller.get_full_transcript()
-        prompt = self.ui.game_board.to_prompt(Player.PLAYER)
-        new_text = self.ui.transcript.add_message(prompt, full_transcript)
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-            # Submit both tasks
-            ai_future = executor.submit(get_llm_proposed_moves, self.ui.game_board, Player.ENEMY, None)
-            user_future = executor.submit(get_llm_proposed_moves, self.ui.game_board, Player.PLAYER, self.ui.transcript.conversation)
-            
-            # Get results from both calls
-            ai_selected_moves = ai_future.result()
-            user_selected_moves = user_future.result()
+        # Samples stacks only while a profiling window is open
+        self.profiler.tick_started()
+        try:
+            self._run_tick()
+        finally:
+            self.profiler.tick_finished()
+
+    def _run_tick(self):
+        board = self.ui.game_board
+        voiced = {channel.player for channel in self.channels}
+        # Sides without a voice stream are played by the AI
+        ai_players = [p for p in Player if p not in voiced]
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(self.channels) + len(ai_players)
+        ) as executor:
+            # Submit every LLM call before waiting on any of them
+            ai_futures = [
+                executor.submit(get_llm_proposed_moves, board, player, None)
+                for player in ai_players
+            ]
+            channel_moves = [
+                self._channel_moves(channel, executor) for channel in self.channels
+            ]
+
+            # Get results from all calls
+            selected_moves = {}
+            for future in ai_futures:
+                selected_moves.update(future.result())
+            for channel, moves in zip(self.channels, channel_moves):
+                if isinstance(moves, concurrent.futures.Future):
+                    moves = moves.result()
+                # A stream only commands its own colors
+                selected_moves.update(
+                    (piece_id, direction)
+                    for piece_id, direction in moves.items()
+                    if piece_id in board.pieces and channel.owns(board.pieces[piece_id])
+                )
 
         # Execute the turn and get results including win condition
-        turn_result = self.ui.game_board.execute_turn(
-            {
-                **user_selected_moves,
-                **ai_selected_moves,
-            }
-        )
+        turn_result = board.execute_turn(selected_moves)
+        metrics.game_ticks.inc()
+        for result in turn_result["move_results"].values():
+            if not result["success"]:
+                metrics.failed_moves.labels(reason=result["reason"]).inc()
+
+        if self.state_sync:
+            self.state_sync.publish_turn(turn_result)
 
         # Check if game is over from the turn result
         if turn_result.get("game_over", False):
             winner = turn_result.get("winner")
             if winner:
-                print(f"🎉 Game Over! {winner.value} wins by first capture!")
+                logger.info("🎉 Game Over! %s wins by first capture!", winner.value)
             else:
-                print("🎉 Game Over!")
+                logger.info("🎉 Game Over!")
 
             # Show the game over screen immediately
             self.ui.show_game_over(victor=winner)
@@ -86,30 +208,105 @@ class GameManager:
             self.stop_game_loop()
             return
 
-        self.ui.update_display()
+        self.ui.update_display(turn_result)
+
+        # Close the voice-to-pixels span for instructions now on screen
+        for channel in self.channels:
+            if channel.transcript.pending_origin is not None:
+                tracer.record("voice_to_pixels", channel.transcript.pending_origin)
+                channel.transcript.pending_origin = None
 
         # Schedule the next move in 1 second if game is still running
         if self.game_running:
             self.current_after_id = self.ui.master.after(1000, lambda: self.execute_game_loop())
 
 
-async def async_main():
-    """Async main function that integrates voice controller with the game."""
-    # Initialize voice controller
-    voice_controller = SimpleAsyncVoiceController()
+async def deliver_transcripts(voice_controller, game_manager):
+    """Wake the game loop whenever the voice controller produces a transcript."""
+    while True:
+        await voice_controller.next_transcript()
+        # Several utterances may have landed together; one tick covers them all
+        voice_controller.drain_transcripts()
+        game_manager.wake_threadsafe()
+
+
+def start_event_loop():
+    """Run an asyncio event loop on a daemon thread; returns the loop and thread.
+
+    Tk's ``mainloop()`` keeps the main thread. Voice streams and transcript
+    delivery run on this loop and reach Tk only through ``after``, which
+    tkinter hands over to the Tk thread.
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="asyncio", daemon=True)
+    thread.start()
+    return loop, thread
+
+
+def run_game():
+    """Run the game with voice controllers, until the window is closed."""
+    loop, loop_thread = start_event_loop()
+
+    def run(coro):
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    # One input stream per microphone, e.g. VOICE_STREAMS="1=player:red,blue;2=player:green,yellow",
+    # all transcribed on one shared pool; the default microphone otherwise
+    transcription_pool = TranscriptionPool()
+    stream_spec = os.getenv("VOICE_STREAMS")
+    if stream_spec:
+        voice_controllers = streams_from_spec(stream_spec, transcription_pool)
+    else:
+        voice_controllers = [SimpleAsyncVoiceController(transcription_pool=transcription_pool)]
+    state_sync = None
+    metrics_server = None
+    game_manager = None
+    delivery_tasks = []
 
     try:
+        # openai is imported with the client; do it while everything else starts
+        warm_client()
+
         # Start voice listening
-        await voice_controller.start_listening()
-        print("🎤 Voice controller started")
+        for voice_controller in voice_controllers:
+            run(voice_controller.start_listening())
+        logger.info("🎤 %d voice stream(s) started", len(voice_controllers))
 
         # Create tkinter UI in main thread
         root = tk.Tk()
-        app = GameBoardUI(root)
+        # BOARD_SIZE and PIECES_PER_SIDE scale the game up from 10x10 with 4 units
+        board = GameBoard(
+            size=int(os.getenv("BOARD_SIZE", "10")),
+            pieces_per_side=int(os.getenv("PIECES_PER_SIDE", "4")),
+        )
+        # THREAT_OVERLAY=1 outlines dangerous and capturing cells for the player
+        app = GameBoardUI(root, board, show_threats=os.getenv("THREAT_OVERLAY") == "1")
         
         # Create game manager
+        # Serve board updates to spectators if a sync port is configured
+        sync_port = os.getenv("STATE_SYNC_PORT")
+        if sync_port:
+            state_sync = StateSyncServer(port=int(sync_port))
+            state_sync.start(app.game_board)
+
+        # Expose counters for scraping if a metrics port is configured
+        metrics_port = os.getenv("METRICS_PORT")
+        if metrics_port:
+            metrics_server = metrics.MetricsServer(port=int(metrics_port))
+            metrics_server.start()
+
         game_manager = GameManager()
-        game_manager.set_components(app, voice_controller)
+        game_manager.set_components(app, voice_controllers, state_sync)
+
+        # Profile ticks on demand: PROFILE_TICKS=N profiles the first N ticks,
+        # `kill -USR1 <pid>` the next N (20 by default) at any time
+        profile_ticks = os.getenv("PROFILE_TICKS")
+        if profile_ticks:
+            game_manager.profiler.ticks = int(profile_ticks)
+            game_manager.profiler.request()
+        game_manager.profiler.output_dir = os.getenv("PROFILE_DIR", "profiles")
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: game_manager.profiler.request())
         
         # Set up the restart callback in the UI
         app.set_restart_callback(game_manager.restart_game)
@@ -117,17 +314,43 @@ async def async_main():
         # Start the game loop after a short delay
         root.after(200, lambda: game_manager.start_game_loop())
 
+        delivery_tasks = [
+            asyncio.run_coroutine_threadsafe(
+                deliver_transcripts(voice_controller, game_manager), loop
+            )
+            for voice_controller in voice_controllers
+        ]
         root.mainloop()
 
     except KeyboardInterrupt:
-        print("\n🛑 Stopping...")
+        logger.info("🛑 Stopping...")
     finally:
-        await voice_controller.stop_listening()
+        for task in delivery_tasks:
+            task.cancel()
+        for voice_controller in voice_controllers:
+            run(voice_controller.stop_listening())
+        if game_manager is not None:
+            # Keep a window cut short by exit
+            game_manager.profiler.finish()
+        if state_sync:
+            state_sync.stop()
+        if metrics_server:
+            metrics_server.stop()
+        trace_file = os.getenv("TRACE_FILE")
+        if trace_file:
+            tracer.export_chrome(trace_file)
+            logger.info("📈 Trace written to %s\n%s", trace_file, Lazy(tracer.report))
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join(timeout=2.0)
 
 
 def main():
-    """Entry point that runs the async main function."""
-    asyncio.run(async_main())
+    """Entry point that runs the game."""
+    setup_logging()
+    try:
+        run_game()
+    finally:
+        shutdown_logging()
 
 
 if __name__ == "__main__":
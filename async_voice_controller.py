@@ -1,37 +1,122 @@
 import asyncio
+import logging
 import threading
+from typing import Iterable, Optional
 from voice import VoiceController  # Assuming you have a VoiceController class defined elsewhere
+from audio_sources import AudioSource, MicrophoneSource
+from gameboard import Color, Player
+from transcript_manager import TranscriptLog
+from transcription import TranscriptionPool
+from logs import fields
+import tracing
+
+logger = logging.getLogger(__name__)
 
 class SimpleAsyncVoiceController:
-    """Simpler version that runs everything in one process but still async."""
+    """Simpler version that runs everything in one process but still async.
+
+    One controller is one input stream. For several players, create one per
+    microphone, each tagged with its player (and optionally the colors it
+    commands), all sharing one ``TranscriptionPool``.
+    """
     
-    def __init__(self):
-        self.transcripts = []
+    def __init__(
+        self,
+        streaming: bool = True,
+        transcriber=None,
+        source: Optional[AudioSource] = None,
+        transcription_pool: Optional[TranscriptionPool] = None,
+        player: Player = Player.PLAYER,
+        colors: Optional[Iterable[Color]] = None,
+        name: Optional[str] = None,
+    ):
+        """
+        Args:
+            streaming: Also collect partial hypotheses while the user is speaking
+            transcriber: Speech-to-text engine passed to VoiceController
+            source: Audio input, the default microphone if None
+            transcription_pool: Worker pool shared with other streams
+            player: Side whose pieces this stream commands
+            colors: Colors this stream commands, all of the player's if None
+            name: Label for log messages
+        """
+        self.streaming = streaming
+        self.transcriber = transcriber
+        self.source = source
+        self.transcription_pool = transcription_pool
+        self.player = player
+        self.colors = set(colors) if colors else None
+        self.name = name
+        # Transcripts arrive on worker threads; the log is shared with the game loop
+        self.transcript_log = TranscriptLog()
+        self.partials = {}  # utterance id -> stable words heard so far
+        self._partials_lock = threading.Lock()
         self.voice_controller = None
         self.listening_task = None
         self._stop_event = threading.Event()
+        self._loop = None
+        self.transcript_queue = None
+        self._thread_done = None
 
     def _transcript_callback(self, transcript: str):
-        """Handle transcripts from VoiceController."""
-        self.transcripts.append(transcript)
-        print(f"📝 Added transcript #{len(self.transcripts)}: '{transcript}'")
+        """Handle transcripts from VoiceController. Runs on a transcription thread."""
+        seq = self.transcript_log.append(transcript, origin=tracing.origin.get())
+        logger.debug("📝 Added transcript #%d: %r", seq + 1, transcript)
+
+        # Hand the transcript to the event loop so waiters wake immediately
+        self._notify(transcript)
+
+    def _partial_callback(self, utterance_id: int, stable_text):
+        """Track partial hypotheses; ``None`` means the utterance is finished.
+
+        Partials don't wake anyone: the next regular tick picks them up with
+        ``get_partial``, so talking doesn't speed up the game clock.
+        """
+        with self._partials_lock:
+            if stable_text is None:
+                self.partials.pop(utterance_id, None)
+            else:
+                self.partials[utterance_id] = stable_text
+
+    def _notify(self, text: str):
+        """Wake anyone awaiting ``next_transcript``. Safe from any thread."""
+        if self._loop:
+            try:
+                self._loop.call_soon_threadsafe(self.transcript_queue.put_nowait, text)
+            except RuntimeError:
+                pass  # Event loop already closed during shutdown
 
     def _run_voice_controller(self):
         """Run VoiceController in a separate thread."""
-        self.voice_controller = VoiceController(callback=self._transcript_callback)
+        self.voice_controller = VoiceController(
+            callback=self._transcript_callback,
+            transcriber=self.transcriber,
+            partial_callback=self._partial_callback if self.streaming else None,
+            source=self.source,
+            transcription_pool=self.transcription_pool,
+            name=self.name,
+        )
         
         try:
             self.voice_controller.start_listening()
         except Exception as e:
-            print(f"Voice controller error: {e}")
+            logger.exception("Voice controller error: %s", e)
+        finally:
+            try:
+                self._loop.call_soon_threadsafe(self._thread_done.set)
+            except RuntimeError:
+                pass  # Event loop already closed during shutdown
 
     async def start_listening(self):
         """Start voice detection in background thread."""
         if self.listening_task and not self.listening_task.done():
-            print("Already listening!")
+            logger.warning("Already listening!")
             return
 
         self._stop_event.clear()
+        self._loop = asyncio.get_running_loop()
+        self.transcript_queue = asyncio.Queue()
+        self._thread_done = asyncio.Event()
         
         # Start voice controller in separate thread
         voice_thread = threading.Thread(target=self._run_voice_controller, daemon=True)
@@ -39,12 +124,11 @@ class SimpleAsyncVoiceController:
 
         # Monitor the thread
         self.listening_task = asyncio.create_task(self._monitor_listening(voice_thread))
-        print("🎤 Simple async voice controller started")
+        logger.info("🎤 Simple async voice controller started", extra=fields(stream=self.name))
 
     async def _monitor_listening(self, voice_thread):
-        """Monitor the voice controller thread."""
-        while voice_thread.is_alive() and not self._stop_event.is_set():
-            await asyncio.sleep(0.1)
+        """Wait for the voice controller thread to finish."""
+        await self._thread_done.wait()
 
     async def stop_listening(self):
         """Stop voice detection."""
@@ -52,6 +136,9 @@ class SimpleAsyncVoiceController:
             self.voice_controller.stop_listening()
 
         self._stop_event.set()
+        if self._thread_done:
+            # The thread may never have produced a controller to stop
+            self._thread_done.set()
 
         if self.listening_task:
             try:
@@ -59,15 +146,69 @@ class SimpleAsyncVoiceController:
             except asyncio.TimeoutError:
                 self.listening_task.cancel()
 
-        print("🔴 Simple async voice controller stopped")
+        logger.info("🔴 Simple async voice controller stopped", extra=fields(stream=self.name))
+
+    async def next_transcript(self) -> str:
+        """Wait for the next final transcript and return its text."""
+        return await self.transcript_queue.get()
+
+    def drain_transcripts(self) -> list[str]:
+        """Return transcripts already queued without waiting."""
+        drained = []
+        while not self.transcript_queue.empty():
+            drained.append(self.transcript_queue.get_nowait())
+        return drained
+
+    def get_partial(self) -> str:
+        """Stable words of utterances still being spoken, oldest first."""
+        with self._partials_lock:
+            return " ".join(text for _, text in sorted(self.partials.items()))
 
     def get_all_transcripts(self):
-        """Get all transcripts collected so far."""
-        return self.transcripts.copy()
+        """Get all retained transcripts."""
+        return self.transcript_log.texts()
 
     def get_full_transcript(self, separator=" "):
-        """Get all transcripts joined as a single string."""
-        return separator.join(self.transcripts)
+        """Get all retained transcripts joined as a single string."""
+        return separator.join(self.transcript_log.texts())
+
+
+def streams_from_spec(
+    spec: str, transcription_pool: TranscriptionPool, **kwargs
+) -> list[SimpleAsyncVoiceController]:
+    """One controller per entry of a stream spec such as ``"1=player:red,blue;3=enemy"``.
+
+    Each entry is ``device=player[:color,...]``: a sounddevice input index
+    (or name), the side it speaks for, and optionally the colors it commands.
+    Remaining keyword arguments go to every controller.
+    """
+    controllers = []
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        device, _, target = entry.partition("=")
+        player_name, _, color_names = target.partition(":")
+        player = next(
+            (p for p in Player if p.value.lower() == player_name.strip().lower()), None
+        )
+        if player is None:
+            raise ValueError(f"Unknown player {player_name!r} in voice stream {entry!r}")
+        colors = []
+        for color_name in filter(None, (c.strip() for c in color_names.split(","))):
+            color = next((c for c in Color if c.value.lower() == color_name.lower()), None)
+            if color is None:
+                raise ValueError(f"Unknown color {color_name!r} in voice stream {entry!r}")
+            colors.append(color)
+        device = device.strip()
+        controllers.append(
+            SimpleAsyncVoiceController(
+                source=MicrophoneSource(device=int(device) if device.isdigit() else device),
+                transcription_pool=transcription_pool,
+                player=player,
+                colors=colors,
+                name=f"mic {device}",
+                **kwargs,
+            )
+        )
+    return controllers
 
 async def simple_main():
     """Simple single-process example."""
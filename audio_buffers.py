@@ -0,0 +1,148 @@
+"""Preallocated audio buffers for capture and transcription.
+
+The ring and capture buffers are allocated once up front. Writing a block
+copies samples into existing storage, so the real-time callback never grows a
+list or allocates per-sample objects, and reads hand out NumPy views instead
+of copies. Finished utterances are converted once into pooled int16 PCM
+buffers that transcribers read through a memoryview.
+"""
+
+import threading
+
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-capacity circular buffer that keeps the most recent samples."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=np.float32)
+        self.write_pos = 0
+        self.size = 0
+
+    def write(self, samples: np.ndarray):
+        """Append samples, overwriting the oldest once full."""
+        n = len(samples)
+        if n >= self.capacity:
+            self.data[:] = samples[n - self.capacity :]
+            self.write_pos = 0
+            self.size = self.capacity
+            return
+
+        end = self.write_pos + n
+        if end <= self.capacity:
+            self.data[self.write_pos : end] = samples
+        else:
+            first = self.capacity - self.write_pos
+            self.data[self.write_pos :] = samples[:first]
+            self.data[: n - first] = samples[first:]
+        self.write_pos = end % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def copy_to(self, out: np.ndarray) -> int:
+        """Copy buffered samples, oldest first, into ``out``. Returns the count."""
+        start = (self.write_pos - self.size) % self.capacity
+        if start + self.size <= self.capacity:
+            out[: self.size] = self.data[start : start + self.size]
+        else:
+            first = self.capacity - start
+            out[:first] = self.data[start:]
+            out[first : self.size] = self.data[: self.size - first]
+        return self.size
+
+    def clear(self):
+        self.write_pos = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+
+class CaptureBuffer:
+    """Preallocated buffer that one recording is appended into."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=np.float32)
+        self.length = 0
+
+    def start_from(self, ring: RingBuffer):
+        """Begin a new recording seeded with the ring buffer's contents."""
+        self.length = ring.copy_to(self.data)
+
+    def append(self, samples: np.ndarray) -> bool:
+        """Append samples. Returns False if the buffer filled up and samples were cut."""
+        n = min(len(samples), self.capacity - self.length)
+        self.data[self.length : self.length + n] = samples[:n]
+        self.length += n
+        return n == len(samples)
+
+    def view(self) -> np.ndarray:
+        """Zero-copy view of the recorded samples."""
+        return self.data[: self.length]
+
+    def clear(self):
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+
+class PcmSegment:
+    """An utterance converted to 16-bit PCM in a pooled buffer.
+
+    ``frames`` is a zero-copy memoryview of the raw little-endian bytes, ready
+    for a transcriber. Call ``release`` once the transcriber is done with it.
+    """
+
+    __slots__ = ("buffer", "length", "_pool")
+
+    def __init__(self, buffer: np.ndarray, length: int, pool: "PcmBufferPool"):
+        self.buffer = buffer
+        self.length = length
+        self._pool = pool
+
+    @property
+    def frames(self) -> memoryview:
+        return memoryview(self.buffer[: self.length]).cast("B")
+
+    def release(self):
+        if self._pool is not None:
+            self._pool._release(self.buffer)
+            self._pool = None
+
+
+class PcmBufferPool:
+    """Reusable int16 buffers for handing finished utterances to transcribers.
+
+    Buffers are allocated on first use and recycled after release, so steady
+    state needs only as many as there are utterances in flight.
+    """
+
+    def __init__(self, capacity: int, max_free: int = 4):
+        """
+        Args:
+            capacity: Samples per buffer; the longest possible utterance
+            max_free: Released buffers kept for reuse
+        """
+        self.capacity = capacity
+        self.max_free = max_free
+        self._free = []
+        self._lock = threading.Lock()
+
+    def convert(self, samples: np.ndarray) -> PcmSegment:
+        """Convert float32 samples to int16 PCM in one pass, without temporaries."""
+        with self._lock:
+            buffer = self._free.pop() if self._free else None
+        if buffer is None:
+            buffer = np.empty(self.capacity, dtype=np.int16)
+        n = len(samples)
+        # Scale and cast straight into the int16 buffer
+        np.multiply(samples, 32767, out=buffer[:n], casting="unsafe")
+        return PcmSegment(buffer, n, self)
+
+    def _release(self, buffer: np.ndarray):
+        with self._lock:
+            if len(self._free) < self.max_free:
+                self._free.append(buffer)
@@ -0,0 +1,201 @@
+"""Audio inputs for VoiceController.
+
+Every source drives ``callback(indata, frames, time_info, status)`` with the
+same signature sounddevice uses, so ``VoiceController.audio_callback`` can't
+tell a live microphone from a replayed file. Sources also provide the clock
+the controller measures silences and durations with: wall time for the
+microphone, simulated time for replays, so a replay gives identical
+segmentation whether it runs in real time or as fast as possible.
+"""
+
+import logging
+import threading
+import time
+import wave
+from typing import Callable, Optional, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class TimeInfo:
+    """Stand-in for sounddevice's callback time info."""
+
+    __slots__ = ("inputBufferAdcTime", "currentTime")
+
+    def __init__(self, adc_time: float):
+        self.inputBufferAdcTime = adc_time
+        self.currentTime = adc_time
+
+
+class AudioSource:
+    """Base class for audio inputs."""
+
+    sample_rate: int
+    block_size: int
+    # Real-time sources can't wait on downstream work without losing audio
+    realtime: bool = True
+
+    def now(self) -> float:
+        """Current time in seconds on this source's clock."""
+        return time.time()
+
+    def run(self, callback: Callable, stop_event: threading.Event):
+        """Deliver audio to ``callback`` until exhausted or ``stop_event`` is set."""
+        raise NotImplementedError
+
+
+class MicrophoneSource(AudioSource):
+    """Live input through ``sounddevice.InputStream``."""
+
+    def __init__(self, sample_rate: int = 16000, block_seconds: float = 0.05, device=None):
+        """
+        Args:
+            sample_rate: Samples per second to capture
+            block_seconds: Callback block length
+            device: sounddevice input device index or name, default device if None
+        """
+        self.sample_rate = sample_rate
+        self.block_size = int(sample_rate * block_seconds)
+        self.device = device
+
+    def run(self, callback, stop_event):
+        import sounddevice as sd
+
+        # Optimized settings to prevent buffer overflow
+        # Start audio input stream
+        with sd.InputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            callback=callback,
+            blocksize=self.block_size,  # 50ms blocks for better responsiveness
+            dtype='float32',
+            latency='low',  # Use low latency mode
+            device=self.device,
+        ):
+            logger.info("🎤 Listening...")
+
+            # Block until stop_listening() instead of polling
+            stop_event.wait()
+
+
+class ArraySource(AudioSource):
+    """Replays float32 samples, in real time or as fast as possible."""
+
+    def __init__(
+        self,
+        audio: np.ndarray,
+        sample_rate: int = 16000,
+        block_seconds: float = 0.05,
+        realtime: bool = False,
+        start_time: float = 0.0,
+    ):
+        """
+        Args:
+            audio: Mono samples in [-1, 1]
+            sample_rate: Samples per second of ``audio``
+            block_seconds: Callback block length
+            realtime: Sleep between blocks to match wall-clock pacing
+            start_time: Simulated clock value at the first sample
+        """
+        self.audio = np.ascontiguousarray(audio, dtype=np.float32).reshape(-1, 1)
+        self.sample_rate = sample_rate
+        self.block_size = int(sample_rate * block_seconds)
+        self.realtime = realtime
+        self.start_time = start_time
+        self._now = start_time
+
+    @property
+    def duration(self) -> float:
+        return len(self.audio) / self.sample_rate
+
+    def now(self) -> float:
+        return self._now
+
+    def run(self, callback, stop_event):
+        wall_start = time.perf_counter()
+        total = len(self.audio)
+        for offset in range(0, total, self.block_size):
+            if stop_event.is_set():
+                return
+            elapsed = offset / self.sample_rate
+            if self.realtime:
+                delay = wall_start + elapsed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self._now = self.start_time + elapsed
+            block = self.audio[offset : offset + self.block_size]
+            callback(block, len(block), TimeInfo(self._now), None)
+        self._now = self.start_time + total / self.sample_rate
+
+
+def read_wav(path: str) -> tuple[np.ndarray, int]:
+    """Load a PCM WAV file as mono float32 samples. Returns (samples, sample_rate)."""
+    with wave.open(path, "rb") as wav_file:
+        sample_rate = wav_file.getframerate()
+        channels = wav_file.getnchannels()
+        width = wav_file.getsampwidth()
+        frames = wav_file.readframes(wav_file.getnframes())
+
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported sample width {width} in {path}")
+    # Keep the first channel, like the live callback does
+    return samples[::channels], sample_rate
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int):
+    """Save mono float32 samples as a 16-bit PCM WAV file."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+
+
+class WavFileSource(ArraySource):
+    """Replays one or more WAV files back to back, with silence in between."""
+
+    def __init__(
+        self,
+        paths: Union[str, Sequence[str]],
+        gap_seconds: float = 1.5,
+        block_seconds: float = 0.05,
+        realtime: bool = False,
+        start_time: float = 0.0,
+    ):
+        """
+        Args:
+            paths: WAV file or files; all must share one sample rate
+            gap_seconds: Silence inserted before each file so utterances end
+            block_seconds: Callback block length
+            realtime: Sleep between blocks to match wall-clock pacing
+            start_time: Simulated clock value at the first sample
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+        parts = []
+        sample_rate: Optional[int] = None
+        for path in paths:
+            samples, rate = read_wav(path)
+            if sample_rate is None:
+                sample_rate = rate
+            elif rate != sample_rate:
+                raise ValueError(f"{path} is {rate} Hz, expected {sample_rate} Hz")
+            parts.append(np.zeros(int(rate * gap_seconds), dtype=np.float32))
+            parts.append(samples)
+        parts.append(np.zeros(int((sample_rate or 16000) * gap_seconds), dtype=np.float32))
+        super().__init__(
+            np.concatenate(parts),
+            sample_rate or 16000,
+            block_seconds=block_seconds,
+            realtime=realtime,
+            start_time=start_time,
+        )
@@ -0,0 +1,345 @@
+"""Engine microbenchmarks with a regression gate.
+
+Times the hot ``GameBoard`` methods on a set of fixed, seeded layouts:
+
+* ``opening``: the real starting position
+* ``dense``: two interlocking clusters in the middle of a 10x10 board
+* ``random``: a third of a 10x10 board filled at random
+* ``large30`` / ``large60``: random boards of 30x30 and 60x60 at 15% fill
+* ``sparse2000``: 400 units scattered over a 2000x2000 board; the
+  whole-board renderers (``to_prompt``, ``display_board``) are skipped for
+  boards this large
+
+``execute_turn`` moves every unit on a fresh board; ``quiet_turn`` moves
+four units on a board that has already played a turn, the common case.
+``simulate_turn`` previews that same kind of turn without changing the board.
+``threat_map`` scores the cells around every piece for the player.
+
+Each figure is the median of several rounds, in microseconds per call. A
+fixed pure-Python reference workload is timed in a round of its own before
+every benchmark round, and each baseline figure is scaled by how the
+reference's median changed over that benchmark's rounds, so a machine that
+is busy or throttled for part of the run doesn't read as a regression.
+The script re-runs itself with ``PYTHONHASHSEED=0`` so every run hashes
+strings, and therefore enum members, the same way.
+
+Results can be saved as JSON and compared against a baseline. A benchmark
+still slower than the baseline by more than ``--threshold`` after
+``--retries`` re-measurements makes the run exit with status 1.
+
+Baselines are machine specific, so regenerate ``engine_baseline.json`` on
+the machine that runs the gate. When adding a benchmark, record only its
+figures with ``--add-missing``; ``--update-baseline`` rewrites every figure
+and hides whatever changed since the baseline was taken.
+
+Run from the repository root:
+
+    python -m benchmarks.engine                       # print results
+    python -m benchmarks.engine --compare             # gate against the baseline
+    python -m benchmarks.engine --add-missing         # record new benchmarks
+    python -m benchmarks.engine --update-baseline     # accept current numbers
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from gameboard import Color, Direction, GameBoard, Player
+from threat_map import ThreatMap
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "engine_baseline.json")
+
+# (owner, row, col)
+Layout = List[Tuple[Player, int, int]]
+
+
+def build_board(size: int, layout: Layout) -> GameBoard:
+    """A board of ``size`` x ``size`` holding exactly the pieces in ``layout``."""
+    board = GameBoard(size, pieces_per_side=0)
+    counts = {Player.PLAYER: 0, Player.ENEMY: 0}
+    for owner, row, col in layout:
+        board.add_piece(owner, row, col, Color.from_idx(counts[owner] % 4))
+        counts[owner] += 1
+    return board
+
+
+def opening_layout() -> Tuple[int, Layout]:
+    board = GameBoard()
+    return board.size, [(p.owner, p.row, p.col) for p in board.pieces.values()]
+
+
+def dense_layout() -> Tuple[int, Layout]:
+    # Interlocking 6x6 checkerboard of 2x2 blocks: large groups touching enemy groups
+    layout = []
+    for row in range(2, 8):
+        for col in range(2, 8):
+            owner = Player.PLAYER if (row // 2 + col // 2) % 2 == 0 else Player.ENEMY
+            layout.append((owner, row, col))
+    return 10, layout
+
+
+def random_layout(size: int, fill: float, seed: int) -> Tuple[int, Layout]:
+    rng = random.Random(seed)
+    chosen = rng.sample(range(size * size), int(size * size * fill))
+    return size, [(rng.choice(list(Player)),) + divmod(cell, size) for cell in chosen]
+
+
+SCENARIOS: Dict[str, Callable[[], Tuple[int, Layout]]] = {
+    "opening": opening_layout,
+    "dense": dense_layout,
+    "random": lambda: random_layout(10, 0.33, seed=1),
+    "large30": lambda: random_layout(30, 0.15, seed=2),
+    "large60": lambda: random_layout(60, 0.15, seed=3),
+    "sparse2000": lambda: random_layout(2000, 0.0001, seed=4),
+}
+
+# Benchmarks that render every cell, too slow to repeat on huge boards
+WHOLE_BOARD = {"to_prompt", "display_board"}
+
+
+def _calls(func: Callable[[], object]) -> Callable[[int], float]:
+    def run(number):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - start
+
+    return run
+
+
+def _reference_work():
+    # Pure-Python mix of loops, dict and attribute access, like the engine
+    cells = {}
+    for i in range(2000):
+        cells[(i % 50, i // 50)] = i
+    return sum(value for key, value in cells.items() if key[0] % 2)
+
+
+_reference = _calls(_reference_work)
+
+
+def _calibrate(run: Callable[[int], float], budget: float) -> int:
+    """Calls per round so a round takes about ``budget`` seconds."""
+    elapsed = run(1) or 1e-7
+    return max(1, min(10000, int(budget / elapsed)))
+
+
+def _median_with_reference(
+    rounds: int, number: int, run: Callable[[int], float], reference_number: int
+) -> Tuple[float, float]:
+    """Median per-call microseconds of ``run`` and of the reference workload.
+
+    ``run(number)`` returns elapsed seconds. A reference round precedes each
+    benchmark round, so both medians come from the same stretch of time.
+    """
+    times, references = [], []
+    # As timeit does, keep collector pauses out of the figures
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            references.append(_reference(reference_number) / reference_number)
+            times.append(run(number) / number)
+    finally:
+        gc.enable()
+    return statistics.median(times) * 1e6, statistics.median(references) * 1e6
+
+
+Measurement = Tuple[float, float]  # (us per call, reference us per call)
+
+
+def bench_scenario(
+    size: int, layout: Layout, rounds: int, budget: float
+) -> Dict[str, Measurement]:
+    board = build_board(size, layout)
+    pieces = list(board.pieces.values())
+    rng = random.Random(0)
+    directions = list(Direction)
+    turns = [{piece.id: rng.choice(directions) for piece in pieces} for _ in range(16)]
+    # A handful of units moving, as in most real ticks
+    quiet_turns = [
+        {piece.id: rng.choice(directions) for piece in rng.sample(pieces, min(4, len(pieces)))}
+        for _ in range(16)
+    ]
+
+    def execute_turn_run(number):
+        # execute_turn mutates the board, so each call gets a fresh copy,
+        # built outside the timed region
+        boards = [build_board(size, layout) for _ in range(number)]
+        start = time.perf_counter()
+        for i, fresh in enumerate(boards):
+            fresh.execute_turn(turns[i % len(turns)])
+        return time.perf_counter() - start
+
+    def quiet_turn_run(number):
+        # Boards that have already had a turn, so captures are only checked
+        # around what moves
+        boards = [build_board(size, layout) for _ in range(number)]
+        for fresh in boards:
+            fresh.execute_turn({})
+        start = time.perf_counter()
+        for i, fresh in enumerate(boards):
+            fresh.execute_turn(quiet_turns[i % len(quiet_turns)])
+        return time.perf_counter() - start
+
+    settled = build_board(size, layout)
+    settled.execute_turn({})
+
+    def find_groups():
+        for piece in pieces:
+            board.find_connected_group(piece)
+
+    benchmarks = {
+        "execute_turn": execute_turn_run,
+        "quiet_turn": quiet_turn_run,
+        "simulate_turn": _calls(lambda: settled.simulate_turn(quiet_turns[0])),
+        "check_captures": _calls(board.check_captures),
+        "find_connected_group": _calls(find_groups),
+        "to_prompt": _calls(lambda: board.to_prompt(Player.PLAYER)),
+        "threat_map": _calls(lambda: ThreatMap(board, Player.PLAYER)),
+        "display_board": _calls(board.display_board),
+        "get_game_state": _calls(board.get_game_state),
+    }
+    # Reference rounds are kept short so they sit close to the round they pair with
+    reference_number = _calibrate(_reference, budget / 4)
+    results = {}
+    for name, run in benchmarks.items():
+        if name in WHOLE_BOARD and size > 100:
+            continue
+        results[name] = _median_with_reference(
+            rounds, _calibrate(run, budget), run, reference_number
+        )
+    return results
+
+
+def run_all(rounds: int = 9, budget: float = 0.02, scenarios=None) -> Dict[str, Measurement]:
+    """``{"scenario/benchmark": (us per call, reference us per call)}``."""
+    results = {}
+    for scenario in scenarios or SCENARIOS:
+        size, layout = SCENARIOS[scenario]()
+        for name, measurement in bench_scenario(size, layout, rounds, budget).items():
+            results[f"{scenario}/{name}"] = measurement
+    return results
+
+
+def rescale(measurements: Dict[str, Measurement], reference: float) -> Dict[str, float]:
+    """Microseconds per call as if the reference workload had taken ``reference`` us."""
+    return {key: us * reference / ref for key, (us, ref) in measurements.items()}
+
+
+def compare(
+    results: Dict[str, float], baseline: Dict[str, float], threshold: float
+) -> Dict[str, str]:
+    """Benchmarks slower than baseline by more than ``threshold`` (a fraction).
+
+    Both sides must be on the same reference, see ``rescale``.
+    """
+    regressions = {}
+    for key, us in results.items():
+        base = baseline.get(key)
+        if base and us > base * (1 + threshold):
+            regressions[key] = f"{key}: {base:.1f} -> {us:.1f} us ({us / base - 1:+.0%})"
+    return regressions
+
+
+def _load(path: str) -> Tuple[Dict[str, float], float]:
+    with open(path) as f:
+        data = json.load(f)
+    return data["results"], data.get("reference_us", 0.0)
+
+
+def _save(path: str, results: Dict[str, float], reference: float):
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "reference_us": round(reference, 3),
+        "results": {key: round(us, 3) for key, us in results.items()},
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=9)
+    parser.add_argument("--budget", type=float, default=0.02, help="seconds per round")
+    parser.add_argument("--scenario", choices=list(SCENARIOS), nargs="+")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--compare", action="store_true", help="fail on regressions")
+    parser.add_argument("--threshold", type=float, default=0.35, help="allowed slowdown")
+    parser.add_argument("--retries", type=int, default=2, help="re-runs of regressed scenarios")
+    parser.add_argument(
+        "--add-missing", action="store_true", help="add benchmarks missing from the baseline"
+    )
+    parser.add_argument("--update-baseline", action="store_true", help="replace every figure")
+    args = parser.parse_args()
+
+    if os.environ.get("PYTHONHASHSEED") != "0":
+        # String hashes, and so enum and dict lookup costs, change from one
+        # process to the next; pin them so runs are comparable
+        os.environ["PYTHONHASHSEED"] = "0"
+        os.execv(sys.executable, [sys.executable, "-m", "benchmarks.engine"] + sys.argv[1:])
+
+    measurements = run_all(args.rounds, args.budget, args.scenario)
+    baseline, baseline_reference = (
+        _load(args.baseline) if os.path.exists(args.baseline) else ({}, 0.0)
+    )
+    if args.compare and not baseline:
+        print(f"No baseline at {args.baseline}")
+        sys.exit(2)
+    # Judge the engine, not a busy or throttled machine: express every figure
+    # at the baseline's reference speed
+    reference = statistics.median(ref for _, ref in measurements.values())
+    results = rescale(measurements, baseline_reference or reference)
+
+    regressions = compare(results, baseline, args.threshold) if args.compare else {}
+    for _ in range(args.retries):
+        if not regressions:
+            break
+        # Re-measure suspects so one noisy stretch doesn't fail the gate
+        suspects = {key.split("/")[0] for key in regressions}
+        retry = rescale(run_all(args.rounds, args.budget, suspects), baseline_reference)
+        for key, us in retry.items():
+            results[key] = min(results[key], us)
+        regressions = compare(results, baseline, args.threshold)
+
+    if baseline_reference:
+        print(f"machine speed vs baseline: {baseline_reference / reference:.2f}x "
+              f"(reference {reference:.1f} us)")
+    print(f"{'benchmark':<34}{'us/call':>12}{'baseline':>12}{'change':>9}")
+    for key, us in results.items():
+        base = baseline.get(key)
+        change = f"{us / base - 1:+.0%}" if base else ""
+        base_text = f"{base:.1f}" if base else "-"
+        print(f"{key:<34}{us:>12.1f}{base_text:>12}{change:>9}")
+
+    if args.output:
+        _save(args.output, results, baseline_reference or reference)
+    if args.update_baseline:
+        _save(args.baseline, rescale(measurements, reference), reference)
+        print(f"Baseline written to {args.baseline}")
+    elif args.add_missing:
+        added = {key: us for key, us in results.items() if key not in baseline}
+        _save(args.baseline, {**baseline, **added}, baseline_reference or reference)
+        print(f"Added {len(added)} benchmark(s) to {args.baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for line in regressions.values():
+            print(f"  {line}")
+        sys.exit(1)
+    if args.compare:
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
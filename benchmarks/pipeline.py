@@ -0,0 +1,263 @@
+"""End-to-end pipeline benchmark: recorded voice commands to rendered moves.
+
+Replays a corpus of WAV commands through the same path the game uses:
+
+    WavFileSource -> VoiceController (VAD, segmentation) -> TranscriptionPool
+    (ToneTranscriber as a local STT stub) -> SimpleAsyncVoiceController ->
+    app.GameManager ticks -> TranscriptManager -> get_llm_proposed_moves
+    (fake backend) -> execute_turn -> GameBoardUI on a headless canvas
+
+The game loop runs on an asyncio loop standing in for Tk, with the app's own
+``deliver_transcripts`` waking it. Per-stage throughput and latency
+percentiles come from the tracer spans the pipeline already emits.
+
+The fake LLM backend answers with random moves after ``--llm-latency``
+seconds (plus up to ``--llm-jitter``) and reports token usage like the real
+API. Some corpus commands are literal orders that take the local fast path,
+the rest need the LLM.
+
+Run from the repository root:
+
+    python -m benchmarks.pipeline [--commands 12] [--llm-latency 0.6] [--fast]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+import llm
+from app import GameManager, deliver_transcripts
+from async_voice_controller import SimpleAsyncVoiceController
+from audio_sources import AudioSource, WavFileSource, write_wav
+from gameboard import GameBoard
+from tracing import tracer
+from transcription import ToneTranscriber, TranscriptionPool
+from ui_display import GameBoardUI
+
+# Literal orders (fast path) mixed with ones only the LLM can interpret
+COMMANDS = [
+    "red up",
+    "everyone attack",
+    "blue left twice",
+    "green defend",
+    "all units down",
+    "retreat",
+    "yellow right",
+    "red and blue attack",
+    "stay",
+    "everyone defend then attack",
+]
+
+STAGES = [
+    "utterance",
+    "transcribe",
+    "add_message",
+    "llm",
+    "execute_turn",
+    "check_captures",
+    "draw_board",
+    "tick",
+    "voice_to_pixels",
+]
+
+
+class FakeChatClient:
+    """Stands in for ``OpenAI`` with a fixed latency and random legal-looking moves."""
+
+    def __init__(self, latency: float, jitter: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            moves = {
+                color: self._rng.choice(["up", "down", "left", "right"])
+                for color in ("red", "blue", "green", "yellow")
+            }
+        time.sleep(delay)
+        content = json.dumps(moves)
+        prompt_chars = sum(len(m["content"]) for m in messages)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_chars // 4, completion_tokens=len(content) // 4
+            ),
+        )
+
+
+class LoopScheduler:
+    """The ``after`` API GameManager expects from Tk, on an asyncio loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+
+    def after(self, ms, callback):
+        return self.loop.call_later(ms / 1000, callback)
+
+    def after_idle(self, callback):
+        return self.loop.call_soon(callback)
+
+    def after_cancel(self, handle):
+        handle.cancel()
+
+
+class TickPacedSource(AudioSource):
+    """Replays WAV files as fast as possible, one command per game action.
+
+    Each file starts only once ``ready()`` says the game has acted on the
+    previous one, so faster than real time replays don't pile every
+    utterance into one tick. The clock runs on across files as if they had
+    been played back to back.
+    """
+
+    realtime = False
+
+    def __init__(self, paths, ready, gap_seconds: float = 1.5):
+        self.ready = ready
+        self.sources = []
+        start = 0.0
+        for path in paths:
+            source = WavFileSource(path, gap_seconds=gap_seconds, start_time=start)
+            self.sources.append(source)
+            start += source.duration
+        self.sample_rate = self.sources[0].sample_rate
+        self.block_size = self.sources[0].block_size
+        self._current = self.sources[0]
+
+    def now(self) -> float:
+        return self._current.now()
+
+    def run(self, callback, stop_event):
+        for source in self.sources:
+            while not self.ready():
+                if stop_event.wait(0.002):
+                    return
+            self._current = source
+            source.run(callback, stop_event)
+
+
+def write_corpus(directory: str, count: int, engine: ToneTranscriber, rate: int = 16000):
+    paths, commands = [], []
+    for i in range(count):
+        command = COMMANDS[i % len(COMMANDS)]
+        path = os.path.join(directory, f"command_{i:03d}.wav")
+        write_wav(path, engine.synthesize(command, rate), rate)
+        paths.append(path)
+        commands.append(command)
+    return paths, commands
+
+
+async def run(args, paths):
+    engine = ToneTranscriber()
+
+    def acted_on_last_command():
+        # Everything said so far is transcribed, read by a tick and on screen
+        return (
+            controller.voice_controller.transcription.outstanding == 0
+            and channel.transcript.cursor == controller.transcript_log.next_seq
+            and channel.transcript.pending_origin is None
+        )
+
+    if args.fast:
+        source = TickPacedSource(paths, acted_on_last_command, gap_seconds=args.gap)
+    else:
+        source = WavFileSource(paths, gap_seconds=args.gap, realtime=True)
+    controller = SimpleAsyncVoiceController(
+        transcriber=engine, source=source, transcription_pool=TranscriptionPool()
+    )
+    ui = GameBoardUI(LoopScheduler(asyncio.get_running_loop()), headless=True)
+    manager = GameManager()
+    manager.set_components(ui, [controller])
+    channel = manager.channels[0]
+
+    start = time.perf_counter()
+    await controller.start_listening()
+    delivery = asyncio.create_task(deliver_transcripts(controller, manager))
+    manager.start_game_loop()
+
+    games = 1
+    # Until the corpus is exhausted and every transcript has reached the screen
+    while not (controller.listening_task.done() and acted_on_last_command()):
+        if not manager.game_running:
+            # Keep the conversation going on a fresh board after a capture
+            ui.set_gameboard(GameBoard())
+            manager.start_game_loop()
+            games += 1
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    manager.stop_game_loop()
+    delivery.cancel()
+    await controller.stop_listening()
+    return elapsed, controller.get_all_transcripts(), manager, games
+
+
+def report(elapsed, transcripts, expected, manager, games, client):
+    summary = tracer.summary()
+    print(f"wall time:        {elapsed:.2f} s, {games} game(s)")
+    correct = sum(1 for got, want in zip(transcripts, expected) if got == want)
+    print(f"transcripts:      {len(transcripts)}/{len(expected)} ({correct} exact)")
+    print(f"fast path:        {manager.fast_path_stats.report()}")
+    print(f"LLM calls:        {client.calls}")
+    print()
+    print(f"{'stage':<18}{'count':>7}{'per s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage in STAGES:
+        stats = summary.get(stage)
+        if not stats:
+            continue
+        print(
+            f"{stage:<18}{stats['count']:>7}{stats['count'] / elapsed:>9.2f}"
+            + "".join(f"{stats[k] * 1000:>10.1f}" for k in ("p50", "p95", "p99"))
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=12, help="utterances in the corpus")
+    parser.add_argument("--corpus-dir", help="keep the WAV corpus here instead of a temp dir")
+    parser.add_argument("--gap", type=float, default=1.5, help="silence between commands (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.6, help="fake LLM latency (s)")
+    parser.add_argument("--llm-jitter", type=float, default=0.2, help="extra random latency (s)")
+    parser.add_argument(
+        "--fast", action="store_true",
+        help="replay faster than real time, each command once the game acted on the last",
+    )
+    parser.add_argument("--trace", help="also write a Chrome trace here")
+    args = parser.parse_args()
+
+    client = FakeChatClient(args.llm_latency, args.llm_jitter)
+    llm.client = client
+
+    engine = ToneTranscriber()
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.corpus_dir or tmp
+        os.makedirs(directory, exist_ok=True)
+        paths, expected = write_corpus(directory, args.commands, engine)
+
+        tracer.clear()
+        tracer.enable()
+        try:
+            elapsed, transcripts, manager, games = asyncio.run(run(args, paths))
+        finally:
+            tracer.disable()
+
+    report(elapsed, transcripts, expected, manager, games, client)
+    if args.trace:
+        tracer.export_chrome(args.trace)
+        print(f"\nTrace written to {args.trace}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark frame time of GameBoardUI redraws.
+
+Plays random turns and times a full redraw (delete everything, recreate grid
+and pieces) against the incremental update driven by ``execute_turn``'s
+move_results. Each frame includes ``update_idletasks`` so Tk actually paints.
+
+Needs a display (use ``xvfb-run`` on headless machines). Run from the
+repository root:
+
+    python -m benchmarks.render [--ticks 500]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+import tkinter as tk
+
+from gameboard import Direction, GameBoard
+from ui_display import GameBoardUI
+
+
+def _frame_times(ui: GameBoardUI, ticks: int, incremental: bool, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    directions = list(Direction)
+    ui.set_gameboard(GameBoard())
+    times = []
+    for _ in range(ticks):
+        board = ui.game_board
+        turn_result = board.execute_turn(
+            {piece_id: rng.choice(directions) for piece_id in board.pieces}
+        )
+        start = time.perf_counter()
+        if incremental:
+            ui.update_display(turn_result)
+        else:
+            ui.draw_board(full=True)
+        ui.master.update_idletasks()
+        times.append(time.perf_counter() - start)
+        if turn_result["game_over"]:
+            ui.set_gameboard(GameBoard())
+    return times
+
+
+def _report(label: str, times: list):
+    ordered = sorted(times)
+    p95 = ordered[int(len(ordered) * 0.95)]
+    print(
+        f"{label:<12} mean {statistics.mean(times) * 1e6:8.1f} us   "
+        f"p95 {p95 * 1e6:8.1f} us   max {ordered[-1] * 1e6:8.1f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=500)
+    args = parser.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"No display available: {e}")
+        sys.exit(1)
+
+    ui = GameBoardUI(root)
+    _report("full", _frame_times(ui, args.ticks, incremental=False))
+    _report("incremental", _frame_times(ui, args.ticks, incremental=True))
+    print(f"canvas items after run: {len(ui.canvas.find_all())}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Benchmark state sync fan-out to many spectators.
+
+Plays random turns on a real ``GameBoard`` and broadcasts each tick to N
+in-memory subscribers, reporting per-tick encode cost, broadcast cost and
+bytes per subscriber. Compares against sending ``get_game_state`` every tick.
+
+Run from the repository root:
+
+    python -m benchmarks.state_sync [--ticks 200] [--subscribers 10 100 1000 5000]
+"""
+
+import argparse
+import json
+import random
+import time
+
+from gameboard import Direction, GameBoard
+from state_sync import BoardMirror, StateSyncServer, encode_delta
+
+
+class _NullTransport:
+    def get_write_buffer_size(self):
+        return 0
+
+
+class _CountingWriter:
+    """Stands in for an ``asyncio.StreamWriter`` and reconstructs the board."""
+
+    def __init__(self, reconstruct: bool):
+        self.transport = _NullTransport()
+        self.bytes_received = 0
+        self.mirror = BoardMirror() if reconstruct else None
+
+    def write(self, data: bytes):
+        self.bytes_received += len(data)
+        if self.mirror is not None:
+            self.mirror.apply(json.loads(data))
+
+    def close(self):
+        pass
+
+
+def _random_turn(board: GameBoard, rng: random.Random) -> dict:
+    directions = list(Direction)
+    return {piece_id: rng.choice(directions) for piece_id in board.pieces}
+
+
+def run(ticks: int, subscriber_count: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    board = GameBoard()
+    server = StateSyncServer()
+    server.publish_reset(board)
+
+    # One reconstructing subscriber verifies correctness, the rest just count bytes
+    writers = [_CountingWriter(reconstruct=(i == 0)) for i in range(subscriber_count)]
+    for writer in writers:
+        server.add_subscriber(writer)
+
+    encode_time = 0.0
+    broadcast_time = 0.0
+    full_state_bytes = 0
+    for _ in range(ticks):
+        turn_result = board.execute_turn(_random_turn(board, rng))
+        full_state_bytes += len(json.dumps(board.get_game_state(), default=str))
+
+        start = time.perf_counter()
+        server.tick += 1
+        message = encode_delta(server.tick, turn_result)
+        encode_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        server.apply_and_broadcast(message)
+        broadcast_time += time.perf_counter() - start
+
+        assert writers[0].mirror.positions() == board.get_game_state()["piece_positions"]
+
+        if turn_result["game_over"]:
+            board = GameBoard()
+            server.publish_reset(board)
+
+    return {
+        "subscribers": subscriber_count,
+        "encode_us_per_tick": encode_time / ticks * 1e6,
+        "broadcast_us_per_tick": broadcast_time / ticks * 1e6,
+        "broadcast_us_per_subscriber": broadcast_time / ticks / subscriber_count * 1e6,
+        "delta_bytes_per_tick": writers[-1].bytes_received / ticks,
+        "full_state_bytes_per_tick": full_state_bytes / ticks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument(
+        "--subscribers", type=int, nargs="+", default=[10, 100, 1000, 5000]
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'subs':>6} {'encode us':>10} {'bcast us':>10} {'us/sub':>8} "
+        f"{'delta B':>8} {'full B':>8}"
+    )
+    for count in args.subscribers:
+        result = run(args.ticks, count)
+        print(
+            f"{result['subscribers']:>6} {result['encode_us_per_tick']:>10.1f} "
+            f"{result['broadcast_us_per_tick']:>10.1f} "
+            f"{result['broadcast_us_per_subscriber']:>8.2f} "
+            f"{result['delta_bytes_per_tick']:>8.1f} {result['full_state_bytes_per_tick']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Replay recorded audio through VoiceController without a microphone.
+
+Feeds WAV files (or a synthetic tone-word corpus) through the real audio
+callback, VAD, segmentation and transcription pool, using the replay
+source's simulated clock. Reports how much faster than real time the
+pipeline runs and where callback time goes.
+
+Run from the repository root:
+
+    python -m benchmarks.voice_replay recordings/*.wav --engine google
+    python -m benchmarks.voice_replay --synthetic 200
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from audio_sources import ArraySource, WavFileSource
+from transcription import GoogleTranscriber, ToneTranscriber
+from voice import VoiceController
+
+
+def synthetic_corpus(count: int, engine: ToneTranscriber, sample_rate: int, seed: int = 0):
+    """Tone-word commands separated by noisy silence. Returns (audio, texts)."""
+    rng = random.Random(seed)
+    noise = np.random.default_rng(seed)
+    colors = ["red", "blue", "green", "yellow", "all units"]
+    directions = ["up", "down", "left", "right"]
+    texts = []
+    parts = []
+    for _ in range(count):
+        text = f"{rng.choice(colors)} {rng.choice(directions)}"
+        if rng.random() < 0.3:
+            text += " twice"
+        texts.append(text)
+        gap = noise.normal(0, 0.0005, int(sample_rate * rng.uniform(1.0, 3.0)))
+        parts.append(gap.astype(np.float32))
+        parts.append(engine.synthesize(text, sample_rate))
+    parts.append(np.zeros(sample_rate * 2, dtype=np.float32))
+    return np.concatenate(parts), texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("wavs", nargs="*", help="WAV files to replay in order")
+    parser.add_argument("--synthetic", type=int, default=100, help="tone commands to generate when no WAVs are given")
+    parser.add_argument("--engine", choices=["tone", "google"], default="tone")
+    parser.add_argument("--realtime", action="store_true", help="pace blocks at wall-clock speed")
+    args = parser.parse_args()
+
+    engine = GoogleTranscriber() if args.engine == "google" else ToneTranscriber()
+    expected = None
+    if args.wavs:
+        source = WavFileSource(args.wavs, realtime=args.realtime)
+    else:
+        audio, expected = synthetic_corpus(args.synthetic, ToneTranscriber(), 16000)
+        source = ArraySource(audio, 16000, realtime=args.realtime)
+
+    transcripts = []
+    controller = VoiceController(callback=transcripts.append, transcriber=engine, source=source)
+
+    callback_time = [0.0, 0]
+    callback = controller.audio_callback
+
+    def timed_callback(*cb_args):
+        start = time.perf_counter()
+        callback(*cb_args)
+        callback_time[0] += time.perf_counter() - start
+        callback_time[1] += 1
+
+    controller.audio_callback = timed_callback
+
+    start = time.perf_counter()
+    controller.start_listening()
+    capture_done = time.perf_counter()
+    controller.wait_for_transcripts()
+    end = time.perf_counter()
+
+    print(f"audio:            {source.duration:.1f} s in {callback_time[1]} blocks")
+    print(f"capture + VAD:    {capture_done - start:.2f} s ({source.duration / (capture_done - start):.0f}x real time)")
+    print(f"callback mean:    {callback_time[0] / callback_time[1] * 1e6:.1f} us per block")
+    print(f"total with STT:   {end - start:.2f} s ({source.duration / (end - start):.0f}x real time)")
+    print(f"transcripts:      {len(transcripts)} ({len(transcripts) / (end - start):.1f}/s), {controller.transcription.dropped} segments dropped")
+    if expected is not None:
+        correct = sum(1 for got, want in zip(transcripts, expected) if got == want)
+        print(f"accuracy:         {correct}/{len(expected)}")
+
+
+if __name__ == "__main__":
+    main()
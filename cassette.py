@@ -0,0 +1,175 @@
+"""Record and replay LLM completions and speech recognition.
+
+In record mode every request/response pair that goes through a wrapped
+client or transcriber is appended to a cassette file; in replay mode the
+same requests are answered from the file, with no network and no API key.
+That makes whole games reproducible for profiling and regression tests.
+
+Requests are keyed by a hash of their normalized content: for completions
+the model, parameters and messages as canonical JSON, for speech the sample
+rate and a digest of the PCM. Identical requests recorded more than once are
+replayed in the order they were recorded.
+
+The file is gzip-compressed JSON lines, one record per request, appended as
+calls happen so a crash loses nothing. It is indexed by key into memory when
+opened.
+
+Set ``CASSETTE=path`` and ``CASSETTE_MODE=record|replay`` to use a cassette
+for a whole run; ``llm`` and ``voice`` wrap their clients automatically.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from transcription import Transcriber
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMiss(KeyError):
+    """A replayed request that was never recorded."""
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def completion_key(kwargs: dict) -> str:
+    """Key for a chat completion request, independent of dict order and trailing whitespace."""
+    request = dict(kwargs)
+    request["messages"] = [
+        {**message, "content": message["content"].rstrip()} for message in kwargs["messages"]
+    ]
+    return "llm:" + _digest(json.dumps(request, sort_keys=True, separators=(",", ":")).encode())
+
+
+def transcription_key(pcm, sample_rate: int, final: bool) -> str:
+    """Key for a transcription request: the exact audio and how it was asked for."""
+    return f"stt:{sample_rate}:{int(final)}:" + _digest(bytes(pcm))
+
+
+class Cassette:
+    """Recorded request/response pairs, indexed by request key."""
+
+    def __init__(self, path: str, mode: str = REPLAY):
+        """
+        Args:
+            path: Cassette file, created on first record
+            mode: ``"record"`` to append new pairs, ``"replay"`` to serve them
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.index: Dict[str, List] = {}
+        self._cursors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if mode == RECORD:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    self.index.setdefault(record["key"], []).append(record["response"])
+
+    def __len__(self):
+        return sum(len(responses) for responses in self.index.values())
+
+    def record(self, key: str, response):
+        with self._lock:
+            self.index.setdefault(key, []).append(response)
+            line = json.dumps({"key": key, "response": response}, separators=(",", ":"))
+            # Each append is its own gzip member; readers see one stream
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def replay(self, key: str):
+        """The next recorded response for ``key``; the last one repeats once used up."""
+        with self._lock:
+            responses = self.index.get(key)
+            if not responses:
+                self.misses += 1
+                raise CassetteMiss(key)
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            self.hits += 1
+            return responses[min(cursor, len(responses) - 1)]
+
+
+class CassetteChatClient:
+    """Drop-in for the ``OpenAI`` client's ``chat.completions.create``."""
+
+    def __init__(self, cassette: Cassette, client=None):
+        """
+        Args:
+            cassette: Where pairs are recorded or replayed from
+            client: Real client to call when recording; unused when replaying
+        """
+        if cassette.mode == RECORD and client is None:
+            raise ValueError("Recording needs a real client")
+        self.cassette = cassette
+        self.client = client
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        key = completion_key(kwargs)
+        if self.cassette.mode == REPLAY:
+            recorded = self.cassette.replay(key)
+        else:
+            response = self.client.chat.completions.create(**kwargs)
+            usage = response.usage
+            recorded = {
+                "content": response.choices[0].message.content,
+                "usage": [usage.prompt_tokens, usage.completion_tokens] if usage else None,
+            }
+            self.cassette.record(key, recorded)
+        usage = recorded["usage"]
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=recorded["content"]))],
+            usage=SimpleNamespace(prompt_tokens=usage[0], completion_tokens=usage[1])
+            if usage
+            else None,
+        )
+
+
+class CassetteTranscriber(Transcriber):
+    """Wraps a ``Transcriber`` to record its results or replay them."""
+
+    def __init__(self, cassette: Cassette, transcriber: Optional[Transcriber] = None):
+        if cassette.mode == RECORD and transcriber is None:
+            raise ValueError("Recording needs a real transcriber")
+        self.cassette = cassette
+        self.transcriber = transcriber
+
+    def transcribe(self, pcm, sample_rate, final=True):
+        key = transcription_key(pcm, sample_rate, final)
+        if self.cassette.mode == REPLAY:
+            return self.cassette.replay(key)
+        text = self.transcriber.transcribe(pcm, sample_rate, final=final)
+        self.cassette.record(key, text)
+        return text
+
+
+_active: Optional[Cassette] = None
+
+
+def activate(cassette: Optional[Cassette]):
+    """Make ``cassette`` the one clients created from now on use; None turns it off."""
+    global _active
+    _active = cassette
+
+
+def active() -> Optional[Cassette]:
+    """The cassette in use, opened from ``CASSETTE``/``CASSETTE_MODE`` on first call."""
+    global _active
+    if _active is None and os.getenv("CASSETTE"):
+        _active = Cassette(os.environ["CASSETTE"], os.getenv("CASSETTE_MODE", REPLAY))
+    return _active
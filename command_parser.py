@@ -0,0 +1,165 @@
+"""Local fast path for literal spoken orders.
+
+Orders like "red up", "all units left" or "blue down twice" map directly to
+moves, so they skip the player LLM round-trip. Anything the grammar doesn't
+fully cover returns None and falls through to the LLM.
+
+Grammar, one or more sequences joined by "then"::
+
+    command  := sequence ("then" sequence)*
+    sequence := clause+
+    clause   := subject+ direction [repeat]
+    subject := <color> | all | everyone | everybody
+    repeat  := twice | thrice | <number> times | <direction> repeated
+
+Clauses in one sequence start on the same tick, and a later clause overrides
+an earlier one for the colors they share ("all up, red down"). Each sequence
+starts on the tick after the previous one ends, so "all up twice then red
+left" moves everyone up for two ticks and red left on the third. Filler
+words ("please", "move", "units", "and", ...) are ignored.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from gameboard import Color, Direction, GameBoard, Player
+
+# Stands for "no move this tick"
+STAY = "stay"
+
+ALL_SUBJECTS = {"all", "everyone", "everybody", "everything"}
+FILLER = {
+    "please", "move", "go", "units", "unit", "pieces", "piece", "the", "and",
+    "to", "now", "your", "my", "guys", "team", "should", "can", "you",
+}
+SEQUENCE_WORDS = {"then", "afterwards"}
+STAY_WORDS = {"stay", "stop", "hold", "wait"}
+NUMBERS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+ONCE_WORDS = {"once": 1, "twice": 2, "thrice": 3}
+MAX_REPEAT = 10
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _color_from_word(word: str) -> Optional[Color]:
+    for color in Color:
+        if color.value.lower() == word:
+            return color
+    return None
+
+
+def _direction_from_word(word: str):
+    if word in STAY_WORDS:
+        return STAY
+    return Direction.from_str(word)
+
+
+def parse_command(text: str) -> Optional[List[Dict[Color, any]]]:
+    """Parse a literal order into per-tick steps.
+
+    Returns a list of ``{Color: Direction or STAY}`` dicts, one per tick, or
+    None if the text is not fully covered by the grammar.
+    """
+    tokens = [t for t in _TOKEN.findall(text.lower()) if t not in FILLER]
+    if not tokens:
+        return None
+
+    clauses = []  # (first tick, colors, direction, repeat)
+    subjects: List[Color] = []
+    start = end = 0
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in SEQUENCE_WORDS:
+            if subjects or end == start:
+                # "then" without a finished clause before it
+                return None
+            start = end
+            i += 1
+            continue
+        color = _color_from_word(token)
+        if color is not None:
+            subjects.append(color)
+            i += 1
+            continue
+        if token in ALL_SUBJECTS:
+            subjects.extend(Color)
+            i += 1
+            continue
+
+        direction = _direction_from_word(token)
+        if direction is None or not subjects:
+            # Unknown word, or a direction with nobody to move
+            return None
+        i += 1
+
+        # Optional repetition: "twice", "3 times", "three times", "up up up"
+        repeat = 1
+        if i < len(tokens) and tokens[i] in ONCE_WORDS:
+            repeat = ONCE_WORDS[tokens[i]]
+            i += 1
+        elif i + 1 < len(tokens) and tokens[i + 1] == "times":
+            count = NUMBERS.get(tokens[i]) or (int(tokens[i]) if tokens[i].isdigit() else None)
+            if count is None:
+                return None
+            repeat = count
+            i += 2
+        else:
+            while i < len(tokens) and _direction_from_word(tokens[i]) == direction:
+                repeat += 1
+                i += 1
+
+        repeat = min(repeat, MAX_REPEAT)
+        clauses.append((start, subjects, direction, repeat))
+        end = max(end, start + repeat)
+        subjects = []
+
+    if subjects or end == start:
+        # Trailing subject without a direction, or a trailing "then"
+        return None
+
+    steps: List[Dict[Color, any]] = [{} for _ in range(end)]
+    for first, colors, direction, repeat in clauses:
+        for step in steps[first : first + repeat]:
+            for color in colors:
+                # Later clauses override earlier ones ("all up, red down")
+                step[color] = direction
+    return steps
+
+
+def step_to_moves(
+    step: Dict[Color, any], gameboard: GameBoard, player: Player
+) -> Dict[int, Direction]:
+    """Resolve one parsed step to ``execute_turn`` moves for ``player``'s pieces."""
+    moves = {}
+    for color, direction in step.items():
+        if isinstance(direction, Direction):
+            for piece in gameboard.get_pieces_by_color(player, color):
+                moves[piece.id] = direction
+    return moves
+
+
+class FastPathStats:
+    """Counts how many instructions the local parser handled."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    @property
+    def fraction(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self) -> str:
+        total = self.hits + self.misses
+        return f"{self.hits}/{total} commands on fast path ({self.fraction:.0%})"
@@ -1,6 +1,9 @@
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
+from collections.abc import MutableMapping
 from enum import Enum
 
+from tracing import tracer
+
 
 class Player(Enum):
     PLAYER = "Player"
@@ -37,6 +40,8 @@ class Color(Enum):
 
     @classmethod
     def from_idx(cls, i: int) -> "Color":
+        """Squad color of a side's i-th unit; colors repeat every four units."""
+        i %= 4
         if i == 0:
             return cls.RED
         elif i == 1:
@@ -46,11 +51,22 @@ class Color(Enum):
         elif i == 3:
             return cls.YELLOW
 
+    @classmethod
+    def from_str(cls, color: str) -> Optional["Color"]:
+        """Convert a color name, in any case, to a Color enum."""
+        return _COLORS_BY_NAME.get(color.lower())
+
     def to_prompt(self) -> str:
         """All colors represented by single uppercase character on the baord."""
         return self.value[0]
 
 
+_COLORS_BY_NAME = {color.value.lower(): color for color in Color}
+
+# Direction values in enum order; iterating the enum is slow in hot loops
+_DIRECTION_OFFSETS = [direction.value for direction in Direction]
+
+
 class Piece:
     """Individual game piece with unique ID and position."""
 
@@ -74,47 +90,90 @@ class Piece:
 
 
 class GameBoard:
-    """10x10 game board with piece management and game logic."""
+    """Square game board with piece management and game logic.
 
-    def __init__(self):
-        self.size = 10
-        self.board: List[List[Optional[Piece]]] = [
-            [None for _ in range(self.size)] for _ in range(self.size)
-        ]
+    Occupancy is a dict from (row, col) to piece, so memory grows with the
+    number of pieces rather than the area, and boards can be thousands of
+    cells across.
+    """
+
+    # execute_turn checks captures only around cells changed since its last
+    # check; False checks the whole board every turn
+    incremental_captures = True
+
+    def __init__(self, size: int = 10, pieces_per_side: int = 4):
+        """
+        Args:
+            size: Cells along each side
+            pieces_per_side: Units each player starts with, in squads of four colors
+        """
+        self.size = size
+        self.pieces_per_side = pieces_per_side
+        self.cells: Dict[Tuple[int, int], Piece] = {}
+        # Positions changed since captures were last checked by execute_turn
+        self.dirty_cells: set = set()
         self.pieces: Dict[int, Piece] = {}
+        # Indexes over self.pieces, kept in step by add_piece and remove_piece
+        self.pieces_by_owner: Dict[Player, Dict[int, Piece]] = {p: {} for p in Player}
+        self.pieces_by_color: Dict[Tuple[Player, Color], Dict[int, Piece]] = {
+            (p, c): {} for p in Player for c in Color
+        }
         self.next_piece_id = 1
 
-        # Initialize with 4 pieces per side
         self._initialize_pieces()
 
     def _initialize_pieces(self):
-        """Initialize 4 pieces for each player on opposite sides of the board."""
+        """Initialize each player's pieces on opposite sides of the board.
+
+        Pieces fill every other cell of every other row, starting from their
+        own side, so no two start adjacent. On a 10x10 board the four pieces
+        per side sit at (8, 2)..(8, 8) and (1, 1)..(1, 7).
+        """
+        n = self.pieces_per_side
         # Player pieces start on bottom rows
-        player_positions = [(8, 2), (8, 4), (8, 6), (8, 8)]
+        player_positions = self._formation(range(self.size - 2, -1, -2), range(2, self.size, 2), n)
         # Enemy pieces start on top rows
-        enemy_positions = [(1, 1), (1, 3), (1, 5), (1, 7)]
+        enemy_positions = self._formation(range(1, self.size, 2), range(1, self.size - 1, 2), n)
+        if n and (
+            len(player_positions) < n
+            or len(enemy_positions) < n
+            or enemy_positions[-1][0] >= player_positions[-1][0]
+        ):
+            raise ValueError(f"{n} pieces per side don't fit on a {self.size}x{self.size} board")
 
         # Create player pieces
         for i, (row, col) in enumerate(player_positions):
-            piece = Piece(
-                self.next_piece_id, Player.PLAYER, row, col, Color.from_idx(i)
-            )
-            self.pieces[piece.id] = piece
-            self.board[row][col] = piece
-            self.next_piece_id += 1
+            self.add_piece(Player.PLAYER, row, col, Color.from_idx(i))
 
         # Create enemy pieces
         for i, (row, col) in enumerate(enemy_positions):
-            piece = Piece(self.next_piece_id, Player.ENEMY, row, col, Color.from_idx(i))
-            self.pieces[piece.id] = piece
-            self.board[row][col] = piece
-            self.next_piece_id += 1
+            self.add_piece(Player.ENEMY, row, col, Color.from_idx(i))
+
+    @staticmethod
+    def _formation(rows: range, cols: range, count: int) -> List[Tuple[int, int]]:
+        """First ``count`` cells of ``rows`` x ``cols``, row by row."""
+        positions = []
+        for row in rows:
+            for col in cols:
+                if len(positions) == count:
+                    return positions
+                positions.append((row, col))
+        return positions
+
+    def add_piece(self, owner: Player, row: int, col: int, color: Color) -> Piece:
+        """Place a new piece on an empty cell and index it."""
+        piece = Piece(self.next_piece_id, owner, row, col, color)
+        self.next_piece_id += 1
+        self.pieces[piece.id] = piece
+        self.pieces_by_owner[owner][piece.id] = piece
+        self.pieces_by_color[owner, color][piece.id] = piece
+        self.cells[row, col] = piece
+        self.dirty_cells.add((row, col))
+        return piece
 
     def get_piece_at(self, row: int, col: int) -> Optional[Piece]:
         """Get piece at specified position."""
-        if 0 <= row < self.size and 0 <= col < self.size:
-            return self.board[row][col]
-        return None
+        return self.cells.get((row, col))
 
     def is_valid_position(self, row: int, col: int) -> bool:
         """Check if position is within board bounds."""
@@ -122,13 +181,12 @@ class GameBoard:
 
     def get_adjacent_positions(self, row: int, col: int) -> List[Tuple[int, int]]:
         """Get all valid adjacent positions (up, down, left, right)."""
-        adjacent = []
-        for direction in Direction:
-            dr, dc = direction.value
-            new_row, new_col = row + dr, col + dc
-            if self.is_valid_position(new_row, new_col):
-                adjacent.append((new_row, new_col))
-        return adjacent
+        size = self.size
+        return [
+            (row + dr, col + dc)
+            for dr, dc in _DIRECTION_OFFSETS
+            if 0 <= row + dr < size and 0 <= col + dc < size
+        ]
 
     def find_connected_group(self, piece: Piece, visited: set = None) -> set:
         """Find all pieces connected to the given piece that belong to the same owner.
@@ -139,16 +197,20 @@ class GameBoard:
         visited.add(piece.position)
         connected_group = {piece}
 
-        for adj_row, adj_col in self.get_adjacent_positions(piece.row, piece.col):
-            adj_piece = self.get_piece_at(adj_row, adj_col)
-            if (
-                adj_piece
-                and adj_piece.owner == piece.owner
-                and adj_piece.position not in visited
-            ):
-                # Recursively find connected pieces
-                connected_subgroup = self.find_connected_group(adj_piece, visited)
-                connected_group.update(connected_subgroup)
+        # Explicit stack: groups can hold hundreds of pieces
+        stack = [piece]
+        while stack:
+            current = stack.pop()
+            for adj_row, adj_col in self.get_adjacent_positions(current.row, current.col):
+                adj_piece = self.cells.get((adj_row, adj_col))
+                if (
+                    adj_piece
+                    and adj_piece.owner == piece.owner
+                    and adj_piece.position not in visited
+                ):
+                    visited.add(adj_piece.position)
+                    connected_group.add(adj_piece)
+                    stack.append(adj_piece)
 
         return connected_group
 
@@ -197,14 +259,77 @@ class GameBoard:
 
         return friendly_count, enemy_count
 
-    def check_captures(self) -> List[Piece]:
+    def get_group_sizes(self) -> Dict[Tuple[int, int], int]:
+        """Size of the connected group each occupied position belongs to."""
+        sizes = {}
+        for piece in self.pieces.values():
+            if piece.position not in sizes:
+                group = self.find_connected_group(piece)
+                for member in group:
+                    sizes[member.position] = len(group)
+        return sizes
+
+    def get_affected_pieces(self, changed) -> List[Piece]:
+        """Pieces whose capture status can differ after changes at ``changed`` positions.
+
+        Those are the groups occupying or touching a changed cell, whose size
+        or neighbours may be different, and every piece next to one of those
+        groups, whose largest adjacent enemy group may be different. Returned
+        in the same order as ``self.pieces``.
+        """
+        affected = {}
+        grouped = set()  # positions of groups already walked
+        for row, col in changed:
+            for position in [(row, col)] + self.get_adjacent_positions(row, col):
+                piece = self.cells.get(position)
+                if piece is None or position in grouped:
+                    continue
+                for member in self.find_connected_group(piece):
+                    grouped.add(member.position)
+                    affected[member.id] = member
+                    for adj_position in self.get_adjacent_positions(member.row, member.col):
+                        neighbour = self.cells.get(adj_position)
+                        if neighbour is not None and neighbour.owner != member.owner:
+                            affected[neighbour.id] = neighbour
+        return [affected[piece_id] for piece_id in sorted(affected)]
+
+    @tracer.traced("check_captures")
+    def check_captures(self, changed=None) -> List[Piece]:
         """Check for pieces that should be captured based on support rules.
         A piece is captured if the largest enemy group adjacent to it is larger
-        than the piece's own connected group."""
-        captured_pieces = []
+        than the piece's own connected group.
 
-        for piece in self.pieces.values():
-            friendly_group_size, enemy_max_group_size = self.get_max_group_sizes(piece)
+        By default every piece is checked. Pass the positions ``changed`` since
+        the last check, when nothing was capturable, to check only the pieces
+        those changes can affect."""
+        captured_pieces = []
+        if changed is None or len(changed) >= len(self.pieces):
+            # With about as many changes as pieces, sorting out which are
+            # affected costs more than checking them all
+            candidates = self.pieces.values()
+        else:
+            candidates = self.get_affected_pieces(changed)
+
+        # Every group measured at most once, when first needed
+        group_sizes = {}
+
+        def group_size(piece):
+            size = group_sizes.get(piece.position)
+            if size is None:
+                group = self.find_connected_group(piece)
+                size = len(group)
+                for member in group:
+                    group_sizes[member.position] = size
+            return size
+
+        for piece in candidates:
+            # Same as get_max_group_sizes
+            friendly_group_size = group_size(piece)
+            enemy_max_group_size = 0
+            for adj_position in self.get_adjacent_positions(piece.row, piece.col):
+                adj_piece = self.cells.get(adj_position)
+                if adj_piece and adj_piece.owner != piece.owner:
+                    enemy_max_group_size = max(enemy_max_group_size, group_size(adj_piece))
 
             # If the largest enemy group is bigger than this piece's connected group, piece is captured
             if enemy_max_group_size > friendly_group_size:
@@ -214,8 +339,11 @@ class GameBoard:
 
     def remove_piece(self, piece: Piece):
         """Remove a piece from the board and pieces dictionary."""
-        self.board[piece.row][piece.col] = None
+        del self.cells[piece.position]
+        self.dirty_cells.add(piece.position)
         del self.pieces[piece.id]
+        del self.pieces_by_owner[piece.owner][piece.id]
+        del self.pieces_by_color[piece.owner, piece.color][piece.id]
 
     def move_piece(self, piece_id: int, direction: Direction) -> bool:
         """Attempt to move a piece in the specified direction.
@@ -237,14 +365,26 @@ class GameBoard:
             return False
 
         # Move the piece
-        self.board[piece.row][piece.col] = None
-        piece.row = new_row
-        piece.col = new_col
-        piece.position = (new_row, new_col)
-        self.board[new_row][new_col] = piece
+        self._move_to(piece, new_row, new_col)
 
         return True
 
+    def _move_to(self, piece: Piece, row: int, col: int):
+        """Move a piece to an empty cell."""
+        # Clear old position
+        del self.cells[piece.position]
+        self.dirty_cells.add(piece.position)
+        self.dirty_cells.add((row, col))
+
+        # Update piece position
+        piece.row = row
+        piece.col = col
+        piece.position = (row, col)
+
+        # Set new position
+        self.cells[row, col] = piece
+
+    @tracer.traced("execute_turn")
     def execute_turn(self, moves: Dict[int, Direction]) -> Dict[str, any]:
         """Execute a full turn with multiple piece moves.
 
@@ -306,22 +446,12 @@ class GameBoard:
         # Second pass: execute successful moves
         for piece_id, result in move_results.items():
             if result["success"]:
-                piece = self.pieces[piece_id]
-                new_row, new_col = result["new_position"]
-
-                # Clear old position
-                self.board[piece.row][piece.col] = None
-
-                # Update piece position
-                piece.row = new_row
-                piece.col = new_col
-                piece.position = (new_row, new_col)
+                self._move_to(self.pieces[piece_id], *result["new_position"])
 
-                # Set new position
-                self.board[new_row][new_col] = piece
-
-        # Check for captures after all moves
-        captured_pieces = self.check_captures()
+        # Check for captures after all moves. Nothing was capturable after
+        # the last check, so only pieces near what changed since need a look
+        changed, self.dirty_cells = self.dirty_cells, set()
+        captured_pieces = self.check_captures(changed if self.incremental_captures else None)
 
         # Check for win condition before removing pieces
         winner = self.check_first_capture_win(captured_pieces)
@@ -337,6 +467,20 @@ class GameBoard:
             "game_over": winner is not None,
         }
 
+    @tracer.traced("simulate_turn")
+    def simulate_turn(self, moves: Dict[int, Direction]) -> Dict[str, any]:
+        """What ``execute_turn(moves)`` would return, leaving this board untouched."""
+        return BoardOverlay(self).execute_turn(moves)
+
+    @tracer.traced("simulate_turns")
+    def simulate_turns(self, candidates: Iterable[Dict[int, Direction]]) -> List[Dict[str, any]]:
+        """``simulate_turn`` for each candidate set of moves.
+
+        Each candidate gets its own overlay on this board, so the cost of a
+        candidate is the pieces it moves and captures, not the board size.
+        """
+        return [BoardOverlay(self).execute_turn(moves) for moves in candidates]
+
     def check_first_capture_win(self, captured_pieces: List[Piece]) -> Optional[Player]:
         """Check if any side has won by making the first capture.
 
@@ -369,53 +513,78 @@ class GameBoard:
 
     def get_pieces_by_owner(self, owner: Player) -> List[Piece]:
         """Get all pieces belonging to a specific player."""
-        return [piece for piece in self.pieces.values() if piece.owner == owner]
+        return list(self.pieces_by_owner[owner].values())
+
+    def count_pieces(self, owner: Player) -> int:
+        """Number of pieces a player has left."""
+        return len(self.pieces_by_owner[owner])
+
+    def get_pieces_by_color(self, owner: Player, color: Color) -> List[Piece]:
+        """Get a player's pieces of one color."""
+        return list(self.pieces_by_color[owner, color].values())
+
+    def get_piece_by_color(self, owner: Player, color: Optional[Color]) -> Optional[Piece]:
+        """First of a player's pieces of ``color``, or of any color if None."""
+        pieces = self.pieces_by_owner[owner] if color is None else self.pieces_by_color[owner, color]
+        return next(iter(pieces.values()), None)
 
     def display_board(self) -> str:
         """Create a string representation of the board."""
         display = "   " + " ".join([str(i) for i in range(self.size)]) + "\n"
 
-        for row in range(self.size):
-            display += f"{row:2} "
-            for col in range(self.size):
-                piece = self.board[row][col]
-                if piece is None:
-                    display += ". "
-                elif piece.owner == Player.PLAYER:
-                    display += f"P{piece.id % 10} "  # P1, P2, etc.
-                else:
-                    display += f"E{piece.id % 10} "  # E1, E2, etc.
-            display += "\n"
+        def label(piece):
+            # P1, P2, etc. and E1, E2, etc.
+            return f"{'P' if piece.owner == Player.PLAYER else 'E'}{piece.id % 10} "
+
+        for row, cells in enumerate(self._render_rows(". ", label)):
+            display += f"{row:2} {cells}\n"
 
         return display
 
+    def _render_rows(self, empty: str, label) -> List[str]:
+        """Every row as a string of cell tokens, ``empty`` or ``label(piece)``.
+
+        Only rows holding pieces are built cell by cell; the rest share one string.
+        """
+        blank = [empty] * self.size
+        occupied = {}
+        for (row, col), piece in self.cells.items():
+            tokens = occupied.get(row)
+            if tokens is None:
+                tokens = occupied[row] = blank.copy()
+            tokens[col] = label(piece)
+        blank_row = "".join(blank)
+        return [
+            "".join(occupied[row]) if row in occupied else blank_row for row in range(self.size)
+        ]
+
     def get_game_state(self) -> Dict[str, any]:
         """Get current game state information."""
-        player_pieces = self.get_pieces_by_owner(Player.PLAYER)
-        enemy_pieces = self.get_pieces_by_owner(Player.ENEMY)
-
         return {
             "board_size": self.size,
-            "player_pieces": len(player_pieces),
-            "enemy_pieces": len(enemy_pieces),
+            "player_pieces": self.count_pieces(Player.PLAYER),
+            "enemy_pieces": self.count_pieces(Player.ENEMY),
             "total_pieces": len(self.pieces),
             "piece_positions": {
                 piece.id: piece.position for piece in self.pieces.values()
             },
         }
 
-    def to_prompt(self, player: Player) -> str:
-        """Generate a prompt representation of the game board for the specified player."""
-        prompt = ""
-        for row in range(self.size):
-            for col in range(self.size):
-                piece = self.get_piece_at(row, col)
-                if piece is None:
-                    prompt += "X "
-                else:
-                    prompt += piece.to_prompt(player) + " "
-            prompt += "\n"
-        return prompt.strip()
+    def to_prompt(self, player: Player, threats: bool = False) -> str:
+        """Generate a prompt representation of the game board for the specified player.
+
+        With ``threats``, orders that would capture or lose units this tick are
+        listed after the board (see ``threat_map``).
+        """
+        rows = self._render_rows("X ", lambda piece: piece.to_prompt(player) + " ")
+        prompt = "\n".join(rows).strip()
+        if threats:
+            from threat_map import ThreatMap
+
+            tactics = ThreatMap(self, player).to_prompt()
+            if tactics:
+                prompt += "\n\n" + tactics
+        return prompt
 
     def is_game_over(self) -> Tuple[bool, Optional[Player]]:
         """Check if the game is over due to first capture win condition.
@@ -424,15 +593,106 @@ class GameBoard:
             Tuple of (is_game_over, winner). If game is over, winner indicates
             which player won. If game is not over, winner is None.
         """
-        # If either side has no pieces left, the game could be considered over
-        player_pieces = self.get_pieces_by_owner(Player.PLAYER)
-        enemy_pieces = self.get_pieces_by_owner(Player.ENEMY)
-
         # In this implementation, the game is only over when someone makes the first capture
         # This method is primarily for checking if captures have already occurred
-        if len(player_pieces) < 4:  # Started with 4 pieces
+        if self.count_pieces(Player.PLAYER) < self.pieces_per_side:
             return True, Player.ENEMY  # Enemy captured first
-        elif len(enemy_pieces) < 4:  # Started with 4 pieces
+        elif self.count_pieces(Player.ENEMY) < self.pieces_per_side:
             return True, Player.PLAYER  # Player captured first
 
         return False, None
+
+
+_MISSING = object()
+
+
+class CopyOnWriteDict(MutableMapping):
+    """A dict layered over another: reads fall through, writes stay local."""
+
+    def __init__(self, base: dict):
+        self.base = base
+        self.local = {}
+        self.deleted = set()
+
+    def get(self, key, default=None):
+        # Called for every cell lookup, so kept short
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        if key in self.deleted:
+            return default
+        return self.base.get(key, default)
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __setitem__(self, key, value):
+        self.local[key] = value
+        self.deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.local.pop(key, None)
+        if key in self.base:
+            self.deleted.add(key)
+
+    def __iter__(self) -> Iterator:
+        # Base order first, as the base dict would iterate
+        for key in self.base:
+            if key not in self.deleted:
+                yield key
+        for key in self.local:
+            if key not in self.base:
+                yield key
+
+    def __len__(self):
+        return len(self.base) - len(self.deleted) + sum(1 for key in self.local if key not in self.base)
+
+
+class BoardOverlay(GameBoard):
+    """A board that starts as a view of another and records its own changes.
+
+    Moving a piece copies it first; removed pieces are hidden rather than
+    deleted. The base board and its pieces are never modified, so any number
+    of overlays can try out different turns on the same board.
+    """
+
+    # Previews aren't turns played: skip the tracer spans
+    execute_turn = GameBoard.execute_turn.__wrapped__
+    check_captures = GameBoard.check_captures.__wrapped__
+
+    def __init__(self, base: GameBoard):
+        # The base already holds the pieces; nothing to initialize
+        self.base = base
+        self.size = base.size
+        self.pieces_per_side = base.pieces_per_side
+        self.incremental_captures = base.incremental_captures
+        self.cells = CopyOnWriteDict(base.cells)
+        self.dirty_cells = set(base.dirty_cells)
+        self.pieces = CopyOnWriteDict(base.pieces)
+        self.pieces_by_owner = {
+            owner: CopyOnWriteDict(pieces) for owner, pieces in base.pieces_by_owner.items()
+        }
+        self.pieces_by_color = {
+            key: CopyOnWriteDict(pieces) for key, pieces in base.pieces_by_color.items()
+        }
+        self.next_piece_id = base.next_piece_id
+        self._copied = set()  # ids of pieces this overlay owns a copy of
+
+    def _move_to(self, piece: Piece, row: int, col: int):
+        if piece.id not in self._copied:
+            copy = Piece(piece.id, piece.owner, piece.row, piece.col, piece.color)
+            self.pieces[copy.id] = copy
+            self.pieces_by_owner[copy.owner][copy.id] = copy
+            self.pieces_by_color[copy.owner, copy.color][copy.id] = copy
+            self.cells[copy.position] = copy
+            self._copied.add(copy.id)
+            piece = copy
+        super()._move_to(piece, row, col)
@@ -1,16 +1,65 @@
+import logging
 import os
 from typing import Optional
 import json
-from openai import OpenAI
-from gameboard import GameBoard, Player, Direction
-from prompts.system import friendly_prompt, enemy_prompt
+import threading
+from gameboard import Color, GameBoard, Player, Direction
+from prompts.system import system_prompts
 import time
+from tracing import tracer
+from logs import fields
+import metrics
+import cassette
+
+logger = logging.getLogger(__name__)
+
+
+def make_client():
+    """OpenAI client, wrapped to record or replay if a cassette is active."""
+    recording = cassette.active()
+    if recording and recording.mode == cassette.REPLAY:
+        # Served from the cassette; no key or network needed
+        return cassette.CassetteChatClient(recording)
+    # openai takes most of a second to import; only pay for it when needed
+    from openai import OpenAI
+
+    real = OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+    )
+    return cassette.CassetteChatClient(recording, real) if recording else real
+
+
+# Built on first use by get_client; tests and benchmarks may assign their own
+client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The shared chat client, created by the first caller."""
+    global client
+    if client is None:
+        with _client_lock:
+            if client is None:
+                client = make_client()
+    return client
+
+
+def warm_client():
+    """Create the client in the background so the first move doesn't wait for it."""
+
+    def build():
+        try:
+            get_client()
+        except Exception:
+            logger.exception("❌ Could not create the LLM client")
+
+    threading.Thread(target=build, name="llm-client", daemon=True).start()
+
 
-client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-)
 player_model = "gpt-4.1"
 enemy_model = "gpt-4.1"
+# List capturing and losing orders under the board in prompts (THREAT_HINTS=1)
+threat_hints = os.getenv("THREAT_HINTS") == "1"
 
 
 def get_llm_proposed_moves(
@@ -20,38 +69,57 @@ def get_llm_proposed_moves(
 ) -> dict[int, Direction]:
     """Takes in the gameboard and player and queries the llm for a move. Parsed out the response and returns it as a map of id to direction"""
     model = player_model if player == Player.PLAYER else enemy_model
+    friendly_prompt, enemy_prompt = system_prompts(gameboard.size, gameboard.pieces_per_side)
     if player == Player.PLAYER:
         prompt = friendly_prompt
     else:
         prompt = enemy_prompt
-    game_board = f"# Game State\n\n{gameboard.to_prompt(player)}"
+    game_board = f"# Game State\n\n{gameboard.to_prompt(player, threats=threat_hints)}"
     if not user_messages:
         user_messages = [
             {"role": "user", "content": f"{game_board}\n\nPlease make a move"}
         ]
-    print(user_messages)
+    # The conversation grows every tick; only the newest message is worth logging
+    logger.debug(
+        "LLM request for %s, %d messages, latest: %s",
+        player.value,
+        len(user_messages),
+        user_messages[-1]["content"],
+    )
 
     start = time.time()
-    response = client.chat.completions.create(
-        model=model,
-        response_format={"type": "json_object"},
-        max_tokens=1000,
-        messages=[{"role": "system", "content": prompt}] + user_messages,
-    )
+    with tracer.span("llm", side=player.value):
+        response = get_client().chat.completions.create(
+            model=model,
+            response_format={"type": "json_object"},
+            max_tokens=1000,
+            messages=[{"role": "system", "content": prompt}] + user_messages,
+        )
+    metrics.llm_latency.labels(side=player.value).observe(time.time() - start)
+    if response.usage:
+        metrics.llm_tokens.labels(side=player.value, kind="prompt").inc(response.usage.prompt_tokens)
+        metrics.llm_tokens.labels(side=player.value, kind="completion").inc(
+            response.usage.completion_tokens
+        )
     response = response.choices[0].message.content
-    print("LLM response:", response, "\nIn: ", time.time() - start, "(s)")
+    logger.info(
+        "LLM response: %s",
+        response,
+        extra=fields(side=player.value, seconds=round(time.time() - start, 3)),
+    )
     try:
         parsed = json.loads(response)
         move = {}
-        for color, direction in parsed.items():
-            for id, piece in gameboard.pieces.items():
-                if piece.owner != player:
-                    continue
-                if piece.color.value.lower() == color.lower():
-                    llm_direction = Direction.from_str(direction)
-                    if llm_direction:
-                        move[id] = llm_direction
+        for color_name, direction in parsed.items():
+            color = Color.from_str(color_name)
+            if color is None:
+                continue
+            llm_direction = Direction.from_str(direction)
+            if llm_direction:
+                for piece in gameboard.get_pieces_by_color(player, color):
+                    move[piece.id] = llm_direction
         return move
     except json.JSONDecodeError as e:
-        print(f"Error decoding JSON response from LLM: {e}")
+        metrics.llm_parse_failures.labels(side=player.value).inc()
+        logger.warning("Error decoding JSON response from LLM: %s", e, extra=fields(side=player.value))
         return {}
@@ -0,0 +1,165 @@
+"""Leveled, structured logging that never blocks the caller on I/O.
+
+Built on the standard ``logging`` package. Modules log through
+``logging.getLogger(__name__)`` as usual; ``setup_logging`` sends every
+record through a queue to a background thread that formats and writes it,
+so the audio callback and game loop only pay for building a record.
+
+* Records below the configured level (``LOG_LEVEL``, INFO by default) cost a
+  level check. Use ``%s`` arguments rather than f-strings, and wrap costly
+  payloads in ``Lazy`` so they are only built for records that get written.
+* ``RateLimitFilter`` caps how often any one message template is written,
+  for messages that can fire on every audio block.
+* Structured fields go in ``extra=fields(...)``; ``LOG_FORMAT=json`` writes
+  one JSON object per line, otherwise fields are appended as ``key=value``.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+
+def fields(**values) -> dict:
+    """``extra`` argument attaching structured fields to a record."""
+    return {"fields": values}
+
+
+class Lazy:
+    """Defers building a log payload until the record is formatted."""
+
+    __slots__ = ("func",)
+
+    def __init__(self, func: Callable[[], object]):
+        self.func = func
+
+    def __str__(self):
+        return str(self.func())
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per message template.
+
+    Each template may be written ``burst`` times in a row, then ``rate`` times
+    per second. The next record written for a template says how many were
+    suppressed in between.
+    """
+
+    def __init__(self, rate: float = 5.0, burst: int = 10):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}  # (logger, template) -> [tokens, last time, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queues records as they are, leaving formatting to the listener thread.
+
+    The stock ``QueueHandler.prepare`` formats on the calling thread so records
+    can be pickled; here they never leave the process.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with structured fields appended as key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%H:%M:%S")
+
+    def format(self, record):
+        line = super().format(record)
+        extras = dict(getattr(record, "fields", {}))
+        if getattr(record, "suppressed", 0):
+            extras["suppressed"] = record.suppressed
+        if extras:
+            line += " " + " ".join(f"{key}={value}" for key, value in extras.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record):
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None, stream=None):
+    """Route all logging through a background writer. Safe to call again.
+
+    Args:
+        level: Minimum level name, ``LOG_LEVEL`` or INFO if None
+        fmt: ``"json"`` or ``"text"``, ``LOG_FORMAT`` or text if None
+        stream: Where lines are written, stderr by default
+    """
+    global _listener
+    shutdown_logging()
+
+    level = (level or os.getenv("LOG_LEVEL") or "INFO").upper()
+    fmt = (fmt or os.getenv("LOG_FORMAT") or "text").lower()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(log_queue)
+    handler.addFilter(RateLimitFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if isinstance(existing, _DeferredQueueHandler):
+            root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Write out queued records and stop the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,325 @@
+"""Process metrics with a Prometheus text endpoint.
+
+A small registry of counters, gauges and histograms in the spirit of
+``prometheus_client``, without the dependency. Metrics are always collected
+(an update is a dict lookup under a lock); set ``METRICS_PORT`` to serve them
+at ``http://localhost:<port>/metrics``.
+
+Rates are left to the scraper, e.g. ticks per second is
+``rate(game_ticks_total[1m])``.
+"""
+
+import logging
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base for metrics with optional labels.
+
+    Without labels the metric itself is updated; with labels, ``labels()``
+    returns the child for one combination of label values.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), registry=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self):
+        """(suffix, label values, extra label, value) for exposition."""
+        if not self.labelnames:
+            return [(suffix, (), extra, value) for suffix, extra, value in self._values()]
+        samples = []
+        for key, child in sorted(self._children.items()):
+            samples.extend((suffix, key, extra, value) for suffix, extra, value in child._values())
+        return samples
+
+    def _values(self):
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self._samples():
+            lines.append(
+                f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}"
+            )
+        return "\n".join(lines)
+
+
+class _CounterValue:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def _values(self):
+        return [("_total", "", self.value)]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count. Names should not end in ``_total``."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=(), registry=None):
+        super().__init__(name, help, labelnames, registry)
+        self._value = _CounterValue()
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0):
+        self._value.inc(amount)
+
+    @property
+    def value(self) -> float:
+        return self._value.value
+
+    def _values(self):
+        return self._value._values()
+
+
+class _GaugeValue:
+    __slots__ = ("value", "function", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the value from ``function`` at scrape time instead."""
+        self.function = function
+
+    def get(self) -> float:
+        return self.function() if self.function else self.value
+
+    def _values(self):
+        return [("", "", self.get())]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), registry=None):
+        super().__init__(name, help, labelnames, registry)
+        self._value = _GaugeValue()
+
+    def _new_child(self):
+        return _GaugeValue()
+
+    def set(self, value: float):
+        self._value.set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._value.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._value.dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._value.set_function(function)
+
+    def get(self) -> float:
+        return self._value.get()
+
+    def _values(self):
+        return self._value._values()
+
+
+# Seconds; covers sub-millisecond game work up to slow LLM round-trips
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "count", "sum", "_lock")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            self.count += 1
+            self.sum += value
+
+    def _values(self):
+        with self._lock:
+            values = []
+            cumulative = 0
+            for bound, count in zip(self.buckets, self.counts):
+                cumulative += count
+                values.append(("_bucket", f'le="{_format_value(bound)}"', cumulative))
+            values.append(("_bucket", 'le="+Inf"', self.count))
+            values.append(("_sum", "", self.sum))
+            values.append(("_count", "", self.count))
+            return values
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, registry)
+        self._value = _HistogramValue(self.buckets)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._value.observe(value)
+
+    def _values(self):
+        return self._value._values()
+
+
+class Registry:
+    """Holds metrics and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self.metrics[metric.name] = metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self.metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class MetricsServer:
+    """Serves a registry at ``/metrics`` from a background thread."""
+
+    def __init__(self, port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes every few seconds would flood the console
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info("📊 Metrics on http://%s:%d/metrics", self.host, self.port)
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Game
+game_ticks = Counter("game_ticks", "Game loop ticks executed")
+failed_moves = Counter("game_failed_moves", "Moves rejected by execute_turn", ["reason"])
+
+# LLM
+llm_latency = Histogram("llm_request_seconds", "LLM request latency", ["side"])
+llm_tokens = Counter("llm_tokens", "LLM tokens used", ["side", "kind"])
+llm_parse_failures = Counter("llm_json_parse_failures", "LLM responses that were not valid JSON", ["side"])
+
+# Audio and transcription
+audio_overflows = Counter("audio_input_overflows", "Audio blocks lost to input overflow", ["stream"])
+segments_too_short = Counter("voice_segments_too_short", "Speech segments dropped as too short", ["stream"])
+segments_dropped = Counter("transcription_segments_dropped", "Segments dropped on a full transcription queue", ["stream"])
+transcription_queue_depth = Gauge(
+    "transcription_queue_depth", "Segments waiting for a transcription worker", ["stream"]
+)
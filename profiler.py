@@ -0,0 +1,173 @@
+"""On-demand sampling profiler for game ticks.
+
+Nothing runs until a window is requested, so there is no overhead in normal
+play. ``request()`` (from ``SIGUSR1`` or code) arms a window; it starts at
+the next tick, samples every thread's stack from a background thread until
+``ticks`` ticks have completed, then writes:
+
+* ``<name>.collapsed``: one ``stage;frame;frame... count`` line per distinct
+  stack, for ``flamegraph.pl``, speedscope or https://www.speedscope.app
+* ``<name>.txt``: samples per stage
+
+Each stack's stage is its innermost frame that belongs to a known pipeline
+stage (LLM call, execute_turn, draw_board, ...); anything else is
+``other``. Threads parked on a lock, queue or event are skipped so idle
+workers don't drown out real work.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Function name -> stage; the innermost match on a stack wins
+STAGES = {
+    "execute_game_loop": "tick",
+    "_run_tick": "tick",
+    "add_message": "add_message",
+    "get_llm_proposed_moves": "llm",
+    "parse_command": "fast_path",
+    "execute_turn": "execute_turn",
+    "check_captures": "check_captures",
+    "draw_board": "draw_board",
+    "update_display": "draw_board",
+    "publish_turn": "state_sync",
+    "_transcribe_segment": "transcribe",
+    "_run_partial": "transcribe",
+    "audio_callback": "audio",
+}
+
+# (file, function) leaves of threads that are waiting rather than working;
+# matched by file too so the game's own get()s and waits still count
+IDLE = {
+    ("threading.py", "wait"),
+    ("threading.py", "acquire"),
+    ("threading.py", "join"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    # Idle concurrent.futures workers block in C on their work queue
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class TickProfiler:
+    """Samples stacks over a window of consecutive ticks."""
+
+    def __init__(self, ticks: int = 20, interval: float = 0.005, output_dir: str = "profiles"):
+        """
+        Args:
+            ticks: Ticks per profiling window
+            interval: Seconds between stack samples
+            output_dir: Where window files are written
+        """
+        self.ticks = ticks
+        self.interval = interval
+        self.output_dir = output_dir
+        self.windows_written = 0
+        self._requested: Optional[int] = None
+        self._remaining = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None
+
+    def request(self, ticks: Optional[int] = None):
+        """Profile the next ``ticks`` ticks. Safe from signal handlers and other threads."""
+        self._requested = ticks or self.ticks
+
+    def tick_started(self):
+        """Call at the start of every tick; starts an armed window."""
+        if self._requested is None or self._thread is not None:
+            return
+        self._remaining = self._requested
+        self._requested = None
+        self._stacks = Counter()
+        self._stop.clear()
+        self._started_at = time.time()
+        self._thread = threading.Thread(target=self._sample, name="tick-profiler", daemon=True)
+        self._thread.start()
+        logger.info("🔬 Profiling %d ticks", self._remaining)
+
+    def tick_finished(self):
+        """Call at the end of every tick; closes the window after its last tick."""
+        if self._thread is None:
+            return
+        self._remaining -= 1
+        if self._remaining <= 0:
+            self.finish()
+
+    def finish(self) -> Optional[str]:
+        """Stop sampling and write the window. Returns the path prefix written."""
+        if self._thread is None:
+            return None
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        return self._write()
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = self._collapse(frame)
+                if stack:
+                    self._stacks[stack] += 1
+
+    @staticmethod
+    def _collapse(frame) -> Optional[str]:
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE:
+            return None
+        labels = []
+        stage = None
+        while frame is not None:
+            labels.append(_frame_label(frame))
+            if stage is None:
+                stage = STAGES.get(frame.f_code.co_name)
+            frame = frame.f_back
+        labels.append(stage or "other")
+        labels.reverse()
+        return ";".join(labels)
+
+    def stage_totals(self) -> Dict[str, int]:
+        totals: Counter = Counter()
+        for stack, count in self._stacks.items():
+            totals[stack.split(";", 1)[0]] += count
+        return dict(totals.most_common())
+
+    def _write(self) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self._started_at))
+        self.windows_written += 1
+        prefix = os.path.join(self.output_dir, f"ticks-{stamp}-{self.windows_written}")
+
+        with open(prefix + ".collapsed", "w") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        totals = self.stage_totals()
+        total = sum(totals.values()) or 1
+        with open(prefix + ".txt", "w") as f:
+            f.write(f"{total} samples every {self.interval * 1000:.1f} ms\n")
+            for stage, count in totals.items():
+                f.write(f"{stage:<16}{count:>8}{count / total:>8.1%}\n")
+
+        logger.info("🔬 Profile written to %s.collapsed", prefix)
+        return prefix
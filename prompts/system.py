@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 game_name = "Prommpt and Control"
 board_size = 10
 player_count = 2
@@ -68,17 +70,17 @@ X X X X
 ```
 No capture: flanking does not capture. 
 
-There is one additional rule: If your four units are ever part of a single connected component you lose. \
-(Because there would be no way to capture a group of 4 with 4 units)
+There is one additional rule: If your {units_word} units are ever part of a single connected component you lose. \
+(Because there would be no way to capture a group of {unit_count} with {unit_count} units)
 """
 
 common_rules = f"""\
 You are part of a voice controlled real time strategy game called {game_name}. \
-The game is played on a {board_size}x{board_size} grid. \
+The game is played on a {{board_size}}x{{board_size}} grid. \
 The game is a {player_count} player game. \
 {{job}}
-Each player gets starts with {len(unit_colors)} units. \
-Each unit is represented by a color: {', '.join(unit_colors)}. \
+Each player gets starts with {{unit_count}} units. \
+Each unit is represented by a color: {', '.join(unit_colors)}. {{squads}}\
 {capture_rules}
 {{information}}
 
@@ -101,6 +103,25 @@ If there is a conflict where a unit tries to move through or into anotehr unit t
 """
 
 
-friendly_prompt = common_rules.format(job=friendly_job, information=friendly_information)
+squads_rule = """\
+Units share colors in squads, and an order for a color moves every unit of that color.
+
+"""
+
+
+@lru_cache(maxsize=8)
+def system_prompts(board_size: int = board_size, unit_count: int = len(unit_colors)):
+    """Friendly and enemy system prompts for a board size and number of units per side."""
+    details = dict(
+        board_size=board_size,
+        unit_count=unit_count,
+        units_word="four" if unit_count == 4 else str(unit_count),
+        squads=squads_rule if unit_count > len(unit_colors) else "",
+    )
+    return (
+        common_rules.format(job=friendly_job, information=friendly_information, **details),
+        common_rules.format(job=enemy_job, information=enemy_information, **details),
+    )
+
 
-enemy_prompt = common_rules.format(job=enemy_job, information=enemy_information)
+friendly_prompt, enemy_prompt = system_prompts()
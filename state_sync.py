@@ -0,0 +1,271 @@
+"""Push board state to remote players and spectators.
+
+Subscribers get one full snapshot when they join and then a small delta per
+tick built from ``GameBoard.execute_turn``'s result dict. Every message is
+serialized once and the same bytes are written to every subscriber, so the
+per-tick cost on the game thread does not depend on how many people watch.
+
+Wire format is newline-delimited JSON over TCP:
+
+    {"type": "snapshot", "tick": 0, "size": 10, "pieces": [[id, owner, color, row, col], ...]}
+    {"type": "delta", "tick": 1, "moves": [[id, row, col], ...], "captured": [id, ...],
+     "winner": "Player", "game_over": true}
+
+Empty ``moves``/``captured`` lists and a missing winner are left out of deltas.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from gameboard import GameBoard
+
+logger = logging.getLogger(__name__)
+
+# A subscriber whose unsent backlog grows past this is too slow to keep up and
+# gets disconnected instead of buffering without bound.
+MAX_SUBSCRIBER_BACKLOG = 256 * 1024
+
+
+def _dumps(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+def encode_snapshot(board: GameBoard, tick: int = 0) -> dict:
+    """Full board state, sent to a subscriber when it joins."""
+    return {
+        "type": "snapshot",
+        "tick": tick,
+        "size": board.size,
+        "pieces": [
+            [piece.id, piece.owner.value, piece.color.value, piece.row, piece.col]
+            for piece in board.pieces.values()
+        ],
+    }
+
+
+def encode_delta(tick: int, turn_result: Dict[str, any]) -> dict:
+    """Changes made by one tick, taken from ``execute_turn``'s result dict."""
+    delta = {"type": "delta", "tick": tick}
+    moves = [
+        [piece_id, *result["new_position"]]
+        for piece_id, result in turn_result["move_results"].items()
+        if result["success"]
+    ]
+    if moves:
+        delta["moves"] = moves
+    if turn_result["captured_pieces"]:
+        delta["captured"] = list(turn_result["captured_pieces"])
+    if turn_result.get("winner") is not None:
+        delta["winner"] = turn_result["winner"].value
+    if turn_result.get("game_over"):
+        delta["game_over"] = True
+    return delta
+
+
+class BoardMirror:
+    """Client-side reconstruction of the board from snapshot and delta messages."""
+
+    def __init__(self):
+        self.tick = -1
+        self.size = 0
+        # piece_id -> [owner, color, row, col]
+        self.pieces: Dict[int, List] = {}
+        self.winner: Optional[str] = None
+        self.game_over = False
+
+    def apply(self, message: dict):
+        """Apply one decoded message. Deltas must arrive in tick order."""
+        if message["type"] == "snapshot":
+            self.tick = message["tick"]
+            self.size = message["size"]
+            self.pieces = {
+                piece_id: [owner, color, row, col]
+                for piece_id, owner, color, row, col in message["pieces"]
+            }
+            self.winner = None
+            self.game_over = False
+            return
+
+        if message["tick"] != self.tick + 1:
+            raise ValueError(
+                f"Out of order delta: expected tick {self.tick + 1}, got {message['tick']}"
+            )
+        self.tick = message["tick"]
+        for piece_id, row, col in message.get("moves", ()):
+            piece = self.pieces[piece_id]
+            piece[2] = row
+            piece[3] = col
+        for piece_id in message.get("captured", ()):
+            del self.pieces[piece_id]
+        self.winner = message.get("winner")
+        self.game_over = message.get("game_over", False)
+
+    def to_snapshot(self) -> dict:
+        """Re-encode the mirrored state as a snapshot message."""
+        return {
+            "type": "snapshot",
+            "tick": self.tick,
+            "size": self.size,
+            "pieces": [[piece_id, *piece] for piece_id, piece in self.pieces.items()],
+        }
+
+    def positions(self) -> Dict[int, tuple]:
+        """Map of piece id to (row, col), comparable with ``get_game_state``."""
+        return {piece_id: (piece[2], piece[3]) for piece_id, piece in self.pieces.items()}
+
+
+class StateSyncServer:
+    """TCP server that fans board updates out to subscribers.
+
+    The server runs its own event loop on a daemon thread so it keeps serving
+    while the Tk main loop owns the main thread. ``publish_*`` methods are
+    safe to call from the game thread.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765):
+        self.host = host
+        self.port = port
+        self.tick = 0
+        self.subscribers = set()
+        # The server keeps its own mirror so join snapshots are consistent with
+        # the deltas already sent, without touching the live board off-thread.
+        self.mirror = BoardMirror()
+        self._snapshot_bytes: Optional[bytes] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def start(self, board: GameBoard):
+        """Start serving in a background thread with ``board`` as the initial state."""
+        self.mirror.apply(encode_snapshot(board, self.tick))
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        logger.info("📡 State sync listening on %s:%d", self.host, self.port)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle_client, self.host, self.port)
+        )
+        # Pick up the real port when started with port=0
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def stop(self):
+        """Disconnect all subscribers and stop the server thread."""
+        if self._loop is None:
+            return
+
+        def _shutdown():
+            for writer in list(self.subscribers):
+                writer.close()
+            self.subscribers.clear()
+            self._server.close()
+            self._loop.stop()
+
+        self._loop.call_soon_threadsafe(_shutdown)
+        self._thread.join(timeout=2.0)
+        self._loop = None
+
+    def publish_reset(self, board: GameBoard):
+        """Send a fresh snapshot to everyone, e.g. after a restart."""
+        message = encode_snapshot(board, self.tick)
+        self._call(self.apply_and_broadcast, message)
+
+    def publish_turn(self, turn_result: Dict[str, any]):
+        """Send the delta for one executed turn."""
+        self.tick += 1
+        message = encode_delta(self.tick, turn_result)
+        self._call(self.apply_and_broadcast, message)
+
+    def _call(self, fn, *args):
+        if self._loop is None:
+            fn(*args)
+        else:
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    def apply_and_broadcast(self, message: dict) -> int:
+        """Update the mirror and send ``message`` to all subscribers.
+
+        Runs on the server loop. Returns the number of bytes written per subscriber.
+        """
+        self.mirror.apply(message)
+        self._snapshot_bytes = None
+        data = _dumps(message)
+        for writer in list(self.subscribers):
+            self._send(writer, data)
+        return len(data)
+
+    def _send(self, writer, data: bytes):
+        if writer.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BACKLOG:
+            logger.warning("📡 Dropping slow subscriber")
+            self.subscribers.discard(writer)
+            writer.close()
+            return
+        writer.write(data)
+
+    def add_subscriber(self, writer):
+        """Register a subscriber and send it the current snapshot."""
+        if self._snapshot_bytes is None:
+            # Cached until the next delta, so a burst of joins encodes once
+            self._snapshot_bytes = _dumps(self.mirror.to_snapshot())
+        self.subscribers.add(writer)
+        self._send(writer, self._snapshot_bytes)
+
+    async def _handle_client(self, reader, writer):
+        self.add_subscriber(writer)
+        try:
+            # Subscribers only listen; wait for them to hang up
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            writer.close()
+
+
+class StateSyncClient:
+    """Connects to a ``StateSyncServer`` and keeps a ``BoardMirror`` up to date."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765):
+        self.host = host
+        self.port = port
+        self.mirror = BoardMirror()
+
+    async def run(self, on_update=None):
+        """Read messages until the server disconnects, calling ``on_update(mirror, message)``."""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                self.mirror.apply(message)
+                if on_update:
+                    on_update(self.mirror, message)
+        finally:
+            writer.close()
+
+
+async def spectate(host: str = "127.0.0.1", port: int = 8765):
+    """Print a summary of each update, for quick manual checks."""
+
+    def _print_update(mirror, message):
+        print(f"tick {mirror.tick}: {message['type']}, {len(mirror.pieces)} pieces")
+        if mirror.game_over:
+            print(f"Game over, winner: {mirror.winner}")
+
+    await StateSyncClient(host, port).run(_print_update)
+
+
+if __name__ == "__main__":
+    import sys
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    asyncio.run(spectate(port=port))
@@ -0,0 +1,131 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import llm
+from app import GameManager, deliver_transcripts, start_event_loop
+from async_voice_controller import SimpleAsyncVoiceController
+from audio_sources import ArraySource
+from benchmarks.pipeline import FakeChatClient, LoopScheduler
+from gameboard import Color, Direction, Player
+from transcription import ToneTranscriber
+from ui_display import GameBoardUI
+
+
+@pytest.fixture
+def loop():
+    loop, thread = start_event_loop()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    client = FakeChatClient(latency=0)
+    monkeypatch.setattr(llm, "client", client)
+    return client
+
+
+def on_loop(loop, fn, *args):
+    """Run ``fn`` on ``loop``'s thread and return its result."""
+
+    async def call():
+        return fn(*args)
+
+    return asyncio.run_coroutine_threadsafe(call(), loop).result()
+
+
+def start_game(loop):
+    """A game ticking once a second on ``loop``, with one silent voice stream."""
+    controller = SimpleAsyncVoiceController(
+        transcriber=ToneTranscriber(), source=ArraySource(np.zeros(1600, dtype=np.float32))
+    )
+    asyncio.run_coroutine_threadsafe(controller.start_listening(), loop).result()
+    ui = GameBoardUI(LoopScheduler(loop), headless=True)
+    manager = GameManager()
+    manager.set_components(ui, [controller])
+
+    ticks = []
+    run_tick = manager._run_tick
+
+    def counted_tick():
+        ticks.append(time.perf_counter())
+        run_tick()
+
+    manager._run_tick = counted_tick
+    asyncio.run_coroutine_threadsafe(deliver_transcripts(controller, manager), loop)
+    on_loop(loop, manager.start_game_loop)
+    return manager, controller, ticks
+
+
+def test_transcript_from_another_thread_wakes_the_game_loop(loop, fake_llm):
+    manager, controller, ticks = start_game(loop)
+    assert len(ticks) == 1
+
+    # Transcripts arrive on transcription worker threads
+    pushed = time.perf_counter()
+    thread = threading.Thread(target=controller._transcript_callback, args=("red up",))
+    thread.start()
+    thread.join()
+
+    deadline = pushed + 0.5
+    while len(ticks) < 2 and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    # Well before the regular one second tick
+    assert len(ticks) == 2
+    assert on_loop(loop, controller.drain_transcripts) == []
+    assert manager.channels[0].transcript.cursor == 1
+    on_loop(loop, manager.stop_game_loop)
+
+
+def test_partials_never_raise_the_tick_count(loop, fake_llm):
+    manager, controller, ticks = start_game(loop)
+    started = ticks[0]
+
+    # Partial hypotheses arrive every partial_interval while the user talks
+    for words in ["red", "red up", "red up then"]:
+        thread = threading.Thread(target=controller._partial_callback, args=(1, words))
+        thread.start()
+        thread.join()
+        time.sleep(0.15)
+    time.sleep(0.2)
+    assert len(ticks) == 1
+
+    # The regular tick shows the player's LLM what has been said so far
+    while len(ticks) < 2 and time.perf_counter() < started + 2:
+        time.sleep(0.01)
+    assert len(ticks) == 2 and ticks[1] - started > 0.9
+    # Read on the loop thread, after the tick has finished
+    conversation = on_loop(loop, lambda: manager.channels[0].transcript.conversation)
+    assert conversation[-1]["content"].endswith("(user is still speaking)\nred up then")
+    on_loop(loop, manager.stop_game_loop)
+
+
+def test_llm_takes_over_when_fast_path_plan_runs_out(fake_llm):
+    controller = SimpleAsyncVoiceController()
+    manager = GameManager()
+    manager.set_components(GameBoardUI(None, headless=True), [controller])
+    channel = manager.channels[0]
+    reds = {piece.id for piece in manager.ui.game_board.get_pieces_by_color(Player.PLAYER, Color.RED)}
+
+    controller.transcript_log.append("red up twice")
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        plan = [manager._channel_moves(channel, executor) for _ in range(2)]
+        assert plan == [{piece_id: Direction.UP for piece_id in reds}] * 2
+        assert fake_llm.calls == 0
+
+        # Partials of the next order reach the LLM once the plan is done
+        controller._partial_callback(1, "everyone")
+        moves = manager._channel_moves(channel, executor)
+        assert isinstance(moves, concurrent.futures.Future)
+        moves.result()
+    assert fake_llm.calls == 1
+    assert manager.fast_path_stats.hits == 1
+    assert "red up twice" in channel.transcript.conversation[0]["content"]
+    assert channel.transcript.conversation[-1]["content"].endswith("still speaking)\neveryone")
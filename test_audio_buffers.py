@@ -0,0 +1,52 @@
+import numpy as np
+
+from audio_buffers import CaptureBuffer, PcmBufferPool, RingBuffer
+
+
+def samples(start, stop):
+    return np.arange(start, stop, dtype=np.float32)
+
+
+def contents(ring):
+    out = np.empty(ring.capacity, dtype=np.float32)
+    return out[: ring.copy_to(out)].tolist()
+
+
+def test_ring_wraps_and_keeps_newest_samples():
+    ring = RingBuffer(5)
+    ring.write(samples(0, 3))
+    assert contents(ring) == [0, 1, 2]
+
+    # Crosses the end of storage and overwrites the oldest samples
+    ring.write(samples(3, 7))
+    assert len(ring) == 5
+    assert ring.write_pos == 2
+    assert contents(ring) == [2, 3, 4, 5, 6]
+
+    ring.write(samples(7, 9))
+    assert contents(ring) == [4, 5, 6, 7, 8]
+
+    # A block longer than the ring leaves only its tail
+    ring.write(samples(9, 21))
+    assert contents(ring) == [16, 17, 18, 19, 20]
+
+    ring.clear()
+    assert contents(ring) == []
+
+
+def test_capture_starts_from_ring_and_stops_when_full():
+    ring = RingBuffer(4)
+    ring.write(samples(0, 6))
+    capture = CaptureBuffer(8)
+    capture.start_from(ring)
+    assert capture.view().tolist() == [2, 3, 4, 5]
+
+    assert capture.append(samples(6, 8))
+    assert not capture.append(samples(8, 12))
+    assert capture.view().tolist() == list(range(2, 10))
+
+    segment = PcmBufferPool(8).convert(capture.view() / 10)
+    assert np.frombuffer(segment.frames, dtype="<i2").tolist() == [
+        int(value / 10 * 32767) for value in range(2, 10)
+    ]
+    segment.release()
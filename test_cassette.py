@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from cassette import (
+    RECORD,
+    REPLAY,
+    Cassette,
+    CassetteChatClient,
+    CassetteMiss,
+    CassetteTranscriber,
+)
+from transcription import ToneTranscriber
+
+
+class CountingClient:
+    """Real-client stand-in that answers with a counter, so replays are distinguishable."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f'{{"red": "up", "n": {self.calls}}}'))],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=10),
+        )
+
+
+def request(content):
+    return {
+        "model": "gpt-4.1",
+        "max_tokens": 1000,
+        "messages": [{"role": "system", "content": "rules"}, {"role": "user", "content": content}],
+    }
+
+
+def test_record_then_replay_offline(tmp_path):
+    path = str(tmp_path / "game.jsonl.gz")
+    real = CountingClient()
+    recorder = CassetteChatClient(Cassette(path, RECORD), real)
+    first = recorder.create(**request("move up"))
+    second = recorder.create(**request("move up"))
+    other = recorder.create(**request("move down"))
+
+    engine = ToneTranscriber()
+    pcm = (engine.synthesize("red up", 16000) * 32767).astype("<i2").tobytes()
+    heard = CassetteTranscriber(Cassette(path, RECORD), engine).transcribe(memoryview(pcm), 16000)
+
+    replay = Cassette(path, REPLAY)
+    assert len(replay) == 4
+    player = CassetteChatClient(replay)
+    # Key ignores dict order and trailing whitespace; repeats replay in order
+    reordered = dict(reversed(list(request("move up \n").items())))
+    assert player.create(**reordered).choices[0].message.content == first.choices[0].message.content
+    assert player.create(**request("move up")).choices[0].message.content == second.choices[0].message.content
+    assert player.create(**request("move down")).usage.prompt_tokens == other.usage.prompt_tokens
+    assert CassetteTranscriber(replay).transcribe(memoryview(pcm), 16000) == heard == "red up"
+    assert real.calls == 3
+
+    with pytest.raises(CassetteMiss):
+        player.create(**request("never recorded"))
+    # Leading whitespace is part of the prompt (e.g. an indented board)
+    with pytest.raises(CassetteMiss):
+        player.create(**request("  move down"))
+    with pytest.raises(CassetteMiss):
+        CassetteTranscriber(replay).transcribe(memoryview(np.zeros(160, "<i2").tobytes()), 16000)
@@ -0,0 +1,73 @@
+import pytest
+
+from command_parser import STAY, parse_command, step_to_moves
+from gameboard import Color, Direction, GameBoard, Player
+
+RED, BLUE, GREEN, YELLOW = Color.RED, Color.BLUE, Color.GREEN, Color.YELLOW
+UP, DOWN, LEFT, RIGHT = Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT
+
+
+@pytest.mark.parametrize(
+    "text, steps",
+    [
+        ("red up", [{RED: UP}]),
+        ("Please move the blue units left!", [{BLUE: LEFT}]),
+        ("red and green down", [{RED: DOWN, GREEN: DOWN}]),
+        ("all right", [{RED: RIGHT, BLUE: RIGHT, GREEN: RIGHT, YELLOW: RIGHT}]),
+        ("yellow stay", [{YELLOW: STAY}]),
+        # Repeats
+        ("blue down twice", [{BLUE: DOWN}] * 2),
+        ("green left 3 times", [{GREEN: LEFT}] * 3),
+        ("red up up up", [{RED: UP}] * 3),
+        ("red up 99 times", [{RED: UP}] * 10),
+        # Clauses in one sequence share ticks; later ones override
+        ("all up, red down", [{RED: DOWN, BLUE: UP, GREEN: UP, YELLOW: UP}]),
+        ("red up twice and blue left", [{RED: UP, BLUE: LEFT}, {RED: UP}]),
+        # "then" starts after the previous sequence ends
+        ("red up then red left", [{RED: UP}, {RED: LEFT}]),
+        ("red up, then blue down twice", [{RED: UP}, {BLUE: DOWN}, {BLUE: DOWN}]),
+        (
+            "all up twice then red left",
+            [{RED: UP, BLUE: UP, GREEN: UP, YELLOW: UP}] * 2 + [{RED: LEFT}],
+        ),
+        (
+            "red up twice and blue left then green down",
+            [{RED: UP, BLUE: LEFT}, {RED: UP}, {GREEN: DOWN}],
+        ),
+    ],
+)
+def test_parse_command(text, steps):
+    assert parse_command(text) == steps
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "please",
+        "red",
+        "up",
+        "red up blue",
+        "red sideways",
+        "attack the enemy",
+        "red up then",
+        "then red up",
+        "red up then then blue down",
+        "red up banana times",
+    ],
+)
+def test_falls_through_to_llm(text):
+    assert parse_command(text) is None
+
+
+def test_step_to_moves():
+    board = GameBoard()
+    reds = board.get_pieces_by_color(Player.PLAYER, RED)
+    blues = board.get_pieces_by_color(Player.PLAYER, BLUE)
+
+    moves = step_to_moves({RED: UP, BLUE: STAY}, board, Player.PLAYER)
+    assert moves == {piece.id: UP for piece in reds}
+    assert not any(piece.id in moves for piece in blues)
+
+    enemy = step_to_moves({RED: DOWN}, board, Player.ENEMY)
+    assert enemy == {piece.id: DOWN for piece in board.get_pieces_by_color(Player.ENEMY, RED)}
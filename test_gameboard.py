@@ -0,0 +1,133 @@
+import random
+
+import pytest
+
+from command_parser import step_to_moves
+from gameboard import Color, Direction, GameBoard, Player
+
+
+def assert_indexes_match(board):
+    for owner in Player:
+        assert board.get_pieces_by_owner(owner) == [
+            p for p in board.pieces.values() if p.owner == owner
+        ]
+        for color in Color:
+            assert board.get_pieces_by_color(owner, color) == [
+                p for p in board.pieces.values() if p.owner == owner and p.color == color
+            ]
+
+
+def test_indexes_follow_moves_and_captures():
+    rng = random.Random(11)
+    captures = 0
+    for _ in range(10):
+        board = GameBoard()
+        while True:
+            moves = {piece_id: rng.choice(list(Direction)) for piece_id in board.pieces}
+            result = board.execute_turn(moves)
+            assert_indexes_match(board)
+            captures += len(result["captured_pieces"])
+            if result["game_over"]:
+                break
+    assert captures > 0
+
+    board = GameBoard()
+    red = board.get_piece_by_color(Player.PLAYER, Color.RED)
+    assert step_to_moves({Color.RED: Direction.UP}, board, Player.PLAYER) == {red.id: Direction.UP}
+
+
+def test_large_sparse_board():
+    board = GameBoard(size=2000, pieces_per_side=150)
+    assert len(board.cells) == len(board.pieces) == 300
+    assert board.is_game_over() == (False, None)
+    assert board.check_captures() == []
+    # Squads of four colors; nobody starts next to anyone
+    assert len(board.get_pieces_by_color(Player.ENEMY, Color.YELLOW)) == 37
+    assert all(board.get_support_count(piece) == (0, 0) for piece in board.pieces.values())
+
+    moves = {piece.id: Direction.DOWN for piece in board.get_pieces_by_owner(Player.ENEMY)}
+    board.execute_turn(moves)
+    assert board.get_piece_at(2, 1).owner == Player.ENEMY
+    assert board.get_piece_at(1, 1) is None
+
+    with pytest.raises(ValueError):
+        GameBoard(size=10, pieces_per_side=20)
+
+
+def random_board(rng, size, count):
+    board = GameBoard(size, pieces_per_side=0)
+    for cell in rng.sample(range(size * size), count):
+        row, col = divmod(cell, size)
+        board.add_piece(rng.choice(list(Player)), row, col, rng.choice(list(Color)))
+    return board
+
+
+def test_incremental_captures_match_full_check():
+    rng = random.Random(5)
+    captures = 0
+    for _ in range(40):
+        size = rng.randint(4, 25)
+        seed = rng.random()
+        count = rng.randint(2, size * size // 3)
+        incremental = random_board(random.Random(seed), size, count)
+        full = random_board(random.Random(seed), size, count)
+        full.incremental_captures = False
+
+        for _ in range(15):
+            # Some turns move everything, most only a few pieces
+            movers = rng.sample(sorted(full.pieces), min(len(full.pieces), rng.choice([1, 3, 8, 100])))
+            moves = {piece_id: rng.choice(list(Direction)) for piece_id in movers}
+            expected = full.execute_turn(moves)
+            assert incremental.execute_turn(moves) == expected
+            assert incremental.get_game_state() == full.get_game_state()
+            captures += len(expected["captured_pieces"])
+    assert captures > 50
+
+
+def test_affected_pieces_cover_every_status_change():
+    rng = random.Random(9)
+    for _ in range(60):
+        size = rng.randint(3, 15)
+        board = random_board(rng, size, rng.randint(2, size * size // 2))
+        for _ in range(10):
+            before = {p.id: board.get_max_group_sizes(p) for p in board.pieces.values()}
+            board.dirty_cells.clear()
+            for piece_id in rng.sample(sorted(board.pieces), min(len(board.pieces), 3)):
+                board.move_piece(piece_id, rng.choice(list(Direction)))
+            if len(board.pieces) > 1 and rng.random() < 0.3:
+                board.remove_piece(rng.choice(list(board.pieces.values())))
+
+            affected = {p.id for p in board.get_affected_pieces(board.dirty_cells)}
+            for piece in board.pieces.values():
+                if board.get_max_group_sizes(piece) != before[piece.id]:
+                    assert piece.id in affected
+
+
+def test_simulate_turn_matches_execute_turn_and_leaves_board_alone():
+    rng = random.Random(3)
+    for _ in range(30):
+        size = rng.randint(4, 20)
+        seed = rng.random()
+        count = rng.randint(2, size * size // 3)
+        board = random_board(random.Random(seed), size, count)
+        history = []
+        for _ in range(5):
+            candidates = [
+                {
+                    piece_id: rng.choice(list(Direction))
+                    for piece_id in rng.sample(sorted(board.pieces), min(len(board.pieces), n))
+                }
+                for n in (1, 4, 50)
+            ]
+            before = (board.display_board(), board.get_game_state(), set(board.dirty_cells))
+            predicted = board.simulate_turns(candidates)
+            assert (board.display_board(), board.get_game_state(), board.dirty_cells) == before
+
+            for moves, prediction in zip(candidates, predicted):
+                replica = random_board(random.Random(seed), size, count)
+                for turn in history:
+                    replica.execute_turn(turn)
+                assert replica.execute_turn(moves) == prediction
+
+            history.append(candidates[-1])
+            board.execute_turn(candidates[-1])
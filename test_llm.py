@@ -1,9 +1,56 @@
+import os
 
-from llm import get_llm_proposed_moves
+import pytest
+
+import cassette
+import llm
 from gameboard import GameBoard, Player, Direction
-gameboard = GameBoard()
+from llm import get_llm_proposed_moves
+
+# Recorded from the live API the first time this runs with OPENAI_API_KEY set;
+# replayed offline after that. Delete the file to re-record.
+CASSETTE_PATH = os.path.join(os.path.dirname(__file__), "cassettes", "test_llm.jsonl.gz")
+
+if os.path.exists(CASSETTE_PATH):
+    MODE = cassette.REPLAY
+elif os.getenv("OPENAI_API_KEY"):
+    MODE = cassette.RECORD
+else:
+    pytest.skip("no recorded cassette and no OPENAI_API_KEY", allow_module_level=True)
+
+# The cassette is only for llm's client: other test modules' voice
+# controllers must not pick it up
+cassette.activate(cassette.Cassette(CASSETTE_PATH, MODE))
+try:
+    llm.client = llm.make_client()
+finally:
+    cassette.activate(None)
+
+
+def ask(instruction):
+    gameboard = GameBoard()
+    messages = [
+        {
+            "role": "user",
+            "content": f"{gameboard.to_prompt(Player.PLAYER)}\n\n#New instructions\n{instruction}",
+        }
+    ]
+    return gameboard, get_llm_proposed_moves(gameboard, Player.PLAYER, messages)
+
+
+def test_all_up():
+    gameboard, moves = ask("Please move all units up")
+    assert moves
+    assert all(gameboard.pieces[piece_id].owner == Player.PLAYER for piece_id in moves)
+    assert set(moves.values()) == {Direction.UP}
+
 
-all_up = "Please move all units up"
-print(get_llm_proposed_moves(gameboard, Player.PLAYER, all_up))
-mix = "Please move red up, blue down, green left, yellow right"
-print(get_llm_proposed_moves(gameboard, Player.PLAYER, mix))
+def test_mixed_directions():
+    gameboard, moves = ask("Please move red up, blue down, green left, yellow right")
+    by_color = {gameboard.pieces[piece_id].color.value: direction for piece_id, direction in moves.items()}
+    assert by_color == {
+        "Red": Direction.UP,
+        "Blue": Direction.DOWN,
+        "Green": Direction.LEFT,
+        "Yellow": Direction.RIGHT,
+    }
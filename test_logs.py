@@ -0,0 +1,51 @@
+import io
+import json
+import logging
+import threading
+
+from logs import Lazy, RateLimitFilter, fields, setup_logging, shutdown_logging
+
+
+def test_records_are_formatted_off_the_calling_thread():
+    stream = io.StringIO()
+    setup_logging(level="INFO", fmt="json", stream=stream)
+    built = {"skipped": [], "written": []}
+
+    def payload(kind):
+        def build():
+            built[kind].append(threading.current_thread())
+            return "expensive"
+
+        return Lazy(build)
+
+    logger = logging.getLogger("test.logs")
+    try:
+        logger.debug("skipped %s", payload("skipped"))
+        logger.info("built %s", payload("written"), extra=fields(stream="mic 1"))
+    finally:
+        shutdown_logging()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["message"] for line in lines] == ["built expensive"]
+    assert lines[0]["stream"] == "mic 1"
+    # Below the level nothing is built; the written record is built by the
+    # writer thread (pytest's own capture handlers may format it too)
+    assert built["skipped"] == []
+    assert any(thread is not threading.current_thread() for thread in built["written"])
+
+
+def test_rate_limit_reports_suppressed_records():
+    limit = RateLimitFilter(rate=0.0, burst=3)
+
+    def record(msg):
+        return logging.LogRecord("audio", logging.ERROR, __file__, 1, msg, (), None)
+
+    passed = [limit.filter(record("❌ Audio error: %s")) for _ in range(10)]
+    assert passed == [True] * 3 + [False] * 7
+    # Other templates have their own budget
+    assert limit.filter(record("🎤 Recording..."))
+
+    limit.rate = 1e9
+    next_record = record("❌ Audio error: %s")
+    assert limit.filter(next_record)
+    assert next_record.suppressed == 7
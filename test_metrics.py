@@ -0,0 +1,38 @@
+import urllib.request
+
+from metrics import Counter, Gauge, Histogram, MetricsServer, Registry
+
+
+def test_prometheus_exposition_over_http():
+    registry = Registry()
+    ticks = Counter("ticks", "Ticks", registry=registry)
+    failed = Counter("failed_moves", "Failed moves", ["reason"], registry=registry)
+    depth = Gauge("queue_depth", "Queue depth", ["stream"], registry=registry)
+    latency = Histogram("latency_seconds", "Latency", ["side"], buckets=(0.1, 1.0), registry=registry)
+
+    ticks.inc()
+    ticks.inc()
+    failed.labels(reason='Out "of" bounds').inc()
+    queue = [1, 2, 3]
+    depth.labels(stream="mic 1").set_function(lambda: len(queue))
+    for value in (0.05, 0.5, 5.0):
+        latency.labels(side="Player").observe(value)
+
+    server = MetricsServer(port=0, registry=registry)
+    server.start()
+    try:
+        queue.append(4)
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+            body = response.read().decode()
+    finally:
+        server.stop()
+
+    lines = body.splitlines()
+    assert "# TYPE ticks counter" in lines
+    assert "ticks_total 2" in lines
+    assert 'failed_moves_total{reason="Out \\"of\\" bounds"} 1' in lines
+    assert 'queue_depth{stream="mic 1"} 4' in lines
+    assert 'latency_seconds_bucket{side="Player",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{side="Player",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{side="Player",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{side="Player"} 3' in lines
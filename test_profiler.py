@@ -0,0 +1,64 @@
+import queue
+import threading
+import time
+
+from profiler import TickProfiler
+
+
+def check_captures(seconds):
+    # Named like the engine stage so samples land in it
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+def test_window_covers_requested_ticks(tmp_path):
+    profiler = TickProfiler(ticks=3, interval=0.001, output_dir=str(tmp_path))
+
+    profiler.tick_started()
+    assert not profiler.active  # nothing requested, nothing sampled
+
+    profiler.request()
+    for _ in range(3):
+        profiler.tick_started()
+        assert profiler.active
+        check_captures(0.05)
+        profiler.tick_finished()
+    assert not profiler.active
+    assert profiler.windows_written == 1
+
+    (collapsed,) = tmp_path.glob("*.collapsed")
+    lines = collapsed.read_text().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+    assert any(line.startswith("check_captures;") for line in lines)
+    assert max(profiler.stage_totals(), key=profiler.stage_totals().get) == "check_captures"
+    assert "check_captures" in next(tmp_path.glob("*.txt")).read_text()
+
+
+def get(seconds):
+    # Busy, but named like queue.Queue.get
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+def test_idle_threads_are_matched_by_file_not_just_name(tmp_path):
+    profiler = TickProfiler(ticks=1, interval=0.001, output_dir=str(tmp_path))
+    jobs = queue.Queue()
+    waiter = threading.Thread(target=jobs.get)
+    waiter.start()
+
+    profiler.request()
+    profiler.tick_started()
+    get(0.05)
+    profiler.tick_finished()
+    jobs.put(None)
+    waiter.join()
+
+    collapsed = next(tmp_path.glob("*.collapsed")).read_text().splitlines()
+    leaves = [line.rsplit(" ", 1)[0].rsplit(";", 1)[-1] for line in collapsed]
+    assert any(leaf.startswith("get (test_profiler.py") for leaf in leaves)
+    assert not any("(queue.py" in leaf or "(threading.py" in leaf for leaf in leaves)
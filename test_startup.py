@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+
+# Modules the game must not pay for until it uses them
+DEFERRED = ["openai", "PIL", "speech_recognition", "sounddevice"]
+
+# Seconds for `import app` in a fresh interpreter; importing openai alone
+# takes longer than this
+BUDGET = 0.6
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {DEFERRED!r} if m in sys.modules]}}))
+"""
+
+
+def import_app():
+    # No key or cassette: importing must not need either
+    env = {k: v for k, v in os.environ.items() if k not in ("OPENAI_API_KEY", "CASSETTE")}
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_app_is_lazy_and_within_budget():
+    runs = [import_app() for _ in range(3)]
+    assert runs[0]["loaded"] == []
+    # Best of three, so a busy machine doesn't fail the budget
+    assert min(run["elapsed"] for run in runs) < BUDGET
@@ -0,0 +1,81 @@
+import json
+import random
+import socket
+
+import pytest
+
+from gameboard import Direction, GameBoard
+from state_sync import BoardMirror, StateSyncServer, encode_delta, encode_snapshot
+
+
+def wire(message):
+    # What a subscriber decodes, so tuples and enums can't slip through
+    return json.loads(json.dumps(message))
+
+
+def random_turn(board, rng):
+    return {
+        piece_id: rng.choice(list(Direction))
+        for piece_id in board.pieces
+        if rng.random() < 0.7
+    }
+
+
+def test_mirror_follows_seeded_games():
+    rng = random.Random(3)
+    for _ in range(20):
+        board = GameBoard()
+        mirror = BoardMirror()
+        mirror.apply(wire(encode_snapshot(board)))
+        tick = 0
+        while True:
+            tick += 1
+            result = board.execute_turn(random_turn(board, rng))
+            mirror.apply(wire(encode_delta(tick, result)))
+            assert mirror.positions() == board.get_game_state()["piece_positions"]
+            if result["game_over"]:
+                break
+        assert mirror.game_over
+        assert mirror.winner == result["winner"].value
+
+
+def test_out_of_order_delta_raises():
+    board = GameBoard()
+    mirror = BoardMirror()
+    mirror.apply(encode_snapshot(board))
+    first = encode_delta(1, board.execute_turn({}))
+    second = encode_delta(2, board.execute_turn({}))
+
+    with pytest.raises(ValueError):
+        mirror.apply(second)
+    mirror.apply(first)
+    with pytest.raises(ValueError):
+        mirror.apply(first)
+    mirror.apply(second)
+    assert mirror.tick == 2
+
+
+def test_late_subscriber_converges():
+    rng = random.Random(5)
+    board = GameBoard()
+    server = StateSyncServer(port=0)
+    server.start(board)
+    try:
+        for _ in range(5):
+            server.publish_turn(board.execute_turn(random_turn(board, rng)))
+
+        with socket.create_connection((server.host, server.port), timeout=5) as sock:
+            lines = sock.makefile("r")
+            mirror = BoardMirror()
+            mirror.apply(json.loads(lines.readline()))
+            assert mirror.tick <= 5
+
+            for _ in range(5):
+                server.publish_turn(board.execute_turn(random_turn(board, rng)))
+            while mirror.tick < server.tick:
+                mirror.apply(json.loads(lines.readline()))
+    finally:
+        server.stop()
+
+    assert mirror.tick == 10
+    assert mirror.positions() == board.get_game_state()["piece_positions"]
@@ -0,0 +1,88 @@
+import random
+
+from gameboard import Color, Direction, GameBoard, Player
+from threat_map import ThreatMap
+from ui_display import GameBoardUI
+
+
+def settled_board(rng, size, count):
+    board = GameBoard(size, pieces_per_side=0)
+    for cell in rng.sample(range(size * size), count):
+        row, col = divmod(cell, size)
+        board.add_piece(rng.choice(list(Player)), row, col, rng.choice(list(Color)))
+    while board.execute_turn({})["captured_pieces"]:
+        pass
+    return board
+
+
+def test_flags_agree_with_simulated_single_moves():
+    rng = random.Random(2)
+    checked = 0
+    for _ in range(40):
+        size = rng.randint(4, 16)
+        board = settled_board(rng, size, rng.randint(2, size * size // 2))
+        for player in Player:
+            threats = ThreatMap(board, player)
+            danger = set(threats.danger_cells())
+            opportunity = set(threats.opportunity_cells())
+            for piece in board.get_pieces_by_owner(player):
+                for direction in Direction:
+                    dr, dc = direction.value
+                    cell = (piece.row + dr, piece.col + dc)
+                    if not board.is_valid_position(*cell) or board.get_piece_at(*cell):
+                        continue
+                    captured = board.simulate_turn({piece.id: direction})["captured_pieces"]
+                    if cell in danger:
+                        assert piece.id in captured
+                    # Capturing an enemy next to the cell is always flagged
+                    neighbours = {board.get_piece_at(*adj) for adj in board.get_adjacent_positions(*cell)}
+                    if any(p and p.owner != player and p.id in captured for p in neighbours):
+                        assert cell in opportunity
+                    checked += 1
+    assert checked > 500
+
+
+def test_prompt_annotation_and_overlay():
+    board = GameBoard(6, pieces_per_side=0)
+    board.add_piece(Player.PLAYER, 2, 2, Color.RED)
+    board.add_piece(Player.PLAYER, 3, 2, Color.BLUE)
+    enemy_red = board.add_piece(Player.ENEMY, 3, 4, Color.RED)
+    board.add_piece(Player.ENEMY, 0, 3, Color.BLUE)
+    board.execute_turn({})
+
+    plain = board.to_prompt(Player.ENEMY)
+    annotated = board.to_prompt(Player.ENEMY, threats=True)
+    # Enemy red stepping left lands next to the player's pair
+    assert annotated == plain + "\n\n# Tactics\nOrders that lose units: red left (1)"
+    assert ThreatMap(board, Player.ENEMY).danger_cells() == [(3, 3)]
+    assert board.simulate_turn({enemy_red.id: Direction.LEFT})["captured_pieces"] == [enemy_red.id]
+
+    ui = GameBoardUI(None, board, headless=True, show_threats=True)
+    outlined = [item for item in ui.canvas.items.values() if item[0] == "rectangle"]
+    threats = ThreatMap(board, Player.PLAYER)
+    assert len(outlined) == len(threats.danger_cells()) + len(threats.opportunity_cells()) > 0
+
+
+def test_overlay_only_redraws_cells_whose_status_changed():
+    board = GameBoard(6, pieces_per_side=0)
+    board.add_piece(Player.PLAYER, 2, 2, Color.RED)
+    board.add_piece(Player.PLAYER, 3, 2, Color.BLUE)
+    enemy_red = board.add_piece(Player.ENEMY, 3, 4, Color.RED)
+    far = board.add_piece(Player.ENEMY, 5, 0, Color.GREEN)
+    board.execute_turn({})
+    ui = GameBoardUI(None, board, headless=True, show_threats=True)
+    (outline,) = ui.threat_items.values()
+
+    def matches_full_redraw():
+        fresh = GameBoardUI(None, board, headless=True, show_threats=True)
+        return ui.threat_items.keys() == fresh.threat_items.keys()
+
+    # A move far from the threat keeps its outline
+    ui.update_display(board.execute_turn({far.id: Direction.UP}))
+    assert list(ui.threat_items.values()) == [outline] and matches_full_redraw()
+
+    # The threat goes away with the enemy and comes back with it
+    ui.update_display(board.execute_turn({enemy_red.id: Direction.RIGHT}))
+    assert not ui.threat_items and outline not in ui.canvas.items
+    ui.update_display(board.execute_turn({enemy_red.id: Direction.LEFT}))
+    assert len(ui.threat_items) == 1 and matches_full_redraw()
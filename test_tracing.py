@@ -0,0 +1,77 @@
+import json
+import random
+
+import tracing
+from audio_sources import WavFileSource, write_wav
+from gameboard import GameBoard
+from tracing import LatencyHistogram, tracer
+from transcript_manager import TranscriptLog, TranscriptManager
+from transcription import ToneTranscriber
+from voice import VoiceController
+
+
+def test_histogram_percentiles_within_bucket_error():
+    rng = random.Random(7)
+    samples = [rng.uniform(0.001, 0.5) for _ in range(10000)]
+    histogram = LatencyHistogram()
+    for sample in samples:
+        histogram.record(sample)
+
+    samples.sort()
+    for p in (50, 95, 99):
+        exact = samples[int(p / 100 * len(samples)) - 1]
+        assert abs(histogram.percentile(p) - exact) / exact < 0.06
+    assert histogram.count == len(samples)
+    assert histogram.max == samples[-1]
+
+
+def test_replay_traces_voice_to_transcript(tmp_path):
+    engine = ToneTranscriber()
+    path = str(tmp_path / "order.wav")
+    write_wav(path, engine.synthesize("red up", 16000), 16000)
+
+    log = TranscriptLog()
+    controller = VoiceController(
+        callback=lambda text: log.append(text, origin=tracing.origin.get()),
+        transcriber=engine,
+        source=WavFileSource(path),
+        name="mic",
+    )
+    manager = TranscriptManager()
+
+    tracer.clear()
+    tracer.enable()
+    try:
+        controller.start_listening()
+        controller.wait_for_transcripts()
+        assert manager.add_message("board", log) == "red up"
+        tracer.record("voice_to_pixels", manager.pending_origin)
+    finally:
+        tracer.disable()
+
+    summary = tracer.summary()
+    for name in ("utterance", "transcribe", "add_message", "voice_to_pixels"):
+        assert summary[name]["count"] == 1
+    assert summary["voice_to_pixels"]["max"] >= summary["transcribe"]["max"]
+
+    trace_path = tmp_path / "trace.json"
+    tracer.export_chrome(str(trace_path))
+    events = json.loads(trace_path.read_text())["traceEvents"]
+    assert {"vad.start", "utterance", "transcribe"} <= {e["name"] for e in events}
+    assert any(e["ph"] == "M" for e in events)
+
+
+def test_batch_previews_have_their_own_span():
+    board = GameBoard()
+    tracer.clear()
+    tracer.enable()
+    try:
+        board.simulate_turn({})
+        board.simulate_turns([{}, {}, {}])
+    finally:
+        tracer.disable()
+
+    summary = tracer.summary()
+    # Each preview runs on an untraced overlay, so a batch is one span
+    assert summary["simulate_turn"]["count"] == 1
+    assert summary["simulate_turns"]["count"] == 1
@@ -0,0 +1,40 @@
+from transcript_manager import TranscriptLog, TranscriptManager
+
+
+def test_cursor_reads_across_retention_trimming():
+    evicted = []
+    log = TranscriptLog(retention=3, on_evict=evicted.append)
+    assert [log.append(text) for text in ("red up", "blue down")] == [0, 1]
+
+    entries, cursor = log.since(0)
+    assert [entry.text for entry in entries] == ["red up", "blue down"]
+    assert cursor == 2
+
+    for i in range(5):
+        log.append(f"order {i}")
+    assert [entry.seq for entry in evicted] == [0, 1, 2, 3]
+    assert log.texts() == ["order 2", "order 3", "order 4"]
+
+    # A reader that fell behind skips what was trimmed and picks up the rest
+    entries, cursor = log.since(cursor)
+    assert [entry.seq for entry in entries] == [4, 5, 6]
+    assert cursor == 7
+    assert log.since(cursor) == ([], 7)
+
+    log.append("green left")
+    entries, cursor = log.since(cursor)
+    assert [entry.text for entry in entries] == ["green left"]
+    assert cursor == 8
+
+
+def test_managers_keep_their_own_cursors():
+    log = TranscriptLog()
+    log.append("red up")
+    early = TranscriptManager()
+    late = TranscriptManager(cursor=log.next_seq)
+    log.append("blue down")
+
+    assert early.add_message("", log) == "red up blue down"
+    assert late.add_message("", log) == "blue down"
+    assert early.cursor == late.cursor == 2
+    assert early.add_message("", log) is None
@@ -0,0 +1,55 @@
+import random
+from collections import Counter
+
+import pytest
+
+from gameboard import Direction
+from ui_display import GameBoardUI
+
+
+def canvas_contents(ui):
+    """Items on the canvas regardless of their ids or creation order."""
+    return Counter(
+        (kind, tuple(coords), tuple(sorted(options.items())))
+        for kind, coords, options in ui.canvas.items.values()
+    )
+
+
+def full_redraw(ui):
+    return canvas_contents(
+        GameBoardUI(None, ui.game_board, headless=True, show_threats=ui.show_threats)
+    )
+
+
+@pytest.mark.parametrize("show_threats", [False, True])
+def test_incremental_draws_match_full_redraws(show_threats):
+    rng = random.Random(4)
+    ui = GameBoardUI(None, headless=True, show_threats=show_threats)
+    games = captures = 0
+    while games < 3:
+        moves = {
+            piece_id: rng.choice(list(Direction))
+            for piece_id in ui.game_board.pieces
+            if rng.random() < 0.6
+        }
+        result = ui.game_board.execute_turn(moves)
+        captures += len(result["captured_pieces"])
+        overlay = dict(ui.threat_items)
+        ui.update_display(result)
+        assert canvas_contents(ui) == full_redraw(ui)
+        # Outlines of cells whose status didn't change are left alone
+        for key in overlay.keys() & ui.threat_items.keys():
+            assert ui.threat_items[key] == overlay[key]
+
+        if result["game_over"]:
+            games += 1
+            ui.show_game_over(result["winner"])
+            assert not ui.canvas.items
+            ui.restart_game()
+            assert canvas_contents(ui) == full_redraw(ui)
+    assert captures > 0
+
+    # Drawn items are kept between frames, not recreated
+    before = set(ui.canvas.items)
+    ui.update_display(ui.game_board.execute_turn({}))
+    assert set(ui.canvas.items) == before
@@ -0,0 +1,330 @@
+import threading
+
+import numpy as np
+
+import metrics
+from audio_sources import ArraySource, WavFileSource, write_wav
+from transcription import ToneTranscriber, TranscriptionPool, stable_prefix
+from vad import AdaptiveVAD
+from voice import VoiceController
+
+
+def feed(controller, audio, clock, block_seconds=0.05, on_block=None):
+    """Push audio through the controller's callback in real-time sized blocks."""
+    block = int(controller.sample_rate * block_seconds)
+    for start in range(0, len(audio), block):
+        chunk = audio[start : start + block]
+        controller.audio_callback(chunk.reshape(-1, 1), len(chunk), None, None)
+        clock[0] += block_seconds
+        if on_block:
+            on_block()
+
+
+def test_streaming_partials_are_prefixes_of_final():
+    clock = [1000.0]
+    engine = ToneTranscriber()
+    finals = []
+    partials = []
+    controller = VoiceController(
+        callback=finals.append,
+        transcriber=engine,
+        partial_callback=lambda utterance_id, text: partials.append((utterance_id, text)),
+    )
+    controller.clock = lambda: clock[0]
+
+    command = "move red up and blue left then green down"
+    silence = np.zeros(int(controller.sample_rate * 2.0), dtype=np.float32)
+    audio = np.concatenate([silence, engine.synthesize(command, controller.sample_rate), silence])
+    feed(controller, audio, clock, on_block=controller.partial_worker.wait_idle)
+    controller.transcription_pool.wait_idle()
+
+    assert finals == [command]
+    heard = [text for _, text in partials if text is not None]
+    assert heard, "expected partial hypotheses before the utterance ended"
+    for text in heard:
+        assert command.startswith(text)
+    # The final transcript retracts the utterance's partials
+    assert partials[-1] == (1, None)
+
+
+def test_stable_prefix():
+    assert stable_prefix("red up", "red up and") == "red up"
+    assert stable_prefix("red op", "red up") == "red"
+    assert stable_prefix("", "red") == ""
+
+
+def test_adaptive_vad_ignores_noise_and_hears_quiet_speech():
+    # Quiet enough that the old fixed 0.005 RMS threshold missed it
+    engine = ToneTranscriber(amplitude=0.006)
+    rate = 16000
+    rng = np.random.default_rng(0)
+
+    def noise(seconds, level=0.0005):
+        return rng.normal(0, level, int(rate * seconds)).astype(np.float32)
+
+    command = "all units left"
+    speech = engine.synthesize(command, rate)
+    # A loud burst of broadband noise, far above the old threshold, must not
+    # start a recording
+    audio = np.concatenate(
+        [noise(2.0), noise(1.0, level=0.02), noise(2.0), speech + noise(len(speech) / rate), noise(3.0)]
+    )
+    finals = []
+    recordings = []
+    controller = VoiceController(
+        callback=finals.append, transcriber=engine, source=ArraySource(audio, rate)
+    )
+    callback = controller.audio_callback
+
+    def record_state(*args):
+        callback(*args)
+        recordings.append(controller.is_recording)
+
+    controller.audio_callback = record_state
+    controller.start_listening()
+    controller.wait_for_transcripts()
+
+    assert finals == [command]
+    # Exactly one recording, ended well before the old 1.2 s silence timeout
+    starts = sum(1 for before, after in zip(recordings, recordings[1:]) if after and not before)
+    assert starts == 1
+    recorded_blocks = sum(recordings)
+    assert recorded_blocks * 0.05 < len(speech) / rate + 1.2
+
+
+def test_vad_threshold_follows_noise_floor():
+    rate, block = 16000, 800
+    t = np.arange(block) / rate
+
+    def tone(freq, rms):
+        return (np.sin(2 * np.pi * freq * t) * rms * np.sqrt(2)).astype(np.float32)
+
+    def settle(vad, hum, blocks=100):
+        return [vad.process(hum) for _ in range(blocks)]
+
+    vad = AdaptiveVAD(rate)
+    # A steady voice-band hum is learned as the floor, never heard as speech
+    assert not any(settle(vad, tone(440, 0.003)))
+    assert abs(vad.noise_floor - 0.003) < 0.0005
+    assert vad.process(tone(1000, 0.02))
+    vad.reset()
+
+    # A louder room raises the floor and with it the bar for speech
+    vad.process(tone(440, 0.003))
+    assert not any(settle(vad, tone(440, 0.01)))
+    assert abs(vad.noise_floor - 0.01) < 0.001
+    assert not vad.process(tone(1000, 0.02))
+    assert vad.process(tone(1000, 0.06))
+    # Hysteresis: a softer syllable keeps the utterance going...
+    assert vad.process(tone(1000, 0.03))
+    # ...but would not have started one
+    settle(vad, tone(440, 0.01), blocks=5)
+    assert not vad.process(tone(1000, 0.03))
+
+    # The floor falls back quickly once the room is quiet again
+    settle(vad, tone(440, 0.003), blocks=15)
+    assert abs(vad.noise_floor - 0.003) < 0.0005
+    assert vad.process(tone(1000, 0.02))
+
+
+def test_wav_replay_runs_faster_than_real_time(tmp_path):
+    engine = ToneTranscriber()
+    commands = ["red up", "blue left twice", "all units down"]
+    paths = []
+    for i, command in enumerate(commands):
+        path = str(tmp_path / f"command_{i}.wav")
+        write_wav(path, engine.synthesize(command, 16000), 16000)
+        paths.append(path)
+
+    source = WavFileSource(paths)
+    finals = []
+    controller = VoiceController(callback=finals.append, transcriber=engine, source=source)
+    controller.start_listening()
+    controller.wait_for_transcripts()
+
+    assert finals == commands
+    assert source.now() == source.duration
+
+
+def test_streams_share_pool_fairly_with_per_stream_backpressure():
+    gate = threading.Event()
+    order = []
+
+    def transcribe(audio, sample_rate):
+        gate.wait()
+        order.append(audio)
+        return audio
+
+    pool = TranscriptionPool(workers=1)
+    delivered = {"busy": [], "quiet": []}
+    busy = pool.open_stream(transcribe, lambda seq, text, tag: delivered["busy"].append(text), max_pending=3)
+    quiet = pool.open_stream(transcribe, lambda seq, text, tag: delivered["quiet"].append(text), max_pending=3)
+
+    # The single worker picks up b0 and waits on the gate; the rest queue up
+    busy.submit("b0", 16000)
+    while busy.pending():
+        pass
+    results = [busy.submit(f"b{i}", 16000) for i in range(1, 6)]
+    quiet.submit("q0", 16000)
+    quiet.submit("q1", 16000)
+    gate.set()
+    pool.wait_idle()
+
+    # The busy stream's overflow is dropped without touching the quiet one
+    assert results[3:] == [None, None]
+    assert busy.dropped == 2 and quiet.dropped == 0
+    # Round-robin between streams rather than draining the busy backlog first
+    assert order == ["b0", "b1", "q0", "b2", "q1", "b3"]
+    assert delivered == {"busy": ["b0", "b1", "b2", "b3"], "quiet": ["q0", "q1"]}
+
+
+def test_concurrent_replay_streams_keep_their_own_transcripts(tmp_path):
+    engine = ToneTranscriber()
+    scripts = {
+        "player one": ["red up", "blue left twice"],
+        "player two": ["green down", "all units right", "yellow up"],
+    }
+    pool = TranscriptionPool(workers=2)
+    finals = {}
+    controllers = []
+    for name, commands in scripts.items():
+        paths = []
+        for i, command in enumerate(commands):
+            path = str(tmp_path / f"{name}_{i}.wav")
+            write_wav(path, engine.synthesize(command, 16000), 16000)
+            paths.append(path)
+        finals[name] = []
+        controllers.append(
+            VoiceController(
+                callback=finals[name].append,
+                transcriber=engine,
+                source=WavFileSource(paths),
+                transcription_pool=pool,
+                name=name,
+            )
+        )
+
+    threads = [threading.Thread(target=c.start_listening) for c in controllers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pool.wait_idle()
+
+    assert finals == scripts
+
+
+def test_default_stream_names_are_unique_across_pools():
+    gate = threading.Event()
+    pools = [TranscriptionPool(workers=1), TranscriptionPool(workers=1)]
+    streams = [
+        pool.open_stream(lambda audio, rate: gate.wait() and audio, lambda seq, text, tag: None)
+        for pool in pools
+    ]
+    assert streams[0].name != streams[1].name
+
+    # Each stream keeps its own series on the process-wide gauge
+    streams[0].submit("a", 16000)
+    while streams[0].pending():
+        pass
+    streams[0].submit("b", 16000)
+    depth = metrics.transcription_queue_depth
+    assert depth.labels(stream=streams[0].name).get() == 1
+    assert depth.labels(stream=streams[1].name).get() == 0
+    gate.set()
+    for pool in pools:
+        pool.wait_idle()
+
+
+def test_shorter_later_segment_is_delivered_after_earlier_one():
+    first_command, second_command = "red up then blue left twice", "stay"
+
+    class HeldToneTranscriber(ToneTranscriber):
+        """Holds the first utterance until the second one has been transcribed."""
+
+        def __init__(self):
+            super().__init__()
+            self.finished = []
+            self.second_done = threading.Event()
+
+        def transcribe(self, pcm, sample_rate, final=True):
+            text = super().transcribe(pcm, sample_rate, final)
+            if text == first_command:
+                assert self.second_done.wait(5)
+            self.finished.append(text)
+            if text == second_command:
+                self.second_done.set()
+            return text
+
+    engine = HeldToneTranscriber()
+    rate = 16000
+    silence = np.zeros(rate, dtype=np.float32)
+    audio = np.concatenate(
+        [silence, engine.synthesize(first_command, rate), silence,
+         engine.synthesize(second_command, rate), silence]
+    )
+    finals = []
+    controller = VoiceController(
+        callback=finals.append,
+        transcriber=engine,
+        source=ArraySource(audio, rate),
+        transcription_pool=TranscriptionPool(workers=2),
+    )
+    controller.start_listening()
+    controller.wait_for_transcripts()
+    controller.transcription_pool.shutdown()
+
+    assert engine.finished == [second_command, first_command]
+    assert finals == [first_command, second_command]
+
+
+def test_pooled_pcm_is_not_reused_while_a_transcriber_holds_it():
+    commands = ["red up", "blue down twice", "all units left", "green right"]
+    gate = threading.Event()
+
+    class HoldingToneTranscriber(ToneTranscriber):
+        """Holds the first final segment until every later one has been captured."""
+
+        def __init__(self):
+            super().__init__()
+            self.held = None
+
+        def transcribe(self, pcm, sample_rate, final=True):
+            if final and self.held is None:
+                self.held = bytes(pcm)
+                assert gate.wait(5)
+                # Later utterances and partials went through the pool meanwhile
+                assert bytes(pcm) == self.held
+            return super().transcribe(pcm, sample_rate, final)
+
+    engine = HoldingToneTranscriber()
+    rate = 16000
+    silence = np.zeros(rate, dtype=np.float32)
+    parts = [silence]
+    for command in commands:
+        parts += [engine.synthesize(command, rate), silence]
+    finals = []
+    partials = []
+    controller = VoiceController(
+        callback=finals.append,
+        transcriber=engine,
+        partial_callback=lambda utterance_id, text: partials.append(text),
+        source=ArraySource(np.concatenate(parts), rate),
+        transcription_pool=TranscriptionPool(workers=1),
+    )
+    callback = controller.audio_callback
+
+    def callback_then_partial(*args):
+        # Let each partial run before the replay moves on, so none are skipped
+        callback(*args)
+        controller.partial_worker.wait_idle()
+
+    controller.audio_callback = callback_then_partial
+    controller.start_listening()
+    assert controller.transcription.outstanding == len(commands)
+    gate.set()
+    controller.wait_for_transcripts()
+    controller.transcription_pool.shutdown()
+
+    assert finals == commands
+    assert any(partials)
@@ -0,0 +1,148 @@
+"""Where a side's units are in danger and where they can capture.
+
+For one side, every empty cell next to a piece is scored in one vectorized
+pass over the current group sizes, as if one of that side's units stepped
+into it:
+
+* danger: even joining every friendly group next to the cell, the unit
+  would be in a smaller group than an enemy group next to it, so it would
+  be captured
+* opportunity: the group it could join is larger than an enemy group next
+  to the cell, so those enemies could be captured
+
+The cell scores assume the best case for the unit moving in, and ignore
+what else moves the same tick. ``orders`` therefore confirms them by
+simulating each squad order that would step into a flagged cell, and
+``to_prompt`` lists only confirmed orders.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from gameboard import Color, Direction, GameBoard, Player
+
+OFFSETS = np.array([direction.value for direction in Direction], dtype=np.int64)
+
+
+class ThreatMap:
+    """Danger and opportunity cells for one side of a board."""
+
+    def __init__(self, board: GameBoard, player: Player):
+        self.board = board
+        self.player = player
+
+        # Label connected groups: position -> label, label -> size and side
+        labels: Dict[Tuple[int, int], int] = {}
+        sizes = []
+        friendly = []
+        for piece in board.pieces.values():
+            if piece.position not in labels:
+                group = board.find_connected_group(piece)
+                for member in group:
+                    labels[member.position] = len(sizes)
+                sizes.append(len(group))
+                friendly.append(piece.owner == player)
+
+        if not labels:
+            self.cells = np.empty((0, 2), dtype=np.int64)
+            self.danger = self.opportunity = np.empty(0, dtype=bool)
+            return
+
+        size = board.size
+        positions = np.array(list(labels), dtype=np.int64)
+        keys = positions[:, 0] * size + positions[:, 1]
+        order = np.argsort(keys)
+        keys = keys[order]
+        position_labels = np.fromiter(labels.values(), dtype=np.int64, count=len(labels))[order]
+        group_sizes = np.array(sizes, dtype=np.int64)
+        group_friendly = np.array(friendly, dtype=bool)
+
+        # Empty cells next to any piece
+        around, inside = self._neighbours(positions, size)
+        around_keys = np.unique(around[inside])
+        cell_keys = around_keys[~np.isin(around_keys, keys, assume_unique=True)]
+        self.cells = np.stack(np.divmod(cell_keys, size), axis=1)
+
+        # Group label in each direction from each cell, -1 where empty
+        neighbour_keys, neighbour_inside = self._neighbours(self.cells, size)
+        index = np.minimum(np.searchsorted(keys, neighbour_keys), len(keys) - 1)
+        occupied = neighbour_inside & (keys[index] == neighbour_keys)
+        label = np.where(occupied, position_labels[index], -1)
+
+        # A group next to a cell from two sides counts once
+        first = np.ones_like(occupied)
+        for j in range(1, len(OFFSETS)):
+            first[:, j] = (label[:, j : j + 1] != label[:, :j]).all(axis=1)
+
+        safe_label = np.maximum(label, 0)
+        neighbour_size = np.where(occupied, group_sizes[safe_label], 0)
+        is_friendly = occupied & group_friendly[safe_label]
+        is_enemy = occupied & ~group_friendly[safe_label]
+
+        joined = np.maximum(1, (neighbour_size * (is_friendly & first)).sum(axis=1))
+        enemy_max = np.where(is_enemy, neighbour_size, 0).max(axis=1)
+        enemy_min = np.where(is_enemy, neighbour_size, np.iinfo(np.int64).max).min(axis=1)
+        reachable = is_friendly.any(axis=1)
+
+        self.danger = reachable & (enemy_max > joined)
+        self.opportunity = reachable & (enemy_min < joined)
+
+    @staticmethod
+    def _neighbours(cells: np.ndarray, size: int):
+        """Keys of the four cells around each of ``cells``, and which are on the board."""
+        around = cells[:, None, :] + OFFSETS[None, :, :]
+        inside = ((around >= 0) & (around < size)).all(axis=2)
+        return around[..., 0] * size + around[..., 1], inside
+
+    def danger_cells(self) -> List[Tuple[int, int]]:
+        return [tuple(cell) for cell in self.cells[self.danger].tolist()]
+
+    def opportunity_cells(self) -> List[Tuple[int, int]]:
+        return [tuple(cell) for cell in self.cells[self.opportunity].tolist()]
+
+    def orders(self) -> Dict[str, List[Tuple[Color, Direction, int]]]:
+        """Squad orders that would capture or lose units if given alone this tick.
+
+        Returns ``{"captures": [...], "loses": [...]}`` of (color, direction,
+        number of pieces), from simulating each order that moves a unit into
+        a flagged cell.
+        """
+        flagged = set(self.danger_cells()) | set(self.opportunity_cells())
+        candidates = []
+        for color in Color:
+            squad = self.board.get_pieces_by_color(self.player, color)
+            for direction in Direction:
+                dr, dc = direction.value
+                if any((piece.row + dr, piece.col + dc) in flagged for piece in squad):
+                    candidates.append((color, direction, {piece.id: direction for piece in squad}))
+
+        found = {"captures": [], "loses": []}
+        results = self.board.simulate_turns(moves for _, _, moves in candidates)
+        for (color, direction, _), result in zip(candidates, results):
+            lost = taken = 0
+            for piece_id in result["captured_pieces"]:
+                if self.board.pieces[piece_id].owner == self.player:
+                    lost += 1
+                else:
+                    taken += 1
+            if taken:
+                found["captures"].append((color, direction, taken))
+            if lost:
+                found["loses"].append((color, direction, lost))
+        return found
+
+    def to_prompt(self, limit: int = 8) -> str:
+        """Short list of capturing and losing orders, empty if there are none."""
+        found = self.orders()
+        lines = []
+        for key, title in (("captures", "Orders that capture"), ("loses", "Orders that lose units")):
+            if found[key]:
+                entries = [
+                    f"{color.value.lower()} {direction.name.lower()} ({count})"
+                    for color, direction, count in found[key][:limit]
+                ]
+                lines.append(f"{title}: " + ", ".join(entries))
+        if not lines:
+            return ""
+        return "# Tactics\n" + "\n".join(lines)
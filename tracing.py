@@ -0,0 +1,259 @@
+"""Lightweight latency tracing for the voice-to-pixels path.
+
+Spans are timed with ``time.perf_counter`` and kept two ways:
+
+* a bounded buffer of events that ``export_chrome`` writes as Chrome trace
+  JSON (open it in ``chrome://tracing`` or https://ui.perfetto.dev), and
+* a fixed-size log-bucket histogram per span name for in-process
+  p50/p95/p99, see ``summary`` and ``report``.
+
+Tracing is off unless ``TRACE_FILE`` is set (or ``tracer.enable()`` is
+called); a disabled span costs one attribute check.
+
+Usage::
+
+    from tracing import tracer
+
+    with tracer.span("llm", side="Player"):
+        ...
+
+    @tracer.traced("draw_board")
+    def draw_board(...): ...
+
+Work that starts on one thread and ends on another (speech start on the audio
+thread, pixels on the Tk thread) is recorded with an explicit start time via
+``record``. The start of the utterance being delivered travels with it in
+``origin`` so the game loop can close the end-to-end span.
+"""
+
+import contextvars
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+# Speech start (perf_counter seconds) of the utterance whose transcript is
+# being delivered on this thread
+origin: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "trace_origin", default=None
+)
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with bounded memory.
+
+    Buckets grow by ``growth`` from ``min_seconds``, so percentiles are
+    accurate to about half that step whatever the range.
+    """
+
+    def __init__(self, min_seconds: float = 1e-6, max_seconds: float = 100.0, growth: float = 1.1):
+        self.min_seconds = min_seconds
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self.counts = [0] * (int(math.log(max_seconds / min_seconds) / self._log_growth) + 2)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        if seconds <= self.min_seconds:
+            index = 0
+        else:
+            index = min(
+                int(math.log(seconds / self.min_seconds) / self._log_growth) + 1,
+                len(self.counts) - 1,
+            )
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p: float) -> float:
+        """Approximate latency below which ``p`` percent of samples fall."""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                # Geometric middle of the bucket, capped by the largest sample
+                upper = self.min_seconds * self.growth**index
+                return min(upper / math.sqrt(self.growth), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class _NoSpan:
+    """Shared no-op span handed out while tracing is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.start, time.perf_counter(), **self.args)
+        return False
+
+
+class Tracer:
+    """Collects spans for Chrome trace export and latency percentiles."""
+
+    def __init__(self, enabled: bool = False, max_events: int = 200_000):
+        """
+        Args:
+            enabled: Record spans; when False every call is a no-op
+            max_events: Oldest trace events are dropped past this many
+        """
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._epoch = time.perf_counter()
+        self._pid = os.getpid()
+        self._thread_names: Dict[int, str] = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self.histograms.clear()
+            self._thread_names.clear()
+
+    def span(self, name: str, **args):
+        """Context manager timing the enclosed block."""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name, args)
+
+    def traced(self, name: Optional[str] = None):
+        """Decorator that runs the function inside a span."""
+
+        def decorate(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, span_name, {}):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    def record(self, name: str, start: float, end: Optional[float] = None, **args):
+        """Record a span with explicit ``perf_counter`` start and end times."""
+        if not self.enabled:
+            return
+        if end is None:
+            end = time.perf_counter()
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": (start - self._epoch) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": self._pid,
+            "tid": self._thread_id(),
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record(end - start)
+
+    def instant(self, name: str, **args):
+        """Record a point in time, e.g. speech detected."""
+        if not self.enabled:
+            return
+        event = {
+            "name": name,
+            "ph": "i",
+            "s": "t",
+            "ts": (time.perf_counter() - self._epoch) * 1e6,
+            "pid": self._pid,
+            "tid": self._thread_id(),
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+
+    def _thread_id(self) -> int:
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        return tid
+
+    def export_chrome(self, path: str):
+        """Write recorded events as Chrome trace JSON."""
+        with self._lock:
+            events = list(self.events)
+            names = dict(self._thread_names)
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+            for tid, name in names.items()
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count and p50/p95/p99/max in seconds for every span name."""
+        with self._lock:
+            return {
+                name: {
+                    "count": h.count,
+                    "p50": h.percentile(50),
+                    "p95": h.percentile(95),
+                    "p99": h.percentile(99),
+                    "max": h.max,
+                }
+                for name, h in sorted(self.histograms.items())
+            }
+
+    def report(self) -> str:
+        """Percentile table in milliseconds."""
+        lines = [f"{'span':<24}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"]
+        for name, stats in self.summary().items():
+            lines.append(
+                f"{name:<24}{stats['count']:>8}"
+                + "".join(f"{stats[k] * 1000:>10.2f}" for k in ("p50", "p95", "p99", "max"))
+            )
+        return "\n".join(lines)
+
+
+tracer = Tracer(enabled=bool(os.getenv("TRACE_FILE")))
@@ -1,27 +1,146 @@
-from typing import Optional
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from tracing import tracer
+
+
+class TranscriptEntry:
+    """One utterance in the transcript log.
+
+    ``origin`` is the ``perf_counter`` time the speech started, if known.
+    """
+
+    __slots__ = ("seq", "text", "timestamp", "origin")
+
+    def __init__(self, seq: int, text: str, timestamp: float, origin: Optional[float] = None):
+        self.seq = seq
+        self.text = text
+        self.timestamp = timestamp
+        self.origin = origin
+
+    def __repr__(self):
+        return f"TranscriptEntry({self.seq}, {self.text!r})"
+
+
+class TranscriptLog:
+    """Append-only, thread-safe log of transcripts with increasing sequence numbers.
+
+    Readers keep a cursor (the next sequence number they want) and fetch only
+    what was added since, so a read costs O(new entries) however long the
+    session runs. Only the latest ``retention`` entries are kept; older ones are
+    passed to ``on_evict`` (e.g. to archive them) and dropped.
+    """
+
+    def __init__(
+        self,
+        retention: int = 1000,
+        on_evict: Optional[Callable[[TranscriptEntry], None]] = None,
+    ):
+        self.retention = retention
+        self.on_evict = on_evict
+        self.entries: deque[TranscriptEntry] = deque()
+        self.next_seq = 0
+        self._lock = threading.Lock()
+
+    def append(self, text: str, origin: Optional[float] = None) -> int:
+        """Add a transcript and return its sequence number."""
+        with self._lock:
+            seq = self.next_seq
+            self.entries.append(TranscriptEntry(seq, text, time.time(), origin))
+            self.next_seq += 1
+            evicted = []
+            while len(self.entries) > self.retention:
+                evicted.append(self.entries.popleft())
+        if self.on_evict:
+            for entry in evicted:
+                self.on_evict(entry)
+        return seq
+
+    def since(self, cursor: int) -> tuple[list[TranscriptEntry], int]:
+        """Entries with ``seq >= cursor`` and the cursor to pass next time.
+
+        Entries already evicted are skipped.
+        """
+        with self._lock:
+            new = []
+            # Walk back from the newest entry so the cost is O(new entries)
+            for entry in reversed(self.entries):
+                if entry.seq < cursor:
+                    break
+                new.append(entry)
+            new.reverse()
+            return new, self.next_seq
+
+    def texts(self) -> list[str]:
+        """Text of every retained entry, oldest first."""
+        with self._lock:
+            return [entry.text for entry in self.entries]
 
 
 class TranscriptManager:
     conversation: list[dict[str, str]] = []
-    transcript: list[str] = []
 
-    def __init__(self):
+    def __init__(self, cursor: int = 0, max_messages: int = 40):
+        """
+        Args:
+            cursor: First transcript sequence number this conversation should see
+            max_messages: Oldest conversation messages are dropped past this many
+        """
         self.conversation = []
+        self.cursor = cursor
+        self.max_messages = max_messages
+        self.last_instruction: Optional[dict[str, str]] = None
+        self.partial_sent = ""
+        # Speech start of the oldest instruction not yet on screen, for tracing
+        self.pending_origin: Optional[float] = None
 
-    def add_message(self, prompt: str, new_transcript: list[str]) -> Optional[str]:
-        """Adds a new message to the conversation. Returns the concate"""
-        if len(new_transcript) == len(self.transcript):
-            self.conversation += [
+    @tracer.traced("add_message")
+    def add_message(
+        self, prompt: str, transcript_log: TranscriptLog, partial: str = ""
+    ) -> Optional[str]:
+        """Adds a new message to the conversation with any transcripts since the
+        last call. ``partial`` is the stable start of an instruction the user is
+        still speaking; it is sent once and superseded by the final transcript.
+        Returns the new final instruction text, or None if there was none."""
+        entries, self.cursor = transcript_log.since(self.cursor)
+        if not entries and partial and partial != self.partial_sent:
+            self.partial_sent = partial
+            self.conversation.append(
+                {
+                    "role": "user",
+                    "content": prompt
+                    + "\n\n#Instructions so far (user is still speaking)\n"
+                    + partial,
+                }
+            )
+            new = None
+        elif not entries:
+            self.conversation.append(
                 {
                     "role": "user",
                     "content": prompt
                     + "\n\nNo new instructions from user. Keep executing their plan.",
                 }
-            ]
+            )
+            new = None
         else:
-            new = new_transcript[len(self.transcript) :]
-            self.conversation += [
-                {"role": "user", "content": prompt + "\n\n#New instructions\n" + new}
-            ]
-            self.transcript = new_transcript
-            return new
+            new = " ".join(entry.text for entry in entries)
+            self.partial_sent = ""
+            origins = [entry.origin for entry in entries if entry.origin is not None]
+            if origins and self.pending_origin is None:
+                self.pending_origin = min(origins)
+            self.last_instruction = {
+                "role": "user",
+                "content": prompt + "\n\n#New instructions\n" + new,
+            }
+            self.conversation.append(self.last_instruction)
+
+        # Keep per-tick cost flat over long sessions, but never lose the plan
+        # the player is still executing
+        if len(self.conversation) > self.max_messages:
+            del self.conversation[: len(self.conversation) - self.max_messages]
+            if self.last_instruction and self.last_instruction not in self.conversation:
+                self.conversation[0] = self.last_instruction
+        return new
@@ -0,0 +1,408 @@
+"""Speech-to-text engines and transcription off the audio thread.
+
+Finished speech segments are queued to a small pool of worker threads so the
+real-time capture callback never waits on a recognition round-trip. Each
+input (one per microphone) submits through its own stream; workers serve
+streams round-robin. Segments get per-stream sequence numbers on submit and
+each stream's results are delivered strictly in that order, even when a
+later, shorter utterance finishes first.
+
+Engines implement ``Transcriber``. ``GoogleTranscriber`` is the production
+engine; ``ToneTranscriber`` is a local stand-in that decodes synthetic tone
+"words" so streaming and segmentation can be exercised offline.
+"""
+
+import itertools
+import logging
+import threading
+from collections import deque
+from typing import Callable, Optional
+
+import numpy as np
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Default stream names are numbered across all pools, since they label the
+# process-wide queue depth gauge
+_stream_numbers = itertools.count()
+
+
+class Transcriber:
+    """Interface for speech-to-text engines.
+
+    ``transcribe`` receives raw 16-bit signed little-endian mono PCM as a
+    memoryview, so the capture side converts each utterance once and engines
+    read it without further copies. ``final`` is False for partial hypotheses
+    on an utterance that is still being spoken; engines may use it to trade
+    accuracy for speed. Return bracketed text such as
+    ``"[Could not understand audio]"`` when nothing was recognized.
+    """
+
+    def transcribe(self, pcm: memoryview, sample_rate: int, final: bool = True) -> str:
+        raise NotImplementedError
+
+
+class GoogleTranscriber(Transcriber):
+    """Google Web Speech API through the ``speech_recognition`` package."""
+
+    def __init__(self):
+        import speech_recognition as sr
+
+        self.recognizer = sr.Recognizer()
+        self.recognizer.energy_threshold = 300
+        self.recognizer.dynamic_energy_threshold = True
+
+    def transcribe(self, pcm, sample_rate, final=True):
+        import speech_recognition as sr
+
+        # AudioData wants raw frames, not a WAV container
+        audio_data = sr.AudioData(pcm, sample_rate, 2)  # 16-bit samples
+
+        # Try to recognize speech
+        try:
+            # Try Google Speech Recognition
+            text = self.recognizer.recognize_google(audio_data)
+            return text.strip()
+        except sr.UnknownValueError:
+            return "[Could not understand audio]"
+        except sr.RequestError:
+            return "[Speech service unavailable]"
+        except Exception:
+            return "[Recognition error]"
+
+
+class ToneTranscriber(Transcriber):
+    """Offline stand-in engine that decodes words encoded as pure tones.
+
+    Each word in ``vocabulary`` is a short sine burst at its own frequency,
+    separated by short gaps, so decoding a prefix of an utterance yields a
+    prefix of its words just like a real streaming recognizer. Use
+    ``synthesize`` to build matching audio for tests and benchmarks.
+    """
+
+    DEFAULT_VOCABULARY = [
+        "red", "blue", "green", "yellow", "up", "down", "left", "right",
+        "all", "units", "everyone", "move", "and", "then", "please", "twice",
+        "attack", "defend", "retreat", "stay",
+    ]
+
+    def __init__(
+        self,
+        vocabulary: Optional[list[str]] = None,
+        base_freq: float = 400.0,
+        freq_step: float = 80.0,
+        word_duration: float = 0.25,
+        gap_duration: float = 0.1,
+        amplitude: float = 0.2,
+    ):
+        self.vocabulary = vocabulary or self.DEFAULT_VOCABULARY
+        self.base_freq = base_freq
+        self.freq_step = freq_step
+        self.word_duration = word_duration
+        self.gap_duration = gap_duration
+        self.amplitude = amplitude
+
+    def synthesize(self, text: str, sample_rate: int) -> np.ndarray:
+        """Float32 audio for ``text``; every word must be in the vocabulary."""
+        word_samples = int(self.word_duration * sample_rate)
+        gap = np.zeros(int(self.gap_duration * sample_rate), dtype=np.float32)
+        t = np.arange(word_samples) / sample_rate
+        parts = []
+        for word in text.lower().split():
+            freq = self.base_freq + self.vocabulary.index(word) * self.freq_step
+            parts.append((self.amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32))
+            parts.append(gap)
+        return np.concatenate(parts) if parts else gap
+
+    def transcribe(self, pcm, sample_rate, final=True):
+        audio = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768
+        frame = int(0.01 * sample_rate)
+        frame_count = len(audio) // frame
+        if frame_count == 0:
+            return "[Could not understand audio]"
+        frames = audio[: frame_count * frame].reshape(frame_count, frame)
+        voiced = np.sqrt(np.mean(frames**2, axis=1)) > self.amplitude / 4
+
+        # Runs of voiced frames are words
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+        words = []
+        min_frames = int(self.word_duration * 100 * 0.6)
+        for start, end in zip(edges[::2], edges[1::2]):
+            if end - start < min_frames:
+                # Word cut off by the end of a partial window, or noise
+                continue
+            segment = audio[start * frame : end * frame]
+            spectrum = np.abs(np.fft.rfft(segment))
+            freq = np.argmax(spectrum) * sample_rate / len(segment)
+            idx = int(round((freq - self.base_freq) / self.freq_step))
+            if 0 <= idx < len(self.vocabulary):
+                words.append(self.vocabulary[idx])
+        if not words:
+            return "[Could not understand audio]"
+        return " ".join(words)
+
+
+class TranscriptionStream:
+    """One input's queue in a ``TranscriptionPool``.
+
+    Results are delivered in submission order within the stream. Each stream
+    has its own pending limit, so a busy microphone drops its own segments
+    instead of crowding out the others.
+    """
+
+    def __init__(
+        self,
+        pool: "TranscriptionPool",
+        transcribe: Callable[[any, int], str],
+        deliver: Callable[[int, str, any], None],
+        max_pending: int,
+        name: str,
+    ):
+        self.pool = pool
+        self.transcribe = transcribe
+        self.deliver = deliver
+        self.max_pending = max_pending
+        self.name = name
+        self.jobs = deque()  # (seq, audio, sample_rate, tag) waiting for a worker
+        self.outstanding = 0  # submitted but not yet delivered
+        self._next_seq = 0
+        self._deliver_lock = threading.Lock()
+        self._next_delivery = 0
+        self._finished = {}  # seq -> (transcript, tag) waiting on an earlier segment
+        self.dropped = 0
+
+    def submit(self, audio, sample_rate: int, tag=None, block: bool = False) -> Optional[int]:
+        """Queue a segment. ``tag`` is passed back on delivery.
+
+        Live capture must never wait, so by default a full stream drops the
+        segment and returns None. Offline replays pass ``block=True`` to wait
+        for room instead. Returns the segment's sequence number.
+        """
+        return self.pool._submit(self, audio, sample_rate, tag, block)
+
+    def pending(self) -> int:
+        """Segments waiting for a worker."""
+        with self.pool._condition:
+            return len(self.jobs)
+
+    def wait_idle(self):
+        """Block until every segment submitted here has been delivered."""
+        with self.pool._condition:
+            while self.outstanding:
+                self.pool._condition.wait()
+
+    def _complete(self, seq: int, transcript: str, tag):
+        """Record a result and deliver every result that is now in order."""
+        with self._deliver_lock:
+            self._finished[seq] = (transcript, tag)
+            while self._next_delivery in self._finished:
+                ready, ready_tag = self._finished.pop(self._next_delivery)
+                try:
+                    self.deliver(self._next_delivery, ready, ready_tag)
+                except Exception as e:
+                    logger.exception("❌ Transcript delivery error (%s): %s", self.name, e)
+                self._next_delivery += 1
+
+
+class TranscriptionPool:
+    """Worker threads shared by any number of input streams.
+
+    Workers take segments from streams round-robin, so one stream with a
+    backlog can't starve another, and each stream's results are delivered in
+    the order it submitted them.
+    """
+
+    def __init__(self, workers: int = 3):
+        """
+        Args:
+            workers: Number of segments transcribed in parallel
+        """
+        self.streams: list[TranscriptionStream] = []
+        self._ready = deque()  # streams with queued segments, in turn order
+        self._condition = threading.Condition()
+        self._stopping = False
+
+        self._threads = [
+            threading.Thread(target=self._worker, daemon=True) for _ in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def open_stream(
+        self,
+        transcribe: Callable[[any, int], str],
+        deliver: Callable[[int, str, any], None],
+        max_pending: int = 8,
+        name: Optional[str] = None,
+    ) -> TranscriptionStream:
+        """
+        Args:
+            transcribe: ``transcribe(audio, sample_rate) -> str``, run on a worker
+            deliver: ``deliver(seq, transcript, tag)``, called in submission order
+            max_pending: Segments this stream may have waiting before submits are dropped
+            name: Label for log messages and metrics; must be unique in the
+                process. Defaults to a fresh "stream N".
+        """
+        if name is None:
+            name = f"stream {next(_stream_numbers)}"
+        with self._condition:
+            stream = TranscriptionStream(self, transcribe, deliver, max_pending, name)
+            self.streams.append(stream)
+        metrics.transcription_queue_depth.labels(stream=stream.name).set_function(
+            lambda: len(stream.jobs)
+        )
+        return stream
+
+    @property
+    def dropped(self) -> int:
+        return sum(stream.dropped for stream in self.streams)
+
+    def pending(self) -> int:
+        """Segments waiting for a worker, across all streams."""
+        with self._condition:
+            return sum(len(stream.jobs) for stream in self.streams)
+
+    def wait_idle(self):
+        """Block until every submitted segment has been transcribed and delivered."""
+        with self._condition:
+            while any(stream.outstanding for stream in self.streams):
+                self._condition.wait()
+
+    def shutdown(self):
+        """Finish queued work and stop the workers."""
+        self.wait_idle()
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def _submit(self, stream, audio, sample_rate, tag, block):
+        with self._condition:
+            while len(stream.jobs) >= stream.max_pending:
+                if not block:
+                    stream.dropped += 1
+                    metrics.segments_dropped.labels(stream=stream.name).inc()
+                    logger.warning(
+                        "⚠️ Transcription queue full for %s, dropped segment (%d total)",
+                        stream.name,
+                        stream.dropped,
+                    )
+                    return None
+                self._condition.wait()
+            seq = stream._next_seq
+            stream._next_seq += 1
+            if not stream.jobs:
+                self._ready.append(stream)
+            stream.jobs.append((seq, audio, sample_rate, tag))
+            stream.outstanding += 1
+            self._condition.notify_all()
+            return seq
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._ready and not self._stopping:
+                    self._condition.wait()
+                if not self._ready:
+                    return
+                # Take one segment from the stream whose turn it is, then send
+                # the stream to the back of the line if it has more
+                stream = self._ready.popleft()
+                seq, audio, sample_rate, tag = stream.jobs.popleft()
+                if stream.jobs:
+                    self._ready.append(stream)
+                # Room freed up for a blocked submit
+                self._condition.notify_all()
+            try:
+                transcript = stream.transcribe(audio, sample_rate)
+            except Exception as e:
+                logger.exception("❌ Transcription worker error (%s): %s", stream.name, e)
+                transcript = "[Transcription error]"
+            stream._complete(seq, transcript, tag)
+            with self._condition:
+                stream.outstanding -= 1
+                self._condition.notify_all()
+
+
+_shared_pool: Optional[TranscriptionPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def shared_pool() -> TranscriptionPool:
+    """Process-wide pool for controllers that aren't given one, created on first use.
+
+    Workers are daemon threads that live as long as the process, so controllers
+    can come and go without each leaving its own idle workers behind.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = TranscriptionPool()
+        return _shared_pool
+
+
+class PartialWorker:
+    """Single background thread for partial hypotheses.
+
+    Only the newest window is kept: offering a window while one is waiting
+    replaces it, so a slow engine skips stale partials instead of queueing
+    them behind final transcripts.
+    """
+
+    def __init__(self, run: Callable[[any], None], discard: Optional[Callable[[any], None]] = None):
+        """
+        Args:
+            run: Called with each job on the worker thread
+            discard: Called with jobs replaced before they ran
+        """
+        self.run = run
+        self.discard = discard
+        self._pending = None
+        self._running = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def offer(self, job):
+        """Replace any waiting job with ``job``. Never blocks."""
+        with self._condition:
+            replaced = self._pending
+            self._pending = job
+            self._condition.notify_all()
+        if replaced is not None and self.discard:
+            self.discard(replaced)
+
+    def wait_idle(self):
+        """Block until no job is waiting or running."""
+        with self._condition:
+            while self._pending is not None or self._running:
+                self._condition.wait()
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while self._pending is None:
+                    self._condition.wait()
+                job = self._pending
+                self._pending = None
+                self._running = True
+            try:
+                self.run(job)
+            except Exception as e:
+                logger.exception("❌ Partial transcription error: %s", e)
+            with self._condition:
+                self._running = False
+                self._condition.notify_all()
+
+
+def stable_prefix(previous: str, current: str) -> str:
+    """Words two consecutive hypotheses agree on, from the start."""
+    stable = []
+    for old, new in zip(previous.split(), current.split()):
+        if old != new:
+            break
+        stable.append(new)
+    return " ".join(stable)
@@ -1,16 +1,130 @@
+import logging
+import threading
 import tkinter as tk
 from tkinter import Canvas, Label, Frame
 from gameboard import GameBoard, Player, Color, Direction
-from llm import get_llm_proposed_moves
 from transcript_manager import TranscriptManager
-from PIL import Image, ImageTk
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+GAME_OVER_IMAGES = {
+    Player.PLAYER: "assets/YOU_WIN.jpg",
+    Player.ENEMY: "assets/YOU_LOSE.jpg",
+}
+
+
+class GameOverImages:
+    """Victory and defeat images, decoded and resized once in the background.
+
+    Decoding and LANCZOS-resizing the JPGs takes long enough to stall the game
+    over screen, so it starts when the UI is built. Tk images can only be made
+    on the Tk thread, so those are created on first use and then kept.
+    """
+
+    def __init__(self, paths=GAME_OVER_IMAGES, size=(400, 250)):
+        self.paths = paths
+        self.size = size
+        self._images = {}  # victor -> resized PIL image
+        self._errors = {}  # victor -> why it couldn't be loaded
+        self._photos = {}  # victor -> Tk image
+        self._thread = threading.Thread(target=self._load, name="asset-loader", daemon=True)
+        self._thread.start()
+
+    def _load(self):
+        try:
+            from PIL import Image
+        except ImportError as e:
+            self._errors = {victor: e for victor in self.paths}
+            return
+        for victor, path in self.paths.items():
+            try:
+                with Image.open(path) as image:
+                    self._images[victor] = image.resize(self.size, Image.Resampling.LANCZOS)
+            except Exception as e:
+                self._errors[victor] = e
+
+    def photo(self, victor):
+        """Tk image for ``victor``, None if there is none. Raises if it failed to load."""
+        photo = self._photos.get(victor)
+        if photo is not None:
+            return photo
+        self._thread.join()
+        if victor in self._errors:
+            raise self._errors[victor]
+        image = self._images.get(victor)
+        if image is None:
+            return None
+        from PIL import ImageTk
+
+        photo = self._photos[victor] = ImageTk.PhotoImage(image)
+        return photo
+
+
+class HeadlessCanvas:
+    """In-memory stand-in for a Tk canvas, for rendering without a display.
+
+    Keeps each item's type, coordinates and options, so drawing code runs
+    unchanged and its results can be inspected or benchmarked.
+    """
+
+    def __init__(self):
+        self.items = {}  # item id -> [type, coords, options]
+        self._next_id = 1
+
+    def _create(self, kind, coords, options):
+        item = self._next_id
+        self._next_id += 1
+        self.items[item] = [kind, coords, options]
+        return item
+
+    def create_line(self, *coords, **options):
+        return self._create("line", coords, options)
+
+    def create_oval(self, *coords, **options):
+        return self._create("oval", coords, options)
+
+    def create_text(self, *coords, **options):
+        return self._create("text", coords, options)
+
+    def create_rectangle(self, *coords, **options):
+        return self._create("rectangle", coords, options)
+
+    def coords(self, item, *coords):
+        if coords:
+            self.items[item][1] = coords
+        return list(self.items[item][1])
+
+    def delete(self, item):
+        if item == "all":
+            self.items.clear()
+        else:
+            self.items.pop(item, None)
+
+    def find_all(self):
+        return tuple(self.items)
 
 
 class GameBoardUI:
-    def __init__(self, master, game_board=None):
+    def __init__(self, master, game_board=None, headless=False, show_threats=False):
+        """
+        Args:
+            master: Tk root, or with ``headless`` any object providing
+                ``after``, ``after_idle`` and ``after_cancel`` for the game loop
+            game_board: Board to show, a new one if None
+            headless: Draw onto a ``HeadlessCanvas`` instead of a window
+            show_threats: Outline the empty cells where the player's units
+                would be captured (red) or could capture (green)
+        """
         self.master = master
-        self.master.title("Game Board Display")
-        self.master.geometry("600x600")
+        self.headless = headless
+        self.show_threats = show_threats
+        if not headless:
+            self.master.title("Game Board Display")
+            self.master.geometry("600x600")
+
+        # Start decoding the game over images now so they're ready when needed
+        self.game_over_images = None if headless else GameOverImages()
 
         # Initialize the game board (use provided one or create new)
         self.game_board = game_board if game_board is not None else GameBoard()
@@ -27,11 +141,14 @@ class GameBoardUI:
         self.restart_callback = None
 
         # Create canvas
-        self.canvas = Canvas(master, width=500, height=500, bg="white")
-        self.canvas.pack(padx=50, pady=50)
+        if headless:
+            self.canvas = HeadlessCanvas()
+        else:
+            self.canvas = Canvas(master, width=500, height=500, bg="white")
+            self.canvas.pack(padx=50, pady=50)
 
         # Calculate cell size
-        self.cell_size = 500 // self.game_board.size
+        self.cell_size = max(1, 500 // self.game_board.size)
 
         # Map Color enum to hex colors
         self.color_map = {
@@ -44,31 +161,135 @@ class GameBoardUI:
         # Enemy pieces are all black
         self.enemy_color = "#000000"
 
+        # Persistent canvas items, kept between frames
+        self.grid_drawn = False
+        self.piece_items = {}  # piece id -> (oval item, text item)
+        self.piece_cells = {}  # piece id -> cell its items are drawn in
+        self.cell_pieces = {}  # cell -> id of the piece drawn there
+        self.dirty_cells = set()
+        self.threat_items = {}  # (cell, outline color) -> overlay rectangle
+
         self.draw_board()
 
     def set_gameboard(self, game_board):
         """Set a new gameboard and update the display."""
         self.game_board = game_board
-        self.cell_size = (
-            500 // self.game_board.size
+        self.cell_size = max(
+            1, 500 // self.game_board.size
         )  # Recalculate in case board size changed
-        self.draw_board()
+        self.draw_board(full=True)
     
     def set_restart_callback(self, callback):
         """Set the callback function to restart the game loop."""
         self.restart_callback = callback
 
-    def update_display(self):
-        """Refresh the display to show current game board state."""
+    def update_display(self, turn_result=None):
+        """Refresh the display to show current game board state.
+
+        Pass the result of ``execute_turn`` to redraw only the cells it touched.
+        Without it every piece is checked against the board.
+        """
+        if turn_result is None:
+            self.mark_all_dirty()
+        else:
+            self.mark_dirty(turn_result)
         self.draw_board()
 
     def refresh(self):
         """Alias for update_display() for convenience."""
         self.update_display()
 
-    def draw_board(self):
-        """Draw the game board and pieces."""
+    def mark_dirty(self, turn_result):
+        """Mark the cells changed by a turn: old and new cells of moved pieces and captured pieces."""
+        for piece_id, result in turn_result["move_results"].items():
+            if result["success"]:
+                self.dirty_cells.add(result["new_position"])
+                if piece_id in self.piece_cells:
+                    self.dirty_cells.add(self.piece_cells[piece_id])
+        for piece_id in turn_result["captured_pieces"]:
+            if piece_id in self.piece_cells:
+                self.dirty_cells.add(self.piece_cells[piece_id])
+
+    def mark_all_dirty(self):
+        """Mark every drawn and every occupied cell for re-checking."""
+        self.dirty_cells.update(self.piece_cells.values())
+        self.dirty_cells.update(piece.position for piece in self.game_board.pieces.values())
+
+    @tracer.traced("draw_board")
+    def draw_board(self, full=False):
+        """Draw the game board and pieces.
+
+        The grid and one oval/text pair per piece are created once and then kept.
+        Later calls only move, create or delete the items of pieces in dirty cells.
+        """
+        if full or not self.grid_drawn:
+            self._draw_full()
+            self._draw_threats()
+            return
+
+        # Pieces drawn in, or now standing on, any dirty cell
+        affected = set()
+        for cell in self.dirty_cells:
+            displayed_id = self.cell_pieces.get(cell)
+            if displayed_id is not None:
+                affected.add(displayed_id)
+            piece = self.game_board.get_piece_at(*cell)
+            if piece:
+                affected.add(piece.id)
+        self.dirty_cells.clear()
+
+        for piece_id in affected:
+            old_cell = self.piece_cells.pop(piece_id, None)
+            if old_cell is not None and self.cell_pieces.get(old_cell) == piece_id:
+                del self.cell_pieces[old_cell]
+
+        for piece_id in affected:
+            piece = self.game_board.pieces.get(piece_id)
+            if piece is None:
+                # Captured: the only time items are destroyed
+                for item in self.piece_items.pop(piece_id, ()):
+                    self.canvas.delete(item)
+                continue
+            if piece_id in self.piece_items:
+                self._move_piece_items(piece)
+            else:
+                self.draw_piece(piece, piece.row, piece.col)
+            self.piece_cells[piece_id] = piece.position
+            self.cell_pieces[piece.position] = piece_id
+
+        self._draw_threats()
+
+    def _draw_threats(self):
+        """Bring the threat overlay up to date with the current board.
+
+        Only outlines of cells whose danger or opportunity status changed are
+        created or deleted; the rest are kept.
+        """
+        wanted = set()
+        if self.show_threats:
+            from threat_map import ThreatMap
+
+            threats = ThreatMap(self.game_board, Player.PLAYER)
+            wanted.update((cell, "#FF0000") for cell in threats.danger_cells())
+            wanted.update((cell, "#00AA00") for cell in threats.opportunity_cells())
+
+        for key in set(self.threat_items) - wanted:
+            self.canvas.delete(self.threat_items.pop(key))
+        for key in wanted - set(self.threat_items):
+            (row, col), color = key
+            x1, y1, x2, y2 = self._piece_bounds(row, col)
+            self.threat_items[key] = self.canvas.create_rectangle(
+                x1, y1, x2, y2, outline=color, width=2, dash=(4, 2)
+            )
+
+    def _draw_full(self):
+        """Clear the canvas and create the grid and all piece items from scratch."""
         self.canvas.delete("all")
+        self.piece_items = {}
+        self.piece_cells = {}
+        self.cell_pieces = {}
+        self.dirty_cells = set()
+        self.threat_items = {}
 
         # Draw grid lines
         for i in range(self.game_board.size + 1):
@@ -83,20 +304,32 @@ class GameBoardUI:
             self.canvas.create_line(
                 0, y, self.game_board.size * self.cell_size, y, fill="gray", width=1
             )
+        self.grid_drawn = True
 
         # Draw pieces
-        for row in range(self.game_board.size):
-            for col in range(self.game_board.size):
-                piece = self.game_board.get_piece_at(row, col)
-                if piece:
-                    self.draw_piece(piece, row, col)
+        for piece in self.game_board.pieces.values():
+            self.draw_piece(piece, piece.row, piece.col)
+            self.piece_cells[piece.id] = piece.position
+            self.cell_pieces[piece.position] = piece.id
 
-    def draw_piece(self, piece, row, col):
-        """Draw a single piece on the board."""
+    def _piece_bounds(self, row, col):
+        """Canvas bounding box of the piece drawn in a cell."""
         x1 = col * self.cell_size + 5
         y1 = row * self.cell_size + 5
         x2 = x1 + self.cell_size - 10
         y2 = y1 + self.cell_size - 10
+        return x1, y1, x2, y2
+
+    def _move_piece_items(self, piece):
+        """Move an existing piece's oval and label to its current cell."""
+        oval, text = self.piece_items[piece.id]
+        x1, y1, x2, y2 = self._piece_bounds(piece.row, piece.col)
+        self.canvas.coords(oval, x1, y1, x2, y2)
+        self.canvas.coords(text, (x1 + x2) / 2, (y1 + y2) / 2)
+
+    def draw_piece(self, piece, row, col):
+        """Draw a single piece on the board."""
+        x1, y1, x2, y2 = self._piece_bounds(row, col)
 
         # Determine color
         if piece.owner == Player.PLAYER:
@@ -106,20 +339,21 @@ class GameBoardUI:
             color = self.enemy_color
 
         # Draw piece as circle
-        self.canvas.create_oval(x1, y1, x2, y2, fill=color, outline="black", width=2)
+        oval = self.canvas.create_oval(x1, y1, x2, y2, fill=color, outline="black", width=2)
 
         # Add piece ID as text in the center
         center_x = (x1 + x2) / 2
         center_y = (y1 + y2) / 2
         text_color = "white" if piece.owner == Player.ENEMY else "black"
 
-        self.canvas.create_text(
+        text = self.canvas.create_text(
             center_x,
             center_y,
             text=str(piece.id),
             fill=text_color,
             font=("Arial", 10, "bold"),
         )
+        self.piece_items[piece.id] = (oval, text)
 
     def show_game_over(self, victor=None):
         """Display a game over screen with victory/defeat image."""
@@ -130,8 +364,11 @@ class GameBoardUI:
         elif victor == Player.ENEMY:
             self.score['losses'] += 1
         
-        # Clear the canvas
+        # Clear the canvas; the next draw recreates the grid and pieces
         self.canvas.delete("all")
+        self.grid_drawn = False
+        if self.headless:
+            return
 
         # Create a frame for the game over screen
         game_over_frame = Frame(self.master, bg="black")
@@ -194,29 +431,8 @@ class GameBoardUI:
         image_label = None
 
         try:
-            if victor == Player.PLAYER:
-                # Load YOU_WIN.jpg
-                image_path = "assets/YOU_WIN.jpg"
-                pil_image = Image.open(image_path)
-                # Resize to fit nicely in the UI (adjust size as needed)
-                pil_image = pil_image.resize((400, 250), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(pil_image)
-
-                image_label = Label(game_over_frame, image=photo, bg="black")
-                image_label.image = (
-                    photo  # Keep a reference to prevent garbage collection
-                )
-                image_label.pack(pady=20)
-                image_loaded = True
-
-            elif victor == Player.ENEMY:
-                # Load YOU_LOSE.jpg
-                image_path = "assets/YOU_LOSE.jpg"
-                pil_image = Image.open(image_path)
-                # Resize to fit nicely in the UI (adjust size as needed)
-                pil_image = pil_image.resize((400, 250), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(pil_image)
-
+            photo = self.game_over_images.photo(victor)
+            if photo is not None:
                 image_label = Label(game_over_frame, image=photo, bg="black")
                 image_label.image = (
                     photo  # Keep a reference to prevent garbage collection
@@ -224,8 +440,8 @@ class GameBoardUI:
                 image_label.pack(pady=20)
                 image_loaded = True
 
-        except (FileNotFoundError, Exception) as e:
-            print(f"Could not load image: {e}")
+        except Exception as e:
+            logger.warning("Could not load image: %s", e)
             image_loaded = False
 
         # Fallback to custom graphics if images couldn't be loaded
@@ -311,20 +527,21 @@ class GameBoardUI:
             fg="white",
             padx=20,
             pady=10,
-            command=self.master.quit,
+            command=self.master.destroy,
         )
         exit_button.pack(side=tk.LEFT, padx=10)
 
     def restart_game(self):
         """Restart the game with a new board."""
         # Clear game over overlay frames (but preserve other frames like sidebars)
-        for widget in self.master.winfo_children():
-            if isinstance(widget, Frame) and widget.cget('bg') == 'black':
-                widget.destroy()
+        if not self.headless:
+            for widget in self.master.winfo_children():
+                if isinstance(widget, Frame) and widget.cget('bg') == 'black':
+                    widget.destroy()
 
         # Reset the game board using the existing helper
-        from gameboard import GameBoard
-        self.set_gameboard(GameBoard())
+        # Same size and number of units as the game that just ended
+        self.set_gameboard(GameBoard(self.game_board.size, self.game_board.pieces_per_side))
         
         # If a restart callback is set, call it to restart the game loop
         if self.restart_callback:
@@ -333,14 +550,13 @@ class GameBoardUI:
 
 def get_piece(game_board, player, color):
     """Find and return the red player piece."""
-    for piece in game_board.pieces.values():
-        if piece.owner == player and (color is None or piece.color == color):
-            return piece
-    return None
+    return game_board.get_piece_by_color(player, color)
 
 
 def demo_move_red_piece(ui):
     """Demo function that moves the red piece up every 2 seconds."""
+    from llm import get_llm_proposed_moves
+
     red_piece = get_piece(ui.game_board, Player.PLAYER, Color.RED)
 
     if red_piece is None:
@@ -357,7 +573,7 @@ def demo_move_red_piece(ui):
     )
 
     if move_successful:
-        ui.update_display()
+        ui.update_display(move_successful)
         print(f"Red piece moved to position {red_piece.position}")
 
         # Schedule the next move in 2 seconds
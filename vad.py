@@ -0,0 +1,111 @@
+"""Adaptive voice activity detection for the audio callback.
+
+A fixed RMS threshold either fires on background noise or clips quiet
+speakers. ``AdaptiveVAD`` tracks the noise floor and only calls a block speech
+when it is well above that floor *and* looks like speech: most of its energy
+in the voice band and a moderate zero-crossing rate. Separate start and
+continue thresholds (hysteresis) keep soft syllables inside an utterance
+without letting noise start one, which lets the controller end utterances
+after a much shorter silence.
+"""
+
+import numpy as np
+
+
+class AdaptiveVAD:
+    """Per-block speech/non-speech decision with an adaptive noise floor."""
+
+    def __init__(
+        self,
+        sample_rate: int,
+        start_ratio: float = 4.0,
+        continue_ratio: float = 2.0,
+        min_level: float = 0.002,
+        speech_band: tuple = (250.0, 3800.0),
+        min_band_ratio: float = 0.5,
+        max_zero_crossing_rate: float = 0.35,
+        floor_rise: float = 0.05,
+        floor_fall: float = 0.3,
+        floor_rise_in_speech: float = 0.002,
+    ):
+        """
+        Args:
+            sample_rate: Samples per second of the incoming blocks
+            start_ratio: Block RMS over noise floor needed to start speech
+            continue_ratio: Lower ratio that keeps an utterance going (hysteresis)
+            min_level: Absolute RMS below which nothing counts as speech
+            speech_band: Frequency range (Hz) holding most speech energy
+            min_band_ratio: Fraction of block energy that must be in the speech band
+            max_zero_crossing_rate: Noise-like blocks cross zero more often than this
+            floor_rise: Smoothing factor when a block is louder than the floor
+            floor_fall: Faster factor when it is quieter, so the floor recovers
+                quickly after a burst of noise (minimum tracking)
+            floor_rise_in_speech: Much slower rise during speech, so a noise
+                source that switches on can't hold an utterance open forever
+        """
+        self.sample_rate = sample_rate
+        self.start_ratio = start_ratio
+        self.continue_ratio = continue_ratio
+        self.min_level = min_level
+        self.speech_band = speech_band
+        self.min_band_ratio = min_band_ratio
+        self.max_zero_crossing_rate = max_zero_crossing_rate
+        self.floor_rise = floor_rise
+        self.floor_fall = floor_fall
+        self.floor_rise_in_speech = floor_rise_in_speech
+
+        self.noise_floor = None
+        self.in_speech = False
+        self._band_mask = None
+        self._block_size = 0
+
+        # Features of the last block, handy for tuning
+        self.level = 0.0
+        self.band_ratio = 0.0
+        self.zero_crossing_rate = 0.0
+
+    def _band(self, block_size: int) -> np.ndarray:
+        if block_size != self._block_size:
+            freqs = np.fft.rfftfreq(block_size, 1.0 / self.sample_rate)
+            low, high = self.speech_band
+            self._band_mask = (freqs >= low) & (freqs <= high)
+            self._block_size = block_size
+        return self._band_mask
+
+    def process(self, block: np.ndarray) -> bool:
+        """Classify one block of float32 mono samples. Returns True for speech."""
+        n = len(block)
+        if n == 0:
+            return self.in_speech
+
+        self.level = level = float(np.sqrt(np.dot(block, block) / n))
+        if self.noise_floor is None:
+            self.noise_floor = max(level, self.min_level / self.start_ratio)
+
+        power = np.abs(np.fft.rfft(block)) ** 2
+        total = power.sum()
+        self.band_ratio = float(power[self._band(n)].sum() / total) if total > 0 else 0.0
+        signs = np.signbit(block)
+        self.zero_crossing_rate = float(np.count_nonzero(signs[1:] != signs[:-1]) / n)
+
+        voice_like = (
+            self.band_ratio >= self.min_band_ratio
+            and self.zero_crossing_rate <= self.max_zero_crossing_rate
+        )
+        ratio = self.continue_ratio if self.in_speech else self.start_ratio
+        threshold = max(self.noise_floor * ratio, self.min_level)
+        self.in_speech = voice_like and level > threshold
+
+        if level < self.noise_floor:
+            alpha = self.floor_fall
+        elif self.in_speech:
+            alpha = self.floor_rise_in_speech
+        else:
+            alpha = self.floor_rise
+        self.noise_floor += alpha * (level - self.noise_floor)
+        return self.in_speech
+
+    def reset(self):
+        """Forget the noise floor, e.g. after switching input device."""
+        self.noise_floor = None
+        self.in_speech = False
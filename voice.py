@@ -1,147 +1,197 @@
+import logging
 import threading
 import time
 from typing import Callable, Optional
 import queue
 import sys
 
+from tracing import origin, tracer
+import metrics
+import cassette
+from logs import fields, setup_logging, shutdown_logging
+from audio_buffers import CaptureBuffer, PcmBufferPool, RingBuffer
+from vad import AdaptiveVAD
+from audio_sources import AudioSource, MicrophoneSource
+from transcription import (
+    GoogleTranscriber,
+    PartialWorker,
+    Transcriber,
+    TranscriptionPool,
+    shared_pool,
+    stable_prefix,
+)
+
+logger = logging.getLogger(__name__)
+
 
 class VoiceController:
-    def __init__(self, callback: Optional[Callable[[str], None]] = None):
+    def __init__(
+        self,
+        callback: Optional[Callable[[str], None]] = None,
+        transcriber: Optional[Transcriber] = None,
+        partial_callback: Optional[Callable[[int, Optional[str]], None]] = None,
+        source: Optional[AudioSource] = None,
+        transcription_pool: Optional[TranscriptionPool] = None,
+        name: Optional[str] = None,
+    ):
         """
         Initialize a raw audio voice controller that captures complete speech segments.
         
         Args:
-            callback: Function to call when transcript is ready
+            callback: Function to call when transcript is ready. Called from a
+                transcription worker thread, in utterance order.
+            transcriber: Speech-to-text engine, Google Speech Recognition by default
+            partial_callback: Enables streaming mode. Called as
+                ``partial_callback(utterance_id, stable_text)`` with the words
+                recognized so far while the user is still speaking, and with
+                ``stable_text=None`` once the utterance is finished and its
+                final transcript supersedes the partials.
+            source: Where audio comes from, the default microphone if None.
+                File and array sources also supply a simulated clock.
+            transcription_pool: Worker pool to transcribe on, shared between
+                controllers when several microphones are in use. The
+                process-wide ``shared_pool()`` if None.
+            name: Label for this input in log messages
         """
         self.callback = callback
+        self.partial_callback = partial_callback
         self.is_listening = False
+        self._stop_event = threading.Event()
+        
+        # Audio input; its clock is used for all silence and duration timing
+        self.source = source or MicrophoneSource()
+        self.clock = self.source.now
         
         # Audio detection settings
-        self.sample_rate = 16000
+        self.sample_rate = self.source.sample_rate
         self.chunk_size = 1024
-        self.voice_threshold = 0.005  # Volume threshold for voice detection
-        self.silence_duration = 1.2   # Seconds of silence before ending capture
+        self.vad = AdaptiveVAD(self.sample_rate)  # Noise-adaptive speech detection
+        self.silence_duration = 0.6   # Seconds of silence before ending capture
         self.min_speech_duration = 0.2  # Minimum speech length to process
         self.max_speech_duration = 12.0  # Maximum 12 seconds of capture
         self.pre_speech_buffer = 0.8  # Buffer before speech starts (to catch beginning)
+        self.partial_interval = 0.5  # Seconds between partial hypotheses in streaming mode
         
-        # Audio buffers
-        self.audio_buffer = []
-        self.pre_buffer = []
+        # Audio buffers, preallocated so the callback only copies into them
+        self.pre_buffer = RingBuffer(int(self.sample_rate * self.pre_speech_buffer))
+        self.audio_buffer = CaptureBuffer(
+            int(self.sample_rate * (self.max_speech_duration + self.pre_speech_buffer))
+            + self.source.block_size
+        )
+        # Int16 buffers utterances are converted into once, then lent to transcribers
+        self.pcm_pool = PcmBufferPool(self.audio_buffer.capacity)
         self.is_recording = False
         self.last_voice_time = 0
         self.recording_start_time = 0
+        self.speech_started = 0.0  # perf_counter at VAD start, for tracing
+        
+        # Recognition runs on worker threads so capture never stalls on it
+        self.name = name
+        self.transcription_pool = transcription_pool or shared_pool()
+        self.transcription = self.transcription_pool.open_stream(
+            self._transcribe_segment, self._deliver_transcript, name=name
+        )
+        
+        # Streaming state: each recording is one utterance
+        self.utterance_id = 0
+        self.last_partial_time = 0
+        self._partial_lock = threading.Lock()
+        self._open_utterance = None  # utterance still accepting partials
+        self._last_hypothesis = ""
+        self._last_stable = ""
+        self.partial_worker = (
+            PartialWorker(self._run_partial, self._discard_partial)
+            if partial_callback
+            else None
+        )
         
         # Try to set up audio and speech recognition
         try:
             import sounddevice as sd
             import numpy as np
             self.has_audio = True
-        except ImportError:
+        except (ImportError, OSError):
+            # sounddevice raises OSError when the PortAudio library is missing
             self.has_audio = False
-            print("❌ Audio libraries not available")
+            if isinstance(self.source, MicrophoneSource):
+                logger.error("❌ Audio libraries not available")
         
         # Try to set up speech recognition
-        try:
-            import speech_recognition as sr
-            self.recognizer = sr.Recognizer()
-            self.recognizer.energy_threshold = 300
-            self.recognizer.dynamic_energy_threshold = True
+        recording = cassette.active()
+        if transcriber is not None:
+            self.transcriber = transcriber
             self.has_speech_recognition = True
-        except ImportError:
-            self.has_speech_recognition = False
-            print("⚠️ Speech recognition not available")
+        elif recording and recording.mode == cassette.REPLAY:
+            # Replays need no engine at all
+            self.transcriber = None
+            self.has_speech_recognition = True
+        else:
+            try:
+                self.transcriber = GoogleTranscriber()
+                self.has_speech_recognition = True
+            except ImportError:
+                self.has_speech_recognition = False
+                logger.warning("⚠️ Speech recognition not available")
+        if recording and self.has_speech_recognition:
+            self.transcriber = cassette.CassetteTranscriber(recording, self.transcriber)
 
-    def transcribe_audio(self, audio_array, sample_rate):
-        """Transcribe audio array to text."""
+    def transcribe_audio(self, pcm, sample_rate, final=True):
+        """Transcribe 16-bit mono PCM frames to text."""
         if not self.has_speech_recognition:
             return "[Speech recognition not available]"
         
         try:
-            import speech_recognition as sr
-            import numpy as np
-            import io
-            import wave
-            
-            # Convert numpy array to AudioData
-            # Normalize to 16-bit PCM
-            audio_int16 = (audio_array * 32767).astype(np.int16)
-            
-            # Create WAV file in memory
-            wav_buffer = io.BytesIO()
-            with wave.open(wav_buffer, 'wb') as wav_file:
-                wav_file.setnchannels(1)  # Mono
-                wav_file.setsampwidth(2)  # 16-bit
-                wav_file.setframerate(sample_rate)
-                wav_file.writeframes(audio_int16.tobytes())
-            
-            wav_buffer.seek(0)
-            
-            # Create AudioData object
-            audio_data = sr.AudioData(
-                wav_buffer.getvalue(),
-                sample_rate,
-                2  # 16-bit samples
-            )
-            
-            # Try to recognize speech
-            try:
-                # Try Google Speech Recognition
-                text = self.recognizer.recognize_google(audio_data)
-                return text.strip()
-            except sr.UnknownValueError:
-                return "[Could not understand audio]"
-            except sr.RequestError:
-                return "[Speech service unavailable]"
-            except Exception as e:
-                return f"[Recognition error]"
-                
+            return self.transcriber.transcribe(pcm, sample_rate, final=final)
         except Exception as e:
             return f"[Transcription error]"
 
     def audio_callback(self, indata, frames, timestamp, status):
         """Process incoming audio data in real-time."""
         try:
-            import numpy as np
-            
+            if status and status.input_overflow:
+                # PortAudio dropped input because a callback ran late
+                metrics.audio_overflows.labels(stream=self.name or "default").inc()
+
             # Convert to mono if needed
             if len(indata.shape) > 1:
                 audio_data = indata[:, 0]
             else:
-                audio_data = indata.flatten()
+                audio_data = indata.reshape(-1)
             
-            # Calculate audio level (RMS)
-            audio_level = np.sqrt(np.mean(audio_data**2))
+            is_speech = self.vad.process(audio_data)
             
             # Always add to pre-buffer (circular buffer)
-            self.pre_buffer.extend(audio_data)
-            max_pre_buffer_size = int(self.sample_rate * self.pre_speech_buffer)
-            if len(self.pre_buffer) > max_pre_buffer_size:
-                excess = len(self.pre_buffer) - max_pre_buffer_size
-                self.pre_buffer = self.pre_buffer[excess:]
+            self.pre_buffer.write(audio_data)
             
-            current_time = time.time()
+            current_time = self.clock()
             
             # Check if voice is detected
-            if audio_level > self.voice_threshold:
+            if is_speech:
                 self.last_voice_time = current_time
                 
                 # Start recording if not already
                 if not self.is_recording:
                     self.is_recording = True
                     self.recording_start_time = current_time
-                    # Include pre-buffer to catch beginning of speech
-                    self.audio_buffer = list(self.pre_buffer)
-                    print(f"🎤 Recording...")
+                    self.speech_started = time.perf_counter()
+                    tracer.instant("vad.start", stream=self.name)
+                    # Include pre-buffer to catch beginning of speech; it
+                    # already holds the current block
+                    self.audio_buffer.start_from(self.pre_buffer)
+                    self._open_partials(current_time)
+                    logger.debug("🎤 Recording...", extra=fields(stream=self.name))
+                    return
                 
                 # Add current audio to buffer
-                self.audio_buffer.extend(audio_data)
+                buffer_full = not self.audio_buffer.append(audio_data)
                 
                 # Check if we've hit the maximum recording time
                 recording_duration = current_time - self.recording_start_time
-                if recording_duration >= self.max_speech_duration:
-                    print(f"⏰ Maximum recording time reached ({self.max_speech_duration}s)")
+                if buffer_full or recording_duration >= self.max_speech_duration:
+                    logger.info("⏰ Maximum recording time reached (%ss)", self.max_speech_duration)
                     self.end_recording()
+                else:
+                    self._maybe_offer_partial(current_time)
             
             # Check if recording and silence detected
             elif self.is_recording:
@@ -149,13 +199,17 @@ class VoiceController:
                 
                 # Continue recording during short silences
                 if silence_time < self.silence_duration:
-                    self.audio_buffer.extend(audio_data)
+                    if not self.audio_buffer.append(audio_data):
+                        self.end_recording()
+                    else:
+                        self._maybe_offer_partial(current_time)
                 else:
                     # End recording due to silence
                     self.end_recording()
             
         except Exception as e:
-            print(f"❌ Audio error: {e}")
+            # Can fire on every block; the rate limit keeps it from flooding
+            logger.error("❌ Audio error: %s", e)
 
     def end_recording(self):
         """End current recording and process the captured audio."""
@@ -163,97 +217,168 @@ class VoiceController:
             return
         
         self.is_recording = False
+        utterance_id = self._close_partials()
+        tracer.record("utterance", self.speech_started, stream=self.name)
         
         if len(self.audio_buffer) == 0:
+            self._retract_partials(utterance_id)
             return
         
         # Check if recording is long enough
         duration = len(self.audio_buffer) / self.sample_rate
         
         if duration < self.min_speech_duration:
-            print(f"⏭️ Too short ({duration:.1f}s), skipping")
-            self.audio_buffer = []
+            logger.debug("⏭️ Too short (%.1fs), skipping", duration)
+            metrics.segments_too_short.labels(stream=self.name or "default").inc()
+            self.audio_buffer.clear()
+            self._retract_partials(utterance_id)
             return
         
-        print(f"🔊 Captured {duration:.1f}s of speech")
+        logger.debug("🔊 Captured %.1fs of speech, transcribing", duration, extra=fields(stream=self.name))
         
-        # Transcribe the audio
+        # Convert once into a pooled PCM buffer for the transcription workers;
+        # the capture buffer is reused for the next utterance straight away
+        segment = self.pcm_pool.convert(self.audio_buffer.view())
+        seq = self.transcription.submit(
+            segment,
+            self.sample_rate,
+            tag=(utterance_id, self.speech_started),
+            # Replays faster than real time wait for a worker instead of dropping
+            block=not self.source.realtime,
+        )
+        self.audio_buffer.clear()
+        if seq is None:
+            segment.release()
+            self._retract_partials(utterance_id)
+
+    def _open_partials(self, current_time):
+        """Start a new utterance for streaming partials."""
+        self.utterance_id += 1
+        self.last_partial_time = current_time
+        with self._partial_lock:
+            self._open_utterance = self.utterance_id
+            self._last_hypothesis = ""
+            self._last_stable = ""
+
+    def _close_partials(self) -> int:
+        """Stop accepting partials for the current utterance and return its id."""
+        with self._partial_lock:
+            self._open_utterance = None
+        return self.utterance_id
+
+    def _retract_partials(self, utterance_id: int):
+        """Tell the listener an utterance's partials no longer apply."""
+        if self.partial_callback:
+            with self._partial_lock:
+                self.partial_callback(utterance_id, None)
+
+    def _maybe_offer_partial(self, current_time):
+        """Hand the utterance so far to the partial worker every partial_interval."""
+        if self.partial_worker is None:
+            return
+        if current_time - self.last_partial_time < self.partial_interval:
+            return
+        self.last_partial_time = current_time
+        segment = self.pcm_pool.convert(self.audio_buffer.view())
+        self.partial_worker.offer((self.utterance_id, segment))
+
+    @staticmethod
+    def _discard_partial(job):
+        job[1].release()
+
+    def _run_partial(self, job):
+        """Runs on the partial worker thread."""
+        utterance_id, segment = job
         try:
-            import numpy as np
-            audio_array = np.array(self.audio_buffer, dtype=np.float32)
-            
-            print("🔄 Transcribing...")
-            transcript = self.transcribe_audio(audio_array, self.sample_rate)
+            hypothesis = self.transcribe_audio(segment.frames, self.sample_rate, final=False)
+        finally:
+            segment.release()
+        if hypothesis.startswith('[') and hypothesis.endswith(']'):
+            return
+        with self._partial_lock:
+            # Drop partials that finished after the utterance did; the final
+            # transcript supersedes them
+            if utterance_id != self._open_utterance:
+                return
+            stable = stable_prefix(self._last_hypothesis, hypothesis)
+            self._last_hypothesis = hypothesis
+            if not stable or stable == self._last_stable:
+                return
+            self._last_stable = stable
+            # Called under the lock so a late partial can't follow the retraction
+            logger.debug("💬 Partial #%d: %r", utterance_id, stable)
+            self.partial_callback(utterance_id, stable)
+
+    def _transcribe_segment(self, segment, sample_rate):
+        """Runs on a transcription worker thread."""
+        try:
+            with tracer.span("transcribe", stream=self.name):
+                return self.transcribe_audio(segment.frames, sample_rate)
+        finally:
+            segment.release()
+
+    def _deliver_transcript(self, seq: int, transcript: str, tag):
+        """Called by the transcription pool, in utterance order."""
+        utterance_id, speech_started = tag
+        # Check if transcription was successful
+        if transcript.startswith('[') and transcript.endswith(']'):
+            # Error or could not understand
+            logger.info("📝 Not understood, nothing sent", extra=fields(stream=self.name))
+            # Don't send anything to callback/LLM
+        else:
+            # Successful transcription
+            logger.info("📝 TRANSCRIPT #%d: %r", seq, transcript, extra=fields(stream=self.name))
             
-            # Check if transcription was successful
-            if transcript.startswith('[') and transcript.endswith(']'):
-                # Error or could not understand
-                print("=" * 50)
-                print("📝 Not understood, nothing sent")
-                print("=" * 50)
-                # Don't send anything to callback/LLM
-            else:
-                # Successful transcription
-                print("=" * 50)
-                print(f"📝 TRANSCRIPT: '{transcript}'")
-                print("=" * 50)
-                
-                # Send transcript to callback for LLM processing
-                if self.callback:
+            # Send transcript to callback for LLM processing
+            if self.callback:
+                # Lets the listener trace latency from when the speech began
+                token = origin.set(speech_started)
+                try:
                     self.callback(transcript)
-                
-        except Exception as e:
-            print(f"❌ Error processing audio: {e}")
-        
-        # Clear buffer
-        self.audio_buffer = []
+                finally:
+                    origin.reset(token)
+
+        # The final transcript is out, so this utterance's partials are superseded
+        self._retract_partials(utterance_id)
 
     def start_listening(self):
         """Start raw audio voice detection."""
         if self.is_listening:
-            print("Already listening!")
+            logger.warning("Already listening!")
             return
         
-        if not self.has_audio:
-            print("❌ Audio system not available")
+        if isinstance(self.source, MicrophoneSource) and not self.has_audio:
+            logger.error("❌ Audio system not available")
             return
         
         self.is_listening = True
+        self._stop_event.clear()
         
         try:
-            import sounddevice as sd
-            
-            # Optimized settings to prevent buffer overflow
-            # Start audio input stream
-            with sd.InputStream(
-                samplerate=self.sample_rate,
-                channels=1,
-                callback=self.audio_callback,
-                blocksize=int(self.sample_rate * 0.05),  # 50ms blocks for better responsiveness
-                dtype='float32',
-                latency='low'  # Use low latency mode
-            ):
-                print("🎤 Listening...")
-                
-                while self.is_listening:
-                    time.sleep(0.1)
+            # Returns on stop_listening(), or when a file source runs out
+            self.source.run(self.audio_callback, self._stop_event)
                     
         except KeyboardInterrupt:
-            print("\n🛑 Stopping...")
+            logger.info("🛑 Stopping...")
         except Exception as e:
-            print(f"❌ Audio stream error: {e}")
+            logger.error("❌ Audio stream error: %s", e)
         finally:
             self.stop_listening()
 
     def stop_listening(self):
         """Stop voice detection."""
         self.is_listening = False
+        self._stop_event.set()
         
         # Process any remaining recording
         if self.is_recording:
             self.end_recording()
         
-        print("🔴 Stopped")
+        logger.info("🔴 Stopped")
+
+    def wait_for_transcripts(self):
+        """Block until every finished utterance has been transcribed and delivered."""
+        self.transcription.wait_idle()
 
     def set_callback(self, callback: Callable[[str], None]):
         """Set the callback function for transcripts."""
@@ -271,6 +396,7 @@ def transcript_handler(transcript: str):
 
 def main():
     """Main function for voice controller."""
+    setup_logging()
     # Create voice controller
     voice_controller = VoiceController(callback=transcript_handler)
     
@@ -281,6 +407,7 @@ def main():
         print("\n👋 Done!")
     finally:
         voice_controller.stop_listening()
+        shutdown_logging()
 
 
 if __name__ == "__main__":